@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Cache of tests collected by test runners.
+
+The cache maps every test file to the names of the tests collected from it,
+so that the tests can be shown before the test process has collected them.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+import hashlib
+import json
+import logging
+import os
+from typing import NamedTuple, Optional
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Version of the format in which the cache is stored. If the stored version
+# is different, the cache is discarded.
+CACHE_VERSION = 1
+
+
+class FileSignature(NamedTuple):
+    """Modification time (in nanoseconds) and SHA-1 hash of a file."""
+
+    mtime: int
+    sha1: str
+
+
+class CacheEntry(NamedTuple):
+    """Tests collected from a file, with the signature of that file."""
+
+    signature: FileSignature
+    tests: list[str]
+
+
+def file_signature(filename: str) -> Optional[FileSignature]:
+    """Return signature of file, or None if the file can not be read."""
+    try:
+        mtime = os.stat(filename).st_mtime_ns
+        with open(filename, 'rb') as file:
+            sha1 = hashlib.sha1(file.read()).hexdigest()
+    except OSError:
+        return None
+    return FileSignature(mtime, sha1)
+
+
+def updated_signature(filename: str,
+                      old: Optional[FileSignature]) -> Optional[FileSignature]:
+    """
+    Return signature of file, given its signature at an earlier time.
+
+    If the file has the same modification time as before, then the old
+    signature is returned instead of reading the file again. Return None if
+    the file can not be read.
+    """
+    if old:
+        try:
+            if os.stat(filename).st_mtime_ns == old.mtime:
+                return old
+        except OSError:
+            return None
+    return file_signature(filename)
+
+
+class CollectionCache:
+    """
+    Cache mapping test files to the tests collected from them.
+
+    For every test file, the cache stores the signature of the file when the
+    tests were collected and the names of the tests. An entry is valid as
+    long as the file has the same modification time or, failing that, the
+    same contents. The cache is stored in JSON format.
+
+    Attributes
+    ----------
+    filename : str
+        Name of file in which the cache is stored.
+    entries : dict of (str, CacheEntry)
+        Cache entries, indexed by the absolute path of the test file.
+    """
+
+    def __init__(self, filename: str):
+        """Construct cache and load it from `filename` if it exists."""
+        self.filename = filename
+        self.entries: dict[str, CacheEntry] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load cache from file, or clear it if the file can not be read."""
+        self.entries = {}
+        try:
+            with open(self.filename, encoding='utf-8') as file:
+                data = json.load(file)
+            if data['version'] != CACHE_VERSION:
+                return
+            for path, (mtime, sha1, tests) in data['files'].items():
+                self.entries[path] = CacheEntry(
+                    FileSignature(mtime, sha1), tests)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.warning(f'Ignoring collection cache {self.filename}: {err}')
+            self.entries = {}
+
+    def save(self) -> None:
+        """Save cache to file."""
+        data = {
+            'version': CACHE_VERSION,
+            'files': {path: [entry.signature.mtime, entry.signature.sha1,
+                             entry.tests]
+                      for path, entry in self.entries.items()}
+        }
+        tempname = self.filename + '.tmp'
+        try:
+            with open(tempname, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tempname, self.filename)
+        except OSError as err:
+            logger.warning(f'Cannot save collection cache: {err}')
+
+    def signature(self, filename: str) -> Optional[FileSignature]:
+        """
+        Return signature of test file.
+
+        If the file is in the cache with the same modification time, then the
+        stored hash is reused instead of reading the file again.
+        """
+        entry = self.entries.get(filename)
+        return updated_signature(filename, entry and entry.signature)
+
+    def cached_tests(self) -> list[str]:
+        """
+        Return names of all tests in the cache which are still valid.
+
+        Entries of test files which were changed or removed are discarded.
+        """
+        result = []
+        for path, entry in list(self.entries.items()):
+            signature = self.signature(path)
+            if signature is None or signature.sha1 != entry.signature.sha1:
+                del self.entries[path]
+                continue
+            if signature != entry.signature:
+                # File touched but not changed
+                self.entries[path] = CacheEntry(signature, entry.tests)
+            result.extend(entry.tests)
+        return result
+
+    def update(self, collected: dict[str, CacheEntry]) -> None:
+        """
+        Replace contents of cache by tests collected in a test run.
+
+        Parameters
+        ----------
+        collected : dict of (str, CacheEntry)
+            All tests collected in the test run, indexed by test file.
+        """
+        self.entries = dict(collected)
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Index of the lines executed and missed in the last test run with coverage.
+
+The index is used to mark the lines which are not covered by tests in the
+editor. It is kept between sessions, so the lines are also marked before
+the tests are run again.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+from array import array
+from bisect import bisect_left, bisect_right
+import json
+import logging
+import os
+import os.path as osp
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+# Local imports
+from spyder_unittest.backend.coveragereport import (
+    CoverageReport, FileCoverage)
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Version of the format in which the index is stored. If the stored version
+# is different, the index is discarded.
+COVERAGE_INDEX_VERSION = 1
+
+
+def normalize_filename(filename: str) -> str:
+    """Return normalized absolute path, used as key in the index."""
+    return osp.normcase(osp.abspath(filename))
+
+
+class LineRanges:
+    """
+    Set of line numbers, stored as sorted and disjoint ranges.
+
+    The first and last line of every range are stored in two arrays, so
+    the set takes little memory even for large files, and looking up a line
+    or the ranges in a part of the file takes logarithmic time.
+    """
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, ranges: Iterable[tuple[int, int]] = ()):
+        """
+        Construct set from ranges `(first, last)`, including both ends.
+
+        The ranges should be sorted and disjoint.
+        """
+        self.starts = array('l')
+        self.ends = array('l')
+        for first, last in ranges:
+            self.starts.append(first)
+            self.ends.append(last)
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[int]) -> LineRanges:
+        """Construct set from line numbers, grouping consecutive lines."""
+        result = cls()
+        for line in sorted(lines):
+            if result.ends and result.ends[-1] == line - 1:
+                result.ends[-1] = line
+            elif not result.ends or result.ends[-1] < line:
+                result.starts.append(line)
+                result.ends.append(line)
+        return result
+
+    def __contains__(self, line: int) -> bool:
+        """Return whether line is in the set."""
+        pos = bisect_right(self.starts, line) - 1
+        return pos >= 0 and line <= self.ends[pos]
+
+    def __eq__(self, other: object) -> bool:
+        """Test for equality."""
+        if not isinstance(other, LineRanges):
+            return NotImplemented
+        return self.starts == other.starts and self.ends == other.ends
+
+    def __len__(self) -> int:
+        """Return number of ranges."""
+        return len(self.starts)
+
+    def ranges(self) -> list[tuple[int, int]]:
+        """Return all ranges in the set."""
+        return list(zip(self.starts, self.ends))
+
+    def lines(self) -> Iterator[int]:
+        """Iterate over all line numbers in the set."""
+        for first, last in zip(self.starts, self.ends):
+            yield from range(first, last + 1)
+
+    def ranges_between(self, first: int, last: int) -> list[tuple[int, int]]:
+        """
+        Return ranges in the set between lines `first` and `last`.
+
+        Ranges which extend beyond these lines are clipped.
+        """
+        result = []
+        pos = bisect_left(self.ends, first)
+        while pos < len(self.starts) and self.starts[pos] <= last:
+            result.append((max(self.starts[pos], first),
+                           min(self.ends[pos], last)))
+            pos += 1
+        return result
+
+
+def statement_ranges(ranges: list[tuple[int, int]],
+                     cov: FileCoverage) -> LineRanges:
+    """
+    Return set of the statements in ranges from a coverage report.
+
+    The ranges in the report span lines which are not statements, like
+    blank lines and comments, between the statements in them; see
+    `coveragereport.line_ranges()`. Those lines are left out, so that they
+    are not marked in the editor. If the report does not list the
+    statements, the ranges are used as they are.
+    """
+    line_set = LineRanges(ranges)
+    if cov.statement_lines is None:
+        return line_set
+    return LineRanges.from_lines(
+        line for line in cov.statement_lines if line in line_set)
+
+
+class FileLines(NamedTuple):
+    """
+    Lines executed and missed in a file.
+
+    The mtime is the modification time of the file when the coverage was
+    recorded; if the file is changed afterwards, the line numbers may be
+    wrong.
+    """
+
+    mtime: float
+    executed: LineRanges
+    missing: LineRanges
+
+
+class CoverageIndex:
+    """
+    Persistent index of lines executed and missed in a test run.
+
+    Attributes
+    ----------
+    filename : str
+        Name of file in which the index is stored.
+    entries : dict of (str, FileLines)
+        Lines executed and missed in every file, indexed by the normalized
+        absolute path of the file.
+    stale : set of str
+        Normalized paths of files in the index which were changed since the
+        coverage was recorded. The files are checked when the index is
+        loaded and when `check()` is called, not on every lookup.
+    """
+
+    def __init__(self, filename: str):
+        """Construct index and load it from `filename` if it exists."""
+        self.filename = filename
+        self.entries: dict[str, FileLines] = {}
+        self.stale: set[str] = set()
+        self.load()
+
+    def load(self) -> None:
+        """Load index from file, or clear it if the file can not be read."""
+        self.entries = {}
+        self.stale = set()
+        try:
+            with open(self.filename, encoding='utf-8') as file:
+                data = json.load(file)
+            if data['version'] != COVERAGE_INDEX_VERSION:
+                return
+            for path, (mtime, executed, missing) in data['files'].items():
+                self.entries[path] = FileLines(
+                    float(mtime), LineRanges(map(tuple, executed)),
+                    LineRanges(map(tuple, missing)))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.warning(f'Ignoring coverage index {self.filename}: {err}')
+            self.entries = {}
+        for path in self.entries:
+            self.check(path)
+
+    def save(self) -> None:
+        """Save index to file."""
+        data = {
+            'version': COVERAGE_INDEX_VERSION,
+            'files': {path: [entry.mtime, entry.executed.ranges(),
+                             entry.missing.ranges()]
+                      for path, entry in self.entries.items()}
+        }
+        tempname = self.filename + '.tmp'
+        try:
+            with open(tempname, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tempname, self.filename)
+        except OSError as err:
+            logger.warning(f'Cannot save coverage index: {err}')
+
+    def update(self, report: CoverageReport, wdir: str) -> None:
+        """
+        Replace index by the lines in a coverage report.
+
+        Parameters
+        ----------
+        report : CoverageReport
+            Coverage report of a test run.
+        wdir : str
+            Directory in which the tests were run, which file names in the
+            report are relative to.
+        """
+        self.entries = {}
+        self.stale = set()
+        for cov in report.files:
+            path = normalize_filename(osp.join(wdir, cov.filename))
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            self.entries[path] = FileLines(
+                mtime, statement_ranges(cov.executed_ranges, cov),
+                statement_ranges(cov.missing_ranges, cov))
+
+    def check(self, filename: str) -> None:
+        """
+        Check whether file was changed since the coverage was recorded.
+
+        This should be called when the file may have been changed, for
+        instance when it is saved.
+        """
+        path = normalize_filename(filename)
+        entry = self.entries.get(path)
+        if entry is None:
+            return
+        try:
+            changed = os.stat(path).st_mtime != entry.mtime
+        except OSError:
+            changed = True
+        if changed:
+            self.stale.add(path)
+        else:
+            self.stale.discard(path)
+
+    def lookup(self, filename: str) -> Optional[FileLines]:
+        """
+        Return lines executed and missed in file.
+
+        Return None if the file is not in the index, or if it was found to
+        be changed since the coverage was recorded.
+        """
+        path = normalize_filename(filename)
+        if path in self.stale:
+            return None
+        return self.entries.get(path)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Coverage report written by the test process in JSON format.
+
+The report is written by coverage.py (for instance with
+`--cov-report=json:FILE` in pytest-cov) and read here in one pass, so the
+coverage of every file is available without parsing terminal output.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+import json
+import logging
+from typing import Any, NamedTuple, Optional
+
+# Logging
+logger = logging.getLogger(__name__)
+
+
+class FileCoverage(NamedTuple):
+    """
+    Coverage of one source file.
+
+    The file name is as reported by coverage.py, which is relative to the
+    directory in which the tests were run if the file is in it. The executed
+    and missing lines are given as ranges `(first, last)` of line numbers
+    (starting at 1), including both ends; see `line_ranges()`. The line
+    numbers of all statements are in `statement_lines`. If coverage.py
+    recorded which test ran every line, then `context_lines` maps the
+    context of every test to the lines it ran; lines run outside tests
+    have the empty context.
+    """
+
+    filename: str
+    statements: int
+    missing: int
+    percent: str
+    missing_ranges: list[tuple[int, int]]
+    executed_ranges: list[tuple[int, int]]
+    statement_lines: Optional[list[int]] = None
+    context_lines: Optional[dict[str, list[int]]] = None
+
+
+class CoverageReport(NamedTuple):
+    """Total coverage, and the coverage of every source file."""
+
+    percent: str
+    files: list[FileCoverage]
+
+
+def line_ranges(statements: list[int],
+                lines: list[int]) -> list[tuple[int, int]]:
+    """
+    Group some of the statements in a file into ranges.
+
+    Lines are in the same range if there is no other statement between
+    them, even if there are other lines, like comments, between them. This
+    is how coverage.py reports missing lines.
+    """
+    line_set = set(lines)
+    result = []
+    start = end = None
+    for line in sorted(statements):
+        if line in line_set:
+            if start is None:
+                start = line
+            end = line
+        elif start is not None:
+            result.append((start, end))
+            start = None
+    if start is not None:
+        result.append((start, end))
+    return result
+
+
+def format_ranges(ranges: list[tuple[int, int]]) -> str:
+    """Format ranges of lines like `7-53, 94`."""
+    return ', '.join(str(first) if first == last else f'{first}-{last}'
+                     for first, last in ranges)
+
+
+def display_percent(covered: int, total: int) -> str:
+    """
+    Format percentage of covered statements as coverage.py does.
+
+    The percentage is rounded, except that it is only 0 or 100 if no or all
+    statements are covered.
+    """
+    if total == 0:
+        return '100'
+    percent = 100 * covered / total
+    if 0 < percent < 1:
+        percent = 1
+    elif 99 < percent < 100:
+        percent = 99
+    return str(round(percent))
+
+
+def _context_lines(info: dict[str, Any]) -> Optional[dict[str, list[int]]]:
+    """Return lines run in every context, if contexts are in report."""
+    if 'contexts' not in info:
+        return None
+    result: dict[str, list[int]] = {}
+    for line, contexts in info['contexts'].items():
+        for context in contexts:
+            result.setdefault(context, []).append(int(line))
+    for lines in result.values():
+        lines.sort()
+    return result
+
+
+def _percent(summary: dict[str, Any]) -> str:
+    """Return percentage in summary, formatted as coverage.py does."""
+    if 'percent_covered_display' in summary:
+        return summary['percent_covered_display']
+    return str(round(summary['percent_covered']))
+
+
+def load_coverage_report(filename: str) -> Optional[CoverageReport]:
+    """
+    Load coverage report in JSON format from file.
+
+    Return None if the file does not exist or can not be read.
+    """
+    try:
+        with open(filename, encoding='utf-8') as file:
+            data = json.load(file)
+        files = []
+        for name, info in data['files'].items():
+            summary = info['summary']
+            statements = sorted(info['executed_lines']
+                                + info['missing_lines'])
+            files.append(FileCoverage(
+                name, summary['num_statements'], summary['missing_lines'],
+                _percent(summary),
+                line_ranges(statements, info['missing_lines']),
+                line_ranges(statements, info['executed_lines']),
+                statements, _context_lines(info)))
+        return CoverageReport(_percent(data['totals']), files)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as err:
+        logger.warning(f'Cannot read coverage report {filename}: {err}')
+        return None
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Coverage accumulated over test runs which each run some of the tests.
+
+This is used so that running a single test or a few tests with coverage
+does not replace the coverage of the whole test suite by the coverage of
+only the tests that were run.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+import json
+import logging
+import os
+import os.path as osp
+from typing import Callable, NamedTuple, Optional
+
+# Local imports
+from spyder_unittest.backend.collectioncache import (
+    FileSignature, updated_signature)
+from spyder_unittest.backend.coverageindex import LineRanges
+from spyder_unittest.backend.coveragereport import (
+    CoverageReport, display_percent, FileCoverage, line_ranges)
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Version of the format in which the store is stored. If the stored version
+# is different, the store is discarded.
+COVERAGE_STORE_VERSION = 1
+
+
+class StoredFile(NamedTuple):
+    """
+    Lines of a source file run by every test.
+
+    The lines in `base` were run outside any test, for instance when the
+    module was imported. The signature is that of the file when the lines
+    were recorded.
+    """
+
+    signature: FileSignature
+    statements: LineRanges
+    base: LineRanges
+    tests: dict[str, LineRanges]
+
+
+class CoverageStore:
+    """
+    Persistent store of the lines run by every test.
+
+    The store is built from coverage reports which record which test ran
+    every line (coverage contexts). The following rules decide how a test
+    run updates the store:
+
+    - If all tests were run, the store is replaced by the coverage of the
+      test run.
+    - Otherwise, the lines of the tests that were run are replaced, and the
+      lines of the other tests are kept. Lines run outside tests are added.
+    - If a source file changed since its lines were recorded, the lines of
+      tests that were not run again are dropped, because the line numbers
+      may be wrong. The coverage of that file may thus be too low until all
+      tests are run again.
+
+    Tests which are removed are only dropped from the store when all tests
+    are run. The coverage computed from the store, see `report()`, only
+    counts lines and not branches.
+
+    Attributes
+    ----------
+    filename : str
+        Name of file in which the store is stored.
+    wdir : str
+        Working directory for running tests, which the file names in the
+        store are relative to.
+    entries : dict of (str, StoredFile)
+        Lines run in every source file, indexed by the file name as given in
+        the coverage report.
+    """
+
+    def __init__(self, filename: str, wdir: str):
+        """Construct store and load it from `filename` if it exists."""
+        self.filename = filename
+        self.wdir = wdir
+        self.entries: dict[str, StoredFile] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load store from file, or clear it if the file can not be read."""
+        self.entries = {}
+        try:
+            with open(self.filename, encoding='utf-8') as file:
+                data = json.load(file)
+            if data['version'] != COVERAGE_STORE_VERSION:
+                return
+            for name, info in data['files'].items():
+                mtime, sha1 = info['signature']
+                self.entries[name] = StoredFile(
+                    FileSignature(mtime, sha1),
+                    LineRanges(map(tuple, info['statements'])),
+                    LineRanges(map(tuple, info['base'])),
+                    {test: LineRanges(map(tuple, ranges))
+                     for test, ranges in info['tests'].items()})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.warning(f'Ignoring coverage store {self.filename}: {err}')
+            self.entries = {}
+
+    def save(self) -> None:
+        """Save store to file."""
+        data = {
+            'version': COVERAGE_STORE_VERSION,
+            'files': {
+                name: {
+                    'signature': [entry.signature.mtime,
+                                  entry.signature.sha1],
+                    'statements': entry.statements.ranges(),
+                    'base': entry.base.ranges(),
+                    'tests': {test: lines.ranges()
+                              for test, lines in entry.tests.items()}
+                }
+                for name, entry in self.entries.items()}
+        }
+        tempname = self.filename + '.tmp'
+        try:
+            with open(tempname, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tempname, self.filename)
+        except OSError as err:
+            logger.warning(f'Cannot save coverage store: {err}')
+
+    def update(self, report: CoverageReport,
+               tests_run: Optional[set[str]],
+               test_for_context: Callable[[str], Optional[str]]) -> None:
+        """
+        Update store with the coverage recorded in a test run.
+
+        Parameters
+        ----------
+        report : CoverageReport
+            Coverage report of the test run.
+        tests_run : set of str or None
+            Names of the tests that were run, or None if all tests were run.
+        test_for_context : callable
+            Function which returns the name of the test for a coverage
+            context in the report, or None if the context is not a test.
+        """
+        if tests_run is None:
+            old_entries: dict[str, StoredFile] = {}
+        else:
+            old_entries = self.entries
+        new_entries = dict(old_entries)
+        for cov in report.files:
+            old_entry = old_entries.get(cov.filename)
+            signature = updated_signature(
+                osp.join(self.wdir, cov.filename),
+                old_entry.signature if old_entry else None)
+            if signature is None or cov.statement_lines is None:
+                new_entries.pop(cov.filename, None)
+                continue
+            base: set[int] = set()
+            tests: dict[str, LineRanges] = {}
+            if old_entry and old_entry.signature.sha1 == signature.sha1:
+                base.update(old_entry.base.lines())
+                tests = {test: lines for test, lines in old_entry.tests.items()
+                         if test not in tests_run}
+            if cov.context_lines is None:
+                executed = LineRanges(cov.executed_ranges)
+                base.update(line for line in cov.statement_lines
+                            if line in executed)
+            else:
+                test_lines: dict[str, list[int]] = {}
+                for context, lines in cov.context_lines.items():
+                    test = test_for_context(context)
+                    if test is None:
+                        base.update(lines)
+                    else:
+                        test_lines.setdefault(test, []).extend(lines)
+                for test, lines in test_lines.items():
+                    tests[test] = LineRanges.from_lines(lines)
+            new_entries[cov.filename] = StoredFile(
+                signature, LineRanges.from_lines(cov.statement_lines),
+                LineRanges.from_lines(base), tests)
+        self.entries = new_entries
+
+    def report(self) -> CoverageReport:
+        """Return coverage report of all lines run by the tests in store."""
+        files = []
+        total_statements = total_executed = 0
+        for name in sorted(self.entries):
+            entry = self.entries[name]
+            statements = list(entry.statements.lines())
+            executed = set(entry.base.lines())
+            for lines in entry.tests.values():
+                executed.update(lines.lines())
+            executed_lines = [line for line in statements if line in executed]
+            missing_lines = [line for line in statements
+                             if line not in executed]
+            files.append(FileCoverage(
+                name, len(statements), len(missing_lines),
+                display_percent(len(executed_lines), len(statements)),
+                line_ranges(statements, missing_lines),
+                line_ranges(statements, executed_lines), statements))
+            total_statements += len(statements)
+            total_executed += len(executed_lines)
+        return CoverageReport(
+            display_percent(total_executed, total_statements), files)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Reading and replaying event logs recorded by test workers.
+
+A test worker records the stream of events it would otherwise send over ZMQ
+in an event log if it is given `file` or `file:<filename>` instead of an
+endpoint; see `EventRecorder` in the `zmqwriter` module. An EventReplay
+feeds such a stream into a test runner, as if the events were sent by a test
+process, which is useful for profiling the processing of test results
+without running the tests.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+import time
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+# Third party imports
+from qtpy.QtCore import QObject, QTimer, Signal
+
+# Local imports
+from spyder_unittest.backend.runnerbase import RunnerBase
+from spyder_unittest.backend.workers.zmqwriter import (
+    EVENT_LOG_MAGIC, EVENT_LOG_RECORD_HEADER, EVENT_LOG_VERSION)
+from spyder_unittest.backend.zmqreader import EventDecoder
+
+
+class EventLogRecord(NamedTuple):
+    """
+    Record in an event log.
+
+    The timestamp is the time in seconds since the start of the recording,
+    and the frame is the encoded object as it would be sent over ZMQ.
+    """
+
+    timestamp: float
+    frame: bytes
+
+
+def read_event_log(file: BinaryIO) -> Iterator[EventLogRecord]:
+    """
+    Read records from event log.
+
+    Arguments
+    ---------
+    file : binary file object
+        Event log, opened for reading.
+
+    Raises
+    ------
+    ValueError
+        If the file is not an event log or if it is truncated.
+    """
+    header = file.read(len(EVENT_LOG_MAGIC) + 1)
+    if header[:-1] != EVENT_LOG_MAGIC:
+        raise ValueError('Not an event log')
+    if header[-1] != EVENT_LOG_VERSION:
+        raise ValueError(f'Unsupported event log version {header[-1]}')
+    while True:
+        record_header = file.read(EVENT_LOG_RECORD_HEADER.size)
+        if not record_header:
+            return
+        if len(record_header) < EVENT_LOG_RECORD_HEADER.size:
+            raise ValueError('Truncated event log')
+        timestamp, length = EVENT_LOG_RECORD_HEADER.unpack(record_header)
+        frame = file.read(length)
+        if len(frame) < length:
+            raise ValueError('Truncated event log')
+        yield EventLogRecord(timestamp, frame)
+
+
+def load_event_log(filename: str) -> list[object]:
+    """Return list of all objects recorded in event log."""
+    decoder = EventDecoder()
+    with open(filename, 'rb') as file:
+        return [decoder.decode(record.frame)
+                for record in read_event_log(file)]
+
+
+class EventReplay(QObject):
+    """
+    Feed events recorded in an event log into a test runner.
+
+    The events are decoded and passed to the `process_output()` method of
+    the runner in batches, from the Qt event loop. If `realtime` is set, the
+    events are passed at the same pace as they were recorded; otherwise,
+    they are passed as fast as possible, in batches of at most `batch_size`
+    events, returning to the event loop between batches so that the GUI can
+    process them. The runner should be set up as if it started a test
+    process; for instance, its `config` attribute should be set.
+
+    Signals
+    -------
+    sig_finished()
+        Emitted when all events are replayed.
+    """
+
+    sig_finished = Signal()
+
+    def __init__(self, filename: str, runner: RunnerBase,
+                 realtime: bool = False, batch_size: int = 1000,
+                 parent: Optional[QObject] = None) -> None:
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        filename : str
+            Name of event log.
+        runner : RunnerBase
+            Test runner to which events are passed.
+        realtime : bool
+            Whether to replay events at the pace they were recorded, instead
+            of as fast as possible.
+        batch_size : int
+            Maximum number of events passed to runner in one call.
+        parent : QObject or None
+            Parent of this object.
+        """
+        super().__init__(parent)
+        self.filename = filename
+        self.runner = runner
+        self.realtime = realtime
+        self.batch_size = batch_size
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.step)
+        self.file: Optional[BinaryIO] = None
+
+    def start(self) -> None:
+        """Start replaying events."""
+        self.file = open(self.filename, 'rb')
+        self.records = read_event_log(self.file)
+        self.decoder = EventDecoder()
+        self.next_record: Optional[EventLogRecord] = None
+        self.start_time = time.monotonic()
+        self.timer.start(0)
+
+    def step(self) -> None:
+        """Pass next batch of events to runner and schedule the next step."""
+        elapsed = time.monotonic() - self.start_time
+        batch = []
+        finished = False
+        while len(batch) < self.batch_size:
+            record = self.next_record or next(self.records, None)
+            self.next_record = None
+            if record is None:
+                finished = True
+                break
+            if self.realtime and record.timestamp > elapsed:
+                self.next_record = record
+                break
+            batch.append(self.decoder.decode(record.frame))
+        if batch:
+            self.runner.process_output(batch)
+        if finished:
+            self.stop()
+            self.sig_finished.emit()
+        elif self.next_record:
+            delay = self.next_record.timestamp - elapsed
+            self.timer.start(max(0, round(1000 * delay)))
+        else:
+            self.timer.start(0)
+
+    def stop(self) -> None:
+        """Stop replaying events."""
+        self.timer.stop()
+        if self.file:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Map from source files to the tests which depend on them.
+
+This is used for test impact analysis: after some files are changed, only
+the tests which ran code in those files need to be run again.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+import json
+import logging
+import os
+import os.path as osp
+from typing import NamedTuple, Optional
+
+# Local imports
+from spyder_unittest.backend.collectioncache import (
+    FileSignature, file_signature, updated_signature)
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Version of the format in which the map is stored. If the stored version is
+# different, the map is discarded.
+IMPACT_MAP_VERSION = 1
+
+
+class ImpactEntry(NamedTuple):
+    """Tests depending on a file, with the signature of that file."""
+
+    signature: FileSignature
+    nodeids: set[str]
+
+
+class ImpactMap:
+    """
+    Persistent map from source files to the tests which run code in them.
+
+    The map is built from the coverage data recorded by pytest-cov with
+    `--cov-context=test`. For every file, it stores the nodeids of the tests
+    which ran code in that file (relative to the working directory), and the
+    signature of the file when these tests last ran. The following rules
+    decide which tests are affected by changes:
+
+    - A file is changed if its contents differ from the stored signature,
+      or if it is removed.
+    - The tests depending on a changed file are affected. If the changed file
+      is itself a test file, then all tests in it are run, so that tests
+      which were added to it are included.
+    - If the map is empty, or if a changed file is a `conftest.py` file
+      (which can influence any test), then all tests are affected.
+
+    Code run while collecting the tests, such as module-level statements, is
+    not attributed to any test, and neither are files which are not in the
+    map yet, so changes to them only affect tests which also run functions
+    in those files. New test files are not found either.
+
+    After tests are run, their dependencies are replaced by the newly
+    recorded ones. The signature of a file is only updated if all tests
+    which depended on it were run again, so that a file stays changed until
+    all affected tests are run.
+
+    Attributes
+    ----------
+    filename : str
+        Name of file in which the map is stored.
+    wdir : str
+        Working directory for running tests.
+    entries : dict of (str, ImpactEntry)
+        Entries of the map, indexed by the absolute path of the source file.
+    """
+
+    def __init__(self, filename: str, wdir: str):
+        """Construct map and load it from `filename` if it exists."""
+        self.filename = filename
+        self.wdir = wdir
+        self.entries: dict[str, ImpactEntry] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load map from file, or clear it if the file can not be read."""
+        self.entries = {}
+        try:
+            with open(self.filename, encoding='utf-8') as file:
+                data = json.load(file)
+            if data['version'] != IMPACT_MAP_VERSION:
+                return
+            for path, (mtime, sha1, nodeids) in data['files'].items():
+                self.entries[path] = ImpactEntry(
+                    FileSignature(mtime, sha1), set(nodeids))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.warning(f'Ignoring impact map {self.filename}: {err}')
+            self.entries = {}
+
+    def save(self) -> None:
+        """Save map to file."""
+        data = {
+            'version': IMPACT_MAP_VERSION,
+            'files': {path: [entry.signature.mtime, entry.signature.sha1,
+                             sorted(entry.nodeids)]
+                      for path, entry in self.entries.items()}
+        }
+        tempname = self.filename + '.tmp'
+        try:
+            with open(tempname, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tempname, self.filename)
+        except OSError as err:
+            logger.warning(f'Cannot save impact map: {err}')
+
+    def test_file(self, nodeid: str) -> str:
+        """Return absolute path of test file containing given test."""
+        return osp.normpath(osp.join(self.wdir, nodeid.split('::')[0]))
+
+    def changed_files(self) -> list[str]:
+        """Return files in the map which were changed since tests ran."""
+        result = []
+        for path, entry in self.entries.items():
+            signature = updated_signature(path, entry.signature)
+            if signature is None or signature.sha1 != entry.signature.sha1:
+                result.append(path)
+        return result
+
+    def affected_tests(self, changed: list[str]) -> Optional[list[str]]:
+        """
+        Return tests affected by changes to given files.
+
+        The return value is a sorted list of nodeids and paths of test files
+        (relative to the working directory) which should be passed to pytest
+        to run the affected tests. Return None if all tests are affected.
+        """
+        if not self.entries or any(osp.basename(path) == 'conftest.py'
+                                   for path in changed):
+            return None
+        changed_set = set(changed)
+        result = set()
+        for path in changed:
+            for nodeid in self.entries[path].nodeids:
+                test_file = self.test_file(nodeid)
+                if test_file in changed_set:
+                    if osp.exists(test_file):
+                        result.add(osp.relpath(test_file, self.wdir))
+                elif osp.exists(test_file):
+                    result.add(nodeid)
+        return sorted(result)
+
+    def update(self, dependencies: dict[str, set[str]],
+               tests_run: Optional[set[str]]) -> None:
+        """
+        Update map with dependencies recorded in a test run.
+
+        Parameters
+        ----------
+        dependencies : dict of (str, set of str)
+            For every file, the nodeids of the tests which ran code in it.
+        tests_run : set of str or None
+            Nodeids of the tests that were run and paths of test files of
+            which all tests were run, or None if all tests were run; in the
+            latter case, the map is replaced by `dependencies`. Tests which
+            are removed from test files are thus dropped from the map.
+        """
+        if tests_run is None:
+            old_entries: dict[str, ImpactEntry] = {}
+        else:
+            old_entries = self.entries
+        new_entries = {}
+        for path in sorted(set(old_entries) | set(dependencies)):
+            old_entry = old_entries.get(path)
+            nodeids = set(dependencies.get(path, set()))
+            if old_entry:
+                not_run = {nodeid for nodeid in old_entry.nodeids
+                           if nodeid not in tests_run
+                           and nodeid.split('::')[0] not in tests_run}
+                nodeids |= not_run
+                if not not_run:
+                    signature = file_signature(path)
+                else:
+                    signature = old_entry.signature
+            else:
+                signature = file_signature(path)
+            if nodeids and signature:
+                new_entries[path] = ImpactEntry(signature, nodeids)
+        self.entries = new_entries
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Graph of the imports between the Python files in a directory tree.
+
+This is used in watch mode to find the test files affected by changes to
+some files, without running the tests.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+import ast
+import logging
+import os
+import os.path as osp
+from typing import NamedTuple
+
+# Logging
+logger = logging.getLogger(__name__)
+
+
+class ImportEntry(NamedTuple):
+    """Modules imported by a file, with the mtime of the file."""
+
+    mtime: float
+    modules: frozenset[str]
+
+
+def module_name(filename: str) -> str:
+    """
+    Return name under which Python file is imported.
+
+    The name is relative to the first directory above the file which is not
+    a package (that is, does not contain an `__init__.py` file), which is
+    where Python finds it if that directory is on the Python path.
+    """
+    directory, basename = osp.split(osp.abspath(filename))
+    parts = [] if basename == '__init__.py' else [osp.splitext(basename)[0]]
+    while osp.exists(osp.join(directory, '__init__.py')):
+        directory, package = osp.split(directory)
+        parts.insert(0, package)
+    return '.'.join(parts)
+
+
+def imported_modules(filename: str) -> frozenset[str]:
+    """
+    Return names of the modules imported by a Python file.
+
+    Relative imports are resolved. For `from package import name`, both
+    `package` and `package.name` are included because `name` may be a
+    module; importing a module also imports the packages containing it, so
+    these are included too. Return an empty set if the file can not be read
+    or parsed.
+    """
+    try:
+        with open(filename, 'rb') as file:
+            tree = ast.parse(file.read(), filename)
+    except (OSError, SyntaxError, ValueError) as err:
+        logger.debug(f'Cannot find imports in {filename}: {err}')
+        return frozenset()
+    package = module_name(filename).split('.')
+    if osp.basename(filename) != '__init__.py':
+        package = package[:-1]
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level > len(package):
+                continue
+            elif node.level:
+                base = package[:len(package) - node.level + 1]
+                if node.module:
+                    base = base + node.module.split('.')
+                base_name = '.'.join(base)
+            else:
+                base_name = node.module
+            if not base_name:
+                continue
+            names.add(base_name)
+            names.update(f'{base_name}.{alias.name}' for alias in node.names)
+    result = set()
+    for name in names:
+        parts = name.split('.')
+        result.update('.'.join(parts[:i]) for i in range(1, len(parts) + 1))
+    return frozenset(result)
+
+
+class ImportGraph:
+    """
+    Imports between Python files, cached until the files are changed.
+
+    Attributes
+    ----------
+    entries : dict of (str, ImportEntry)
+        Modules imported by every file that was parsed, indexed by the
+        absolute path of the file.
+    """
+
+    def __init__(self):
+        """Construct empty graph."""
+        self.entries: dict[str, ImportEntry] = {}
+
+    def imports(self, filename: str) -> frozenset[str]:
+        """
+        Return modules imported by file.
+
+        The file is only parsed if it changed since it was parsed last time.
+        """
+        try:
+            mtime = os.stat(filename).st_mtime
+        except OSError:
+            self.entries.pop(filename, None)
+            return frozenset()
+        entry = self.entries.get(filename)
+        if entry is None or entry.mtime != mtime:
+            entry = ImportEntry(mtime, imported_modules(filename))
+            self.entries[filename] = entry
+        return entry.modules
+
+    def dependent_files(self, changed: list[str],
+                        filenames: list[str]) -> set[str]:
+        """
+        Return files depending on the given changed files.
+
+        Parameters
+        ----------
+        changed : list of str
+            Absolute paths of files which were changed or removed.
+        filenames : list of str
+            Absolute paths of all Python files which may depend on the
+            changed files.
+
+        Returns
+        -------
+        set of str
+            Files in `changed` and `filenames` which are changed or which
+            import, directly or indirectly, a module in a changed file.
+        """
+        known = set(filenames)
+        self.entries = {filename: entry
+                        for filename, entry in self.entries.items()
+                        if filename in known}
+        importers: dict[str, list[str]] = {}
+        for filename in filenames:
+            for name in self.imports(filename):
+                importers.setdefault(name, []).append(filename)
+        result = set(changed)
+        todo = list(changed)
+        while todo:
+            name = module_name(todo.pop())
+            for filename in importers.get(name, []):
+                if filename not in result:
+                    result.add(filename)
+                    todo.append(filename)
+        return result
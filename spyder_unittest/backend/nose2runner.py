@@ -8,6 +8,7 @@
 from __future__ import annotations
 
 # Standard library imports
+import os.path as osp
 from typing import Optional, TYPE_CHECKING
 
 # Third party imports
@@ -27,21 +28,35 @@ except KeyError:
 
 
 class Nose2Runner(RunnerBase):
-    """Class for running tests within Nose framework."""
+    """
+    Class for running tests within Nose framework.
+
+    Coverage is recorded by running nose2 from `coverageworker.py`, because
+    the coverage plugin of nose2 is deprecated and cannot write reports in
+    JSON format. The plugin in `nose2coverage.py` records which test runs
+    every line.
+    """
 
     module = 'nose2'
     name = 'nose2'
 
     def create_argument_list(self, config: Config,
                              cov_path: Optional[str],
-                             single_test: Optional[str]) -> list[str]:
+                             selected_tests: Optional[list[str]]) -> list[str]:
         """Create argument list for testing process."""
-        arguments = [
-            '-m', self.module, '--plugin=nose2.plugins.junitxml',
+        if config.coverage:
+            dirname = osp.dirname(__file__)
+            pyfile = osp.join(dirname, 'workers', 'coverageworker.py')
+            arguments = [pyfile, cov_path, self.coveragefilename, self.module,
+                         '--plugin=nose2coverage']
+        else:
+            arguments = ['-m', self.module]
+        arguments += [
+            '--plugin=nose2.plugins.junitxml',
             '--junit-xml', '--junit-xml-path={}'.format(self.resultfilename)
         ]
-        if single_test:
-            arguments.append(single_test)
+        if selected_tests:
+            arguments += selected_tests
         arguments += config.args
         return arguments
 
@@ -49,6 +64,9 @@ class Nose2Runner(RunnerBase):
         """Called when the unit test process has finished."""
         output = self.read_all_process_output()
         testresults = self.load_data()
+        if self.config.coverage:
+            self.tests_run = {result.name for result in testresults}
+            testresults += self.coverage_results()
         self.sig_finished.emit(testresults, output, True)
 
     def load_data(self) -> list[TestResult]:
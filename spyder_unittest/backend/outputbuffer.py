@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Bounded buffer for the output of test processes.
+
+Test suites can write a lot of output. The test runner reads the output of
+the test process while it runs, so that the process is not blocked on a full
+pipe, and stores it in an OutputBuffer, which keeps only a bounded amount of
+it.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+import codecs
+from collections import deque
+import logging
+import tempfile
+from typing import IO, Optional
+
+# Third party imports
+from spyder.config.base import get_translation
+
+try:
+    _ = get_translation('spyder_unittest')
+except KeyError:
+    import gettext
+    _ = gettext.gettext
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Default number of characters kept in memory
+MEMORY_SIZE = 1_000_000
+
+# Default number of characters kept in the temporary file
+FILE_SIZE = 10_000_000
+
+
+class OutputBuffer:
+    """
+    Output of a test process, of which a bounded amount is retained.
+
+    The output is written as bytes in UTF-8 encoding, which may be split at
+    any point, and decoded incrementally. The most recent output is kept in
+    memory in a ring buffer of chunks. Output which drops out of the ring
+    buffer is moved to a temporary file, until that file is full; further
+    output is discarded. Thus, the start and the end of the output are
+    retained, which usually contain collection errors and the summary.
+
+    Attributes
+    ----------
+    memory_size : int
+        Maximum number of characters kept in memory.
+    file_size : int
+        Maximum number of characters kept in the temporary file.
+    discarded : int
+        Number of characters which are not retained.
+    """
+
+    def __init__(self, memory_size: int = MEMORY_SIZE,
+                 file_size: int = FILE_SIZE):
+        """Construct empty buffer."""
+        self.memory_size = memory_size
+        self.file_size = file_size
+        self.discarded = 0
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.chunks: deque[str] = deque()
+        self.memory_used = 0
+        self.file: Optional[IO[str]] = None
+        self.file_used = 0
+
+    def __len__(self) -> int:
+        """Return number of characters retained."""
+        return self.file_used + self.memory_used
+
+    def __str__(self) -> str:
+        """Return retained output."""
+        return self.text()
+
+    def write(self, data: bytes, final: bool = False) -> None:
+        """
+        Add output written by the test process.
+
+        If `final` is set, then `data` is the end of the output, so a
+        character which is incomplete at the end is decoded as well.
+        """
+        self.append(self.decoder.decode(data, final))
+
+    def append(self, text: str) -> None:
+        """Add decoded output, moving old output out of memory if needed."""
+        if not text:
+            return
+        self.chunks.append(text)
+        self.memory_used += len(text)
+        while self.memory_used > self.memory_size:
+            excess = self.memory_used - self.memory_size
+            chunk = self.chunks.popleft()
+            if len(chunk) > excess:
+                self.chunks.appendleft(chunk[excess:])
+                chunk = chunk[:excess]
+            self.memory_used -= len(chunk)
+            self.spill(chunk)
+
+    def spill(self, text: str) -> None:
+        """Move output to the temporary file, as far as there is room."""
+        room = self.file_size - self.file_used
+        if room > 0 and self.file is None:
+            try:
+                self.file = tempfile.TemporaryFile(
+                    'w+', encoding='utf-8', newline='')
+            except OSError as err:
+                logger.warning(f'Cannot store output of test process: {err}')
+                self.file_size = room = 0
+        if room > 0 and self.file is not None:
+            text_kept = text[:room]
+            self.file.write(text_kept)
+            self.file_used += len(text_kept)
+            text = text[room:]
+        self.discarded += len(text)
+
+    def text(self) -> str:
+        """
+        Return retained output.
+
+        If output was discarded, a line saying how much is inserted where
+        it was.
+        """
+        parts = []
+        if self.file is not None:
+            self.file.seek(0)
+            parts.append(self.file.read())
+            self.file.seek(0, 2)
+        if self.discarded:
+            parts.append('\n' + _('[... {} characters omitted ...]').format(
+                self.discarded) + '\n')
+        parts.extend(self.chunks)
+        return ''.join(parts)
+
+    def tail(self, size: int) -> str:
+        """
+        Return at most the last `size` characters of retained output.
+
+        Only output in memory is used, so the temporary file is not read.
+        If older output is left out, a line saying how much is put in front.
+        """
+        parts: list[str] = []
+        kept = 0
+        for chunk in reversed(self.chunks):
+            if kept >= size:
+                break
+            chunk = chunk[-(size - kept):]
+            parts.append(chunk)
+            kept += len(chunk)
+        omitted = len(self) + self.discarded - kept
+        if omitted:
+            parts.append(_('[... {} older characters not shown ...]').format(
+                omitted) + '\n')
+        return ''.join(reversed(parts))
@@ -10,56 +10,216 @@ from __future__ import annotations
 # Standard library imports
 import os
 import os.path as osp
-import re
 from typing import Any, Optional, TYPE_CHECKING
 
+# Third party imports
+from qtpy.QtCore import QProcess
+
 # Local imports
-from spyder.config.base import get_translation
-from spyder_unittest.backend.runnerbase import (Category, RunnerBase,
-                                                TestResult, COV_TEST_NAME)
+from spyder_unittest.backend.outputbuffer import OutputBuffer
+from spyder_unittest.backend.runnerbase import (
+    Category, OutputBatch, RunnerBase, TestResult)
+from spyder_unittest.backend.workers.zmqwriter import RESTART_EXIT_CODE
 from spyder_unittest.backend.zmqreader import ZmqStreamReader
 if TYPE_CHECKING:
     from spyder_unittest.widgets.configdialog import Config
 
-try:
-    _ = get_translation('spyder_unittest')
-except KeyError:
-    import gettext
-    _ = gettext.gettext
-
 
 class PyTestRunner(RunnerBase):
-    """Class for running tests within pytest framework."""
+    """
+    Class for running tests within pytest framework.
+
+    If `daemon` is set, then the test process is not stopped after running
+    the tests, but kept running to wait for the next test run; see `serve()`
+    in `pytestworker.py`. Modules imported in one run, including pytest, its
+    plugins and the project under test, are still imported in the next run,
+    so the tests start much faster. The process is restarted if the Python
+    interpreter, the Python path or the working directory changes.
+
+    If `impact_map` or `coverage_store` is set, then pytest-cov records
+    which tests run code in which files and the runner stores this in the
+    impact map or the coverage store when the tests are finished.
+
+    If `reorder_tests` is set, then the tests are reordered by the plugin in
+    `pytestschedule.py`, which is also used in the worker processes of
+    pytest-xdist. Tests are identified in the history by their nodeid.
+    """
 
     module = 'pytest'
     name = 'pytest'
+    supports_daemon = True
+    supports_standby = True
+    supports_impact_analysis = True
+    supports_scheduling = True
+    test_file_patterns = ['test_*.py', '*_test.py']
+    daemon = False
+    command: Optional[list[str]] = None
+
+    @classmethod
+    def select_test_files(cls, config: Config, filenames: list[str]
+                          ) -> tuple[Config, Optional[list[str]]]:
+        """
+        Return arguments for running all tests in the given files.
+
+        The selected tests are the paths of the files, relative to the
+        working directory, which are passed to pytest unchanged.
+        """
+        paths = [os.path.relpath(filename, config.wdir)
+                 for filename in filenames]
+        return config, paths
 
     def create_argument_list(self, config: Config,
                              cov_path: Optional[str],
-                             single_test: Optional[str]) -> list[str]:
+                             selected_tests: Optional[list[str]]) -> list[str]:
         """Create argument list for testing process."""
         dirname = os.path.dirname(__file__)
         pyfile = os.path.join(dirname, 'workers', 'pytestworker.py')
-        arguments = [pyfile, str(self.reader.port)]
+        arguments = [pyfile, self.writer_destination()]
         if config.coverage:
-            arguments += [f'--cov={cov_path}', '--cov-report=term-missing']
-        if single_test:
-            arguments.append(self.convert_testname_to_nodeid(single_test))
+            arguments += [f'--cov={cov_path}',
+                          f'--cov-report=json:{self.coveragefilename}']
+        elif self.impact_map is not None:
+            arguments += [f'--cov={cov_path}', '--cov-report=']
+        if self.impact_map is not None or self.coverage_store is not None:
+            arguments.append('--cov-context=test')
+        if self.use_schedule(selected_tests):
+            assert self.history is not None
+            schedule = self.history.schedule_filename
+            arguments += ['-p', 'pytestschedule',
+                          f'--spyder-schedule={schedule}']
+        if config.workers and (selected_tests is None
+                               or len(selected_tests) > 1):
+            # Run tests in parallel using pytest-xdist
+            arguments += ['-n', str(config.workers)]
+        if selected_tests:
+            nodeids = [self.convert_testname_to_nodeid(testname)
+                       for testname in selected_tests]
+            arguments += self.selected_test_arguments(
+                nodeids, '--spyder-selection')
         arguments += config.args
         return arguments
 
     def start(self, config: Config, cov_path: Optional[str],
               executable: str, pythonpath: list[str],
-              single_test: Optional[str]) -> None:
+              selected_tests: Optional[list[str]]) -> None:
         """Start process which will run the unit test suite."""
         self.config = config
-        self.reader = ZmqStreamReader()
-        self.reader.sig_received.connect(self.process_output)
-        super().start(config, cov_path, executable, pythonpath, single_test)
+        if self.daemon:
+            self.start_daemon_run(
+                config, cov_path, executable, pythonpath, selected_tests)
+            return
+        if self.standby_key is None:
+            self.create_reader()
+        super().start(config, cov_path, executable, pythonpath, selected_tests)
+
+    def start_collection(self, config: Config,
+                         selected_tests: Optional[list[str]]) -> None:
+        """Prepare for recording tests and dependencies in a test run."""
+        super().start_collection(config, selected_tests)
+        self.dependencies: dict[str, set[str]] = {}
+        # Test files passed as arguments or selected are run in full
+        arguments = list(config.args) + (selected_tests or [])
+        self.tests_run = {arg for arg in arguments if arg.endswith('.py')}
+
+    def create_reader(self) -> None:
+        """Create reader for output sent by test process."""
+        self.reader = ZmqStreamReader(transform=self.convert_output)
+        self.reader.sig_received.connect(self.emit_output)
+
+    def start_daemon_run(self, config: Config, cov_path: Optional[str],
+                         executable: str, pythonpath: list[str],
+                         selected_tests: Optional[list[str]]) -> None:
+        """
+        Run tests in persistent test process, starting it if necessary.
+
+        Raises
+        ------
+        RuntimeError
+            If process failed to start.
+        """
+        self.start_collection(config, selected_tests)
+        key = (executable, list(pythonpath or []), config.wdir)
+        if (self.process is None
+                or self.process.state() != QProcess.Running
+                or self.daemon_key != key):
+            self.stop_daemon()
+            self.daemon_key = key
+            self.start_daemon()
+        else:
+            # Discard any output written after previous run finished
+            self.read_process_output()
+            self.output = OutputBuffer()
+        arguments = self.create_argument_list(config, cov_path, selected_tests)
+        self.command = arguments[2:]  # Remove script name and endpoint
+        self.send_command()
+
+    def start_daemon(self) -> None:
+        """
+        Start persistent test process.
 
-    def process_output(self, output: list[dict[str, Any]]) -> None:
+        Raises
+        ------
+        RuntimeError
+            If process failed to start.
         """
-        Process output of test process.
+        executable, pythonpath, wdir = self.daemon_key
+        self.create_reader()
+        self.process = self._prepare_process(self.config, pythonpath)
+        self.process.finished.disconnect(self.finished)
+        self.process.finished.connect(self.daemon_exited)
+        dirname = os.path.dirname(__file__)
+        pyfile = os.path.join(dirname, 'workers', 'pytestworker.py')
+        p_args = ['-X', 'utf8', pyfile, self.writer_destination(),
+                  '--daemon']
+        self.process.start(executable, p_args)
+        if not self.process.waitForStarted():
+            raise RuntimeError
+
+    def send_command(self) -> None:
+        """Ask persistent test process to run pytest with `self.command`."""
+        self.send_arguments(self.command)
+
+    def daemon_exited(self, exitcode: int) -> None:
+        """
+        Called when the persistent test process has exited.
+
+        If the process exited because it needs to be restarted, then start
+        a new process and run the tests there. Otherwise, if tests were
+        running, emit `sig_finished` to report that the test run failed.
+        """
+        self.reader.close()  # This may finish the test run
+        if self.command is None:
+            self.process = None
+            return
+        if exitcode == RESTART_EXIT_CODE:
+            try:
+                self.start_daemon()
+            except RuntimeError:
+                pass
+            else:
+                self.send_command()
+                return
+        output = self.read_all_process_output()
+        self.process = None
+        self.command = None
+        self.sig_finished.emit([], output, False)
+
+    def stop_daemon(self) -> None:
+        """Stop persistent test process, if any, without reporting."""
+        if self.process is None:
+            return
+        self.process.finished.disconnect(self.daemon_exited)
+        if self.process.state() != QProcess.NotRunning:
+            self.process.kill()
+            self.process.waitForFinished()
+        self.process = None
+        self.reader.close()
+
+    def convert_output(self, output: list[dict[str, Any]]) -> OutputBatch:
+        """
+        Convert output of test process.
+
+        This is run in the background thread of the ZMQ stream reader.
 
         Parameters
         ----------
@@ -70,12 +230,22 @@ class PyTestRunner(RunnerBase):
         collecterror_list = []
         starttest_list = []
         result_list = []
+        exitcode = None
         for result_item in output:
             if result_item['event'] == 'config':
                 self.rootdir = result_item['rootdir']
             elif result_item['event'] == 'collected':
-                name = self.convert_nodeid_to_testname(result_item['nodeid'])
-                collected_list.append(name)
+                if 'nodeids' in result_item:
+                    nodeids = result_item['nodeids']
+                else:
+                    nodeids = [result_item['nodeid']]
+                for nodeid in nodeids:
+                    testname = self.convert_nodeid_to_testname(nodeid)
+                    collected_list.append(testname)
+                    if self.collection_cache is not None:
+                        self.record_collected(
+                            self.nodeid_to_filename(nodeid), testname)
+                    self.record_history_collected(nodeid)
             elif result_item['event'] == 'collecterror':
                 tupl = self.logreport_collecterror_to_tuple(result_item)
                 collecterror_list.append(tupl)
@@ -85,72 +255,98 @@ class PyTestRunner(RunnerBase):
             elif result_item['event'] == 'logreport':
                 testresult = self.logreport_to_testresult(result_item)
                 result_list.append(testresult)
+                self.record_history(result_item['nodeid'], testresult)
+                if (self.impact_map is not None
+                        or self.coverage_store is not None):
+                    self.tests_run.add(
+                        self.relative_nodeid(result_item['nodeid']))
+            elif result_item['event'] == 'dependencies':
+                self.dependencies[result_item['filename']] = {
+                    self.relative_nodeid(nodeid)
+                    for nodeid in result_item['nodeids']}
+            elif result_item['event'] == 'finished':
+                exitcode = result_item['exitcode']
 
-        if collected_list:
-            self.sig_collected.emit(collected_list)
-        if collecterror_list:
-            self.sig_collecterror.emit(collecterror_list)
-        if starttest_list:
-            self.sig_starttest.emit(starttest_list)
-        if result_list:
-            self.sig_testresult.emit(result_list)
-
-    def process_coverage(self, output: str) -> None:
-        """Search the output text for coverage details.
-
-        Called by the function 'finished' at the very end.
-        """
-        cov_results = re.search(
-            r'-*? coverage:.*?-*\nTOTAL\s.*?\s(\d*?)\%.*\n=*',
-            output, flags=re.S)
-        if cov_results:
-            total_coverage = cov_results.group(1)
-            cov_report = TestResult(
-                Category.COVERAGE, f'{total_coverage}%', COV_TEST_NAME)
-            # create a fake test, then emit the coverage as the result
-            # This gives overall test coverage, used in TestDataModel.summary
-            self.sig_collected.emit([COV_TEST_NAME])
-            self.sig_testresult.emit([cov_report])
-
-            # also build a result for each file's coverage
-            header = "".join(cov_results.group(0).split("\n")[1:3])
-            # coverage report columns:
-            # Name  Stmts   Miss  Cover   Missing
-            for row in re.findall(
-                    r'^((.*?\.py) .*?(\d+%).*?(\d[\d\,\-\ ]*)?)$',
-                    cov_results.group(0), flags=re.M):
-                lineno: Optional[int] = None
-                if row[3]:
-                    match = re.search(r'^(\d*)', row[3])
-                    if match:
-                        lineno = int(match.group(1)) - 1
-                file_cov = TestResult(
-                    Category.COVERAGE, row[2], row[1],
-                    message=_('Missing: {}').format(row[3] if row[3] else _("(none)")),
-                    extra_text=_('{}\n{}').format(header, row[0]), filename=row[1],
-                    lineno=lineno)
-                self.sig_collected.emit([row[1]])
-                self.sig_testresult.emit([file_cov])
+        return OutputBatch(collected_list, collecterror_list, starttest_list,
+                           result_list, exitcode)
 
     def finished(self, exitcode: int) -> None:
         """
         Called when the unit test process has finished.
 
-        This function emits `sig_finished`.
+        This function emits `sig_finished`. If `daemon` is set, this is
+        called when the persistent test process reports that the test run is
+        finished, and the test process is kept running. The test process
+        flushes its output before reporting this, so the output still in the
+        pipe is read first; otherwise the end of the output of the test run,
+        including the summary of pytest, would be lost.
 
         Parameters
         ----------
         exitcode
-            Exit code of the test process.
+            Exit code of the test process, or of the test run.
         """
-        self.reader.close()
+        if self.daemon:
+            self.drain_process_output()
+        else:
+            self.reader.close()
+        self.command = None
         output = self.read_all_process_output()
-        if self.config.coverage:
-            self.process_coverage(output)
-        normal_exit = exitcode in [0, 1, 2, 5]
         # Meaning of exit codes: 0 = all tests passed, 1 = test failed,
         # 2 = interrupted, 5 = no tests collected
-        self.sig_finished.emit([], output, normal_exit)
+        normal_exit = exitcode in [0, 1, 2, 5]
+        completed = exitcode in [0, 1, 5]
+        results = (self.coverage_results(completed) if self.config.coverage
+                   else [])
+        if completed:
+            self.update_collection_cache()
+            self.update_impact_map()
+            self.update_history()
+        self.sig_finished.emit(results, output, normal_exit)
+
+    def drain_process_output(self) -> None:
+        """Read output which is in the pipe of the running test process."""
+        if self.process is None:
+            return
+        while (self.process.state() == QProcess.Running
+               and self.process.waitForReadyRead(0)):
+            pass
+
+    def update_impact_map(self) -> None:
+        """Store dependencies recorded in test run in the impact map."""
+        if self.impact_map is None:
+            return
+        tests_run = None if self.collection_complete else self.tests_run
+        self.impact_map.update(self.dependencies, tests_run)
+        self.impact_map.save()
+
+    def test_for_context(self, context: str) -> Optional[str]:
+        """
+        Return nodeid of test for coverage context, or None if not a test.
+
+        With `--cov-context=test`, pytest-cov records the nodeid followed by
+        `|setup`, `|run` or `|teardown` as context. The returned nodeid is
+        relative to the working directory, as in `tests_run`.
+        """
+        nodeid, sep, when = context.rpartition('|')
+        return self.relative_nodeid(nodeid) if sep else None
+
+    def relative_nodeid(self, nodeid: str) -> str:
+        """Convert nodeid to be relative to wdir instead of pytest rootdir."""
+        wdir = osp.realpath(self.config.wdir)
+        if wdir == self.rootdir:
+            return nodeid
+        path, sep, name = nodeid.partition('::')
+        try:
+            path = osp.relpath(osp.join(self.rootdir, path), start=wdir)
+        except ValueError:
+            # Happens on Windows if paths are on different drives
+            return nodeid
+        return path.replace(os.sep, '/') + sep + name
+
+    def nodeid_to_filename(self, nodeid: str) -> str:
+        """Return absolute path of file containing test with given nodeid."""
+        return osp.normpath(osp.join(self.rootdir, nodeid.split('::')[0]))
 
     def normalize_module_name(self, name: str) -> str:
         """
@@ -189,7 +385,12 @@ class PyTestRunner(RunnerBase):
         this function is like a nodeid but relative to the wdir (i.e., the
         directory from which test are run). This is the format that pytest
         expects when running single tests.
+
+        Nodeids and paths of test files, as returned by
+        `ImpactMap.affected_tests()`, are returned unchanged.
         """
+        if '.py::' in testname or testname.endswith('.py'):
+            return testname
         *path_parts, last_part = testname.split('.')
         path_parts[-1] += '.py'
         nodeid = osp.join(*path_parts) + '::' + last_part
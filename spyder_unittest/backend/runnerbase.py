@@ -9,28 +9,49 @@ from __future__ import annotations
 
 # Standard library imports
 from enum import IntEnum
+import fnmatch
+import json
 import logging
 import os
 import tempfile
-from typing import ClassVar, Optional, TYPE_CHECKING
+from typing import Any, ClassVar, NamedTuple, Optional, TYPE_CHECKING
 
 # Third party imports
 from qtpy.QtCore import (
-    QObject, QProcess, QProcessEnvironment, QTextCodec, Signal)
+    QObject, QProcess, QProcessEnvironment, Signal)
+from spyder.config.base import get_translation
 
 # Local imports
+from spyder_unittest.backend.collectioncache import CacheEntry, CollectionCache
+from spyder_unittest.backend.coveragereport import (
+    format_ranges, load_coverage_report)
+from spyder_unittest.backend.outputbuffer import OutputBuffer
+from spyder_unittest.backend.testhistory import TestRecord
+from spyder_unittest.backend.workers.zmqwriter import format_destination
 if TYPE_CHECKING:
+    from spyder_unittest.backend.coverageindex import CoverageIndex
+    from spyder_unittest.backend.coveragestore import CoverageStore
+    from spyder_unittest.backend.impactmap import ImpactMap
+    from spyder_unittest.backend.testhistory import TestHistory
     from spyder_unittest.widgets.configdialog import Config
     from spyder_unittest.widgets.unittestgui import UnitTestWidget
 
+try:
+    _ = get_translation('spyder_unittest')
+except KeyError:
+    import gettext
+    _ = gettext.gettext
 
 # Logging
 logger = logging.getLogger(__name__)
 
 # if generating coverage report, use this name for the TestResult
-# it's here in case we can get coverage results from unittest too
 COV_TEST_NAME = 'Total Test Coverage'
 
+# If more tests are selected to be run, then their names are passed to the
+# test process in a file instead of on the command line
+MAX_SELECTED_TESTS_IN_ARGUMENTS = 50
+
 
 class Category(IntEnum):
     """Enum type representing category of test result."""
@@ -43,14 +64,24 @@ class Category(IntEnum):
 
 
 class TestResult:
-    """Class representing the result of running a single test."""
+    """
+    Class representing the result of running a single test.
+
+    Results with category `Category.COVERAGE` represent the coverage of a
+    source file instead. For these, `missing_lines` contains the ranges
+    `(first, last)` of line numbers (starting at 1) which are not covered.
+    Results with `collection_error` set represent an error in collecting
+    the tests in a file or module, which is named by `name`.
+    """
 
     __test__ = False  # this is not a pytest test class
 
     def __init__(self, category: Category, status: str, name: str,
                  message: str = '', time: Optional[float] = None,
                  extra_text: str = '', filename: Optional[str] = None,
-                 lineno: Optional[int] = None):
+                 lineno: Optional[int] = None,
+                 missing_lines: Optional[list[tuple[int, int]]] = None,
+                 collection_error: bool = False):
         """
         Construct a test result.
         """
@@ -66,6 +97,8 @@ class TestResult:
             self.extra_text = []
         self.filename = filename
         self.lineno = lineno
+        self.missing_lines = missing_lines
+        self.collection_error = collection_error
 
     def __eq__(self, other: object) -> bool:
         """Test for equality."""
@@ -74,6 +107,24 @@ class TestResult:
         return self.__dict__ == other.__dict__
 
 
+class OutputBatch(NamedTuple):
+    """
+    Output of test process, converted to the arguments of the runner signals.
+
+    Every field contains the argument for the signal with the corresponding
+    name, so for instance `collected` contains the list of test names to be
+    emitted in `sig_collected`. The last field, `exitcode`, is only set if a
+    persistent test process reports that a test run is finished; it contains
+    the exit code of that run.
+    """
+
+    collected: list[str]
+    collecterror: list[tuple[str, str]]
+    starttest: list[str]
+    testresult: list[TestResult]
+    exitcode: Optional[int] = None
+
+
 class RunnerBase(QObject):
     """
     Base class for running tests with a framework that uses JUnit XML.
@@ -90,10 +141,61 @@ class RunnerBase(QObject):
         before the user can run tests.
     name : str
         Name of test framework, as presented to user.
+    supports_daemon : bool
+        Whether the runner can keep the test process running between test
+        runs. If so, setting `daemon` to True enables this.
+    supports_standby : bool
+        Whether the runner can start the test process before the test run is
+        requested; see `start_standby()`.
+    supports_impact_analysis : bool
+        Whether the runner can record which tests depend on which files.
+    supports_scheduling : bool
+        Whether the runner can record the durations and outcomes of tests
+        and run the tests in the order given by this history.
+    test_file_patterns : list of str
+        Patterns matching the names of the files in which the framework
+        looks for tests by default.
+    collection_cache : CollectionCache or None
+        Cache in which the tests collected in the test run are stored, if
+        set; see `record_collected()`.
+    impact_map : ImpactMap or None
+        Map in which the dependencies of the tests in the test run are
+        stored, if set and if the runner supports impact analysis.
+    history : TestHistory or None
+        History in which the durations and outcomes of the tests in the test
+        run are stored, if set and if the runner supports scheduling; see
+        `record_history()`.
+    reorder_tests : bool
+        Whether to run the tests in the order given by `history`, with tests
+        that failed last time first and long tests before short ones.
+    coverage_index : CoverageIndex or None
+        Index in which the lines executed and missed in the test run are
+        stored, if set and if coverage is recorded.
+    coverage_store : CoverageStore or None
+        Store in which the lines run by every test are accumulated over test
+        runs, if set and if coverage is recorded. The coverage results are
+        then computed from the store.
+    tests_run : set of str
+        Names of the tests run in the test run, as used in coverage contexts;
+        see `test_for_context()`.
+    writer_high_water_mark : int or None
+        Maximum number of results waiting to be sent by the test process, if
+        set; see `ZmqStreamWriter` in `zmqwriter.py`.
+    writer_policy : str or None
+        What the test process does if too many results are waiting to be
+        sent, if set: either `'block'` or `'drop'`.
     process : QProcess or None
         Process running the unit test suite.
+    output : OutputBuffer
+        Output of the test process, which is read while the process runs;
+        see `read_process_output()`.
     resultfilename : str
         Name of file in which test results are stored.
+    selectionfilename : str
+        Name of file in which the names of the selected tests are stored if
+        there are too many to pass them on the command line.
+    coveragefilename : str
+        Name of file in which the test process stores the coverage report.
 
     Signals
     -------
@@ -106,7 +208,7 @@ class RunnerBase(QObject):
         Emitted just before tests are run.
     sig_testresult(list of TestResult)
         Emitted when tests are finished.
-    sig_finished(list of TestResult, str, bool)
+    sig_finished(list of TestResult, OutputBuffer, bool)
         Emitted when test process finishes. First argument contains the test
         results, second argument contains the output of the test process,
         third argument is True on normal exit, False on abnormal exit.
@@ -116,12 +218,17 @@ class RunnerBase(QObject):
 
     module: ClassVar[str]
     name: ClassVar[str]
+    supports_daemon: ClassVar[bool] = False
+    supports_standby: ClassVar[bool] = False
+    supports_impact_analysis: ClassVar[bool] = False
+    supports_scheduling: ClassVar[bool] = False
+    test_file_patterns: ClassVar[list[str]] = ['test*.py']
 
     sig_collected = Signal(object)
     sig_collecterror = Signal(object)
     sig_starttest = Signal(object)
     sig_testresult = Signal(object)
-    sig_finished = Signal(object, str, bool)
+    sig_finished = Signal(object, object, bool)
     sig_stop = Signal()
 
     def __init__(self, widget: UnitTestWidget,
@@ -138,15 +245,57 @@ class RunnerBase(QObject):
         """
         QObject.__init__(self, widget)
         self.process: Optional[QProcess] = None
+        self.output = OutputBuffer()
+        self.standby_key: Optional[tuple[Config, str, list[str]]] = None
+        self.collection_cache: Optional[CollectionCache] = None
+        self.collected_files: dict[str, CacheEntry] = {}
+        self.collection_complete = False
+        self.impact_map: Optional[ImpactMap] = None
+        self.history: Optional[TestHistory] = None
+        self.history_records: dict[str, TestRecord] = {}
+        self.history_tests: set[str] = set()
+        self.reorder_tests = False
+        self.coverage_index: Optional[CoverageIndex] = None
+        self.coverage_store: Optional[CoverageStore] = None
+        self.tests_run: set[str] = set()
+        self.writer_high_water_mark: Optional[int] = None
+        self.writer_policy: Optional[str] = None
         if resultfilename is None:
             self.resultfilename = os.path.join(tempfile.gettempdir(),
                                                'unittest.results')
         else:
             self.resultfilename = resultfilename
+        self.selectionfilename = (
+            os.path.splitext(self.resultfilename)[0] + '.selection')
+        self.coveragefilename = (
+            os.path.splitext(self.resultfilename)[0] + '.coverage.json')
+
+    @classmethod
+    def is_test_file(cls, filename: str) -> bool:
+        """Return whether the framework looks for tests in given file."""
+        basename = os.path.basename(filename)
+        return any(fnmatch.fnmatch(basename, pattern)
+                   for pattern in cls.test_file_patterns)
+
+    @classmethod
+    def select_test_files(cls, config: Config, filenames: list[str]
+                          ) -> tuple[Config, Optional[list[str]]]:
+        """
+        Return arguments for running all tests in the given files.
+
+        The return value consists of the configuration and the selected tests
+        to be passed to `start()`. By default, the selected tests are the
+        names of the modules, relative to the working directory.
+        """
+        names = [
+            os.path.splitext(os.path.relpath(filename, config.wdir))[0]
+            .replace(os.sep, '.')
+            for filename in filenames]
+        return config, names
 
     def create_argument_list(self, config: Config,
                              cov_path: Optional[str],
-                             single_test: Optional[str]) -> list[str]:
+                             selected_tests: Optional[list[str]]) -> list[str]:
         """
         Create argument list for testing process (dummy).
 
@@ -154,17 +303,40 @@ class RunnerBase(QObject):
         """
         raise NotImplementedError
 
+    def create_reader(self) -> None:
+        """
+        Create reader for output sent by test process (dummy).
+
+        This function should be defined in derived classes which support
+        standby mode. It should store the reader in `self.reader`.
+        """
+        raise NotImplementedError
+
+    def writer_destination(self) -> str:
+        """
+        Return destination for the results sent by the test process.
+
+        This is the endpoint of `self.reader` followed by the options for the
+        writer in the test process.
+        """
+        return format_destination(self.reader.endpoint,
+                                  self.writer_high_water_mark,
+                                  self.writer_policy)
+
     def _prepare_process(self, config: Config,
                          pythonpath: list[str]) -> QProcess:
         """
         Prepare and return process for running the unit test suite.
 
-        This sets the working directory and environment.
+        This sets the working directory and environment, and starts a new
+        buffer for the output of the process.
         """
         process = QProcess(self)
         process.setProcessChannelMode(QProcess.MergedChannels)
         process.setWorkingDirectory(config.wdir)
+        process.readyReadStandardOutput.connect(self.read_process_output)
         process.finished.connect(self.finished)
+        self.output = OutputBuffer()
         if pythonpath:
             env = QProcessEnvironment.systemEnvironment()
             old_python_path = env.value('PYTHONPATH', '')
@@ -177,7 +349,7 @@ class RunnerBase(QObject):
 
     def start(self, config: Config, cov_path: Optional[str],
               executable: str, pythonpath: list[str],
-              single_test: Optional[str]) -> None:
+              selected_tests: Optional[list[str]]) -> None:
         """
         Start process which will run the unit test suite.
 
@@ -197,28 +369,280 @@ class RunnerBase(QObject):
             Path to Python executable
         pythonpath
             List of directories to be added to the Python path
-        single_test
-            If None, run all tests; otherwise, it is the name of the only test
-            to be run.
+        selected_tests
+            If None, run all tests; otherwise, it is the list of the names of
+            the tests to be run.
+
+        If the test process was started in advance by `start_standby()`, then
+        the arguments are passed to that process instead of starting a new
+        one.
 
         Raises
         ------
         RuntimeError
             If process failed to start.
         """
-        self.process = self._prepare_process(config, pythonpath)
-        p_args = self.create_argument_list(config, cov_path, single_test)
-        p_args = ['-X', 'utf8'] + p_args  # Ensure output is UTF-8
+        self.config = config
+        self.start_collection(config, selected_tests)
+        p_args = self.create_argument_list(config, cov_path, selected_tests)
         try:
             os.remove(self.resultfilename)
         except OSError:
             pass
+        if self.standby_key is not None:
+            assert self.process is not None
+            self.standby_key = None
+            self.process.finished.disconnect(self.standby_exited)
+            self.process.finished.connect(self.finished)
+            logger.debug(f'Sending arguments {p_args} to standby process')
+            self.send_arguments(p_args[2:])  # Remove script name and endpoint
+            return
+        self.process = self._prepare_process(config, pythonpath)
+        p_args = ['-X', 'utf8'] + p_args  # Ensure output is UTF-8
         logger.debug(f'Starting Python process with arguments {p_args}')
         self.process.start(executable, p_args)
         running = self.process.waitForStarted()
         if not running:
             raise RuntimeError
 
+    def start_standby(self, config: Config, executable: str,
+                      pythonpath: list[str]) -> None:
+        """
+        Start test process in advance, before the test run is requested.
+
+        The process starts the Python interpreter, imports the test framework
+        and then waits until it receives the arguments for the test run. If
+        `start()` is later called with the same configuration, interpreter and
+        Python path, then it passes the arguments to this process, so that the
+        test run does not have to wait for the process to start up.
+
+        Raises
+        ------
+        RuntimeError
+            If process failed to start.
+        """
+        self.config = config
+        self.create_reader()
+        self.process = self._prepare_process(config, pythonpath)
+        self.process.finished.disconnect(self.finished)
+        self.process.finished.connect(self.standby_exited)
+        self.standby_key = (config, executable, list(pythonpath or []))
+        # Only keep the script name and endpoint
+        p_args = self.create_argument_list(config, None, None)[:2]
+        p_args = ['-X', 'utf8'] + p_args + ['--standby']
+        logger.debug(f'Starting standby process with arguments {p_args}')
+        self.process.start(executable, p_args)
+        if not self.process.waitForStarted():
+            self.stop_standby()
+            raise RuntimeError
+
+    def is_standby_for(self, config: Config, executable: str,
+                       pythonpath: list[str]) -> bool:
+        """
+        Return whether there is a test process started in advance which can
+        run the tests with the given configuration, interpreter and path.
+        """
+        key = (config, executable, list(pythonpath or []))
+        return (self.standby_key == key
+                and self.process is not None
+                and self.process.state() == QProcess.Running)
+
+    def standby_exited(self, exitcode: int) -> None:
+        """Called when test process exits before it is used."""
+        self.standby_key = None
+        self.process = None
+        self.reader.close()
+
+    def stop_standby(self) -> None:
+        """Stop test process started in advance, if it is not used."""
+        if self.standby_key is None:
+            return
+        assert self.process is not None
+        self.standby_key = None
+        self.process.finished.disconnect(self.standby_exited)
+        if self.process.state() != QProcess.NotRunning:
+            self.process.kill()
+            self.process.waitForFinished()
+        self.process = None
+        self.reader.close()
+
+    def send_arguments(self, arguments: list[str]) -> None:
+        """Send arguments for test run to test process waiting for them."""
+        assert self.process is not None
+        line = json.dumps({'args': arguments}) + '\n'
+        self.process.write(line.encode('utf-8'))
+
+    def start_collection(self, config: Config,
+                         selected_tests: Optional[list[str]]) -> None:
+        """Prepare for recording the tests collected in a test run."""
+        self.collected_files = {}
+        self.collection_complete = selected_tests is None and not config.args
+        self.history_records = {}
+        self.history_tests = set()
+        self.tests_run = set()
+
+    def record_collected(self, filename: Optional[str],
+                         testname: str) -> None:
+        """
+        Record that a test was collected from the given file.
+
+        Derived classes should call this function for every collected test if
+        they support the collection cache. It may be called in the background
+        thread of the ZMQ stream reader.
+        """
+        if (self.collection_cache is None or not self.collection_complete
+                or filename is None):
+            return
+        entry = self.collected_files.get(filename)
+        if entry is None:
+            signature = self.collection_cache.signature(filename)
+            if signature is None:
+                return
+            entry = CacheEntry(signature, [])
+            self.collected_files[filename] = entry
+        entry.tests.append(testname)
+
+    def update_collection_cache(self) -> None:
+        """
+        Store the tests collected in the test run in the collection cache.
+
+        Derived classes should call this function when the test run finishes
+        normally. The cache is only updated if all tests were collected,
+        which is the case if all tests are run without extra arguments.
+        """
+        if self.collection_cache is None or not self.collection_complete:
+            return
+        self.collection_cache.update(self.collected_files)
+        self.collection_cache.save()
+
+    def use_schedule(self, selected_tests: Optional[list[str]]) -> bool:
+        """
+        Return whether to run the tests in the order given by the history.
+
+        This is not done when running a single test, because then there is
+        nothing to reorder.
+        """
+        return (self.supports_scheduling and self.reorder_tests
+                and self.history is not None
+                and (selected_tests is None or len(selected_tests) > 1))
+
+    def selected_test_arguments(self, names: list[str],
+                                option: str) -> list[str]:
+        """
+        Return arguments for passing names of selected tests to test process.
+
+        If there are at most `MAX_SELECTED_TESTS_IN_ARGUMENTS` names, then
+        they are returned unchanged. Otherwise, they are written to the file
+        `self.selectionfilename`, one name per line, and the arguments are
+        `option` followed by the name of the file, because the length of the
+        command line is limited.
+        """
+        if len(names) <= MAX_SELECTED_TESTS_IN_ARGUMENTS:
+            return names
+        with open(self.selectionfilename, 'w', encoding='utf-8') as file:
+            file.write(''.join(name + '\n' for name in names))
+        return [option, self.selectionfilename]
+
+    def record_history(self, testid: str, result: TestResult) -> None:
+        """
+        Record duration and outcome of a test for the test history.
+
+        Derived classes should call this function for every test result if
+        they support scheduling, with the id that the test worker uses for
+        the test. Results of tests that did not pass or fail, or without a
+        duration, are ignored. It may be called in the background thread of
+        the ZMQ stream reader.
+        """
+        if (self.history is None or result.time is None
+                or result.category not in (Category.OK, Category.FAIL)):
+            return
+        self.history_records[testid] = TestRecord(
+            result.time, result.category == Category.FAIL)
+
+    def record_history_collected(self, testid: str) -> None:
+        """
+        Record that a test was collected, for the test history.
+
+        Derived classes should call this function for every collected test if
+        they support scheduling, so that tests which no longer exist can be
+        removed from the history.
+        """
+        if self.history is not None and self.collection_complete:
+            self.history_tests.add(testid)
+
+    def update_history(self) -> None:
+        """
+        Store the durations and outcomes recorded in the test run.
+
+        Derived classes should call this function when the test run finishes
+        normally.
+        """
+        if self.history is None:
+            return
+        all_tests = self.history_tests if self.collection_complete else None
+        self.history.update(self.history_records, all_tests)
+        self.history.save()
+
+    def test_for_context(self, context: str) -> Optional[str]:
+        """
+        Return name of test for coverage context, or None if not a test.
+
+        By default, the context is the name of the test, as switched by the
+        test process with `switch_context()` in `coverageworker.py`, and
+        code run outside tests has the empty context.
+        """
+        return context or None
+
+    def coverage_results(self, completed: bool = True) -> list[TestResult]:
+        """
+        Return results for the coverage report written by the test process.
+
+        The report is read from `self.coveragefilename` and then removed.
+        If `self.coverage_store` is set, the report is added to it and the
+        results are computed from the store, so they include the coverage of
+        the tests that were not run this time. The store is only replaced by
+        the report if all tests were run and `completed` is set, meaning that
+        the test process finished normally. If `self.coverage_index` is
+        set, the lines in the report are stored in it.
+        The first result contains the total coverage; it is named
+        `COV_TEST_NAME` and is used in TestDataModel.summary. It is followed
+        by a result for the coverage of every file.
+        """
+        report = load_coverage_report(self.coveragefilename)
+        try:
+            os.remove(self.coveragefilename)
+        except OSError:
+            pass
+        if report is None:
+            return []
+        if self.coverage_store is not None:
+            if completed and self.collection_complete:
+                tests_run = None
+            else:
+                tests_run = self.tests_run
+            self.coverage_store.update(
+                report, tests_run, self.test_for_context)
+            self.coverage_store.save()
+            report = self.coverage_store.report()
+        if self.coverage_index is not None:
+            self.coverage_index.update(report, self.config.wdir)
+            self.coverage_index.save()
+        results = [TestResult(
+            Category.COVERAGE, f'{report.percent}%', COV_TEST_NAME)]
+        wdir = self.config.wdir
+        for cov in report.files:
+            ranges = format_ranges(cov.missing_ranges)
+            lineno = (cov.missing_ranges[0][0] - 1 if cov.missing_ranges
+                      else None)
+            results.append(TestResult(
+                Category.COVERAGE, f'{cov.percent}%', cov.filename,
+                message=_('Missing: {}').format(ranges or _('(none)')),
+                extra_text=_('{} statements, {} missing').format(
+                    cov.statements, cov.missing),
+                filename=os.path.join(wdir, cov.filename), lineno=lineno,
+                missing_lines=cov.missing_ranges))
+        return results
+
     def finished(self, exitcode: int) -> None:
         """
         Called when the unit test process has finished.
@@ -228,11 +652,63 @@ class RunnerBase(QObject):
         """
         raise NotImplementedError
 
-    def read_all_process_output(self) -> str:
-        """Read and return all output from `self.process` as unicode."""
+    def convert_output(self, output: list[dict[str, Any]]) -> OutputBatch:
+        """
+        Convert output sent by test process (dummy).
+
+        This function should be defined in derived classes which receive
+        output from the test process while it is running. It may be called
+        in a background thread, so it should not access any GUI objects.
+        """
+        raise NotImplementedError
+
+    def emit_output(self, batch: OutputBatch) -> None:
+        """Emit signals for converted output of test process."""
+        if batch.collected:
+            self.sig_collected.emit(batch.collected)
+        if batch.collecterror:
+            self.sig_collecterror.emit(batch.collecterror)
+        if batch.starttest:
+            self.sig_starttest.emit(batch.starttest)
+        if batch.testresult:
+            self.sig_testresult.emit(batch.testresult)
+        if batch.exitcode is not None:
+            self.finished(batch.exitcode)
+
+    def process_output(self, output: list[dict[str, Any]]) -> None:
+        """
+        Process output sent by test process.
+
+        This converts the output and emits the corresponding signals.
+
+        Parameters
+        ----------
+        output
+            list of decoded Python object sent by test process.
+        """
+        self.emit_output(self.convert_output(output))
+
+    def read_process_output(self) -> None:
+        """
+        Read available output from `self.process` into `self.output`.
+
+        This is called whenever the process writes output, so that the
+        process is not blocked because the pipe is full.
+        """
+        if self.process is not None:
+            self.output.write(self.process.readAllStandardOutput().data())
+
+    def read_all_process_output(self) -> OutputBuffer:
+        """
+        Read remaining output from `self.process` and return all output.
+
+        Output written afterwards is stored in a new buffer.
+        """
         assert self.process is not None
-        qbytearray = self.process.readAllStandardOutput()
-        return str(qbytearray.data(), encoding='utf-8')
+        output = self.output
+        output.write(self.process.readAllStandardOutput().data(), final=True)
+        self.output = OutputBuffer()
+        return output
 
     def stop_if_running(self) -> None:
         """Stop testing process if it is running."""
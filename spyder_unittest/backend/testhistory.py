@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+History of the durations and outcomes of tests in earlier test runs.
+
+The history is used to run the tests in a better order: tests that failed
+last time first, and tests that take a long time before short ones.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+import json
+import logging
+import os
+import os.path as osp
+from typing import NamedTuple, Optional
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Version of the format in which the history is stored. If the stored version
+# is different, the history is discarded.
+HISTORY_VERSION = 1
+
+# Number of test runs kept in the history of every test
+HISTORY_LENGTH = 5
+
+
+class TestRecord(NamedTuple):
+    """Duration (in seconds) and outcome of a test in one test run."""
+
+    __test__ = False  # this is not a pytest test class
+
+    duration: float
+    failed: bool
+
+
+class TestHistory:
+    """
+    Persistent history of the durations and outcomes of tests.
+
+    For every test, the history stores the records of the last
+    `HISTORY_LENGTH` test runs in which the test passed or failed; test runs
+    in which it was skipped are not recorded. The history is stored in JSON
+    format.
+
+    When the history is saved, the schedule for the next test run is saved
+    as well, in the file `schedule_filename`. For every test, it contains
+    whether the test failed in the last run and its expected duration, which
+    is the mean duration in the stored runs. The test workers use it to
+    reorder the tests; see `testschedule.py` in the workers directory.
+
+    Attributes
+    ----------
+    filename : str
+        Name of file in which the history is stored.
+    schedule_filename : str
+        Name of file in which the schedule is stored.
+    entries : dict of (str, list of TestRecord)
+        Records of every test, oldest first, indexed by the test id used by
+        the test worker.
+    """
+
+    __test__ = False  # this is not a pytest test class
+
+    def __init__(self, filename: str):
+        """Construct history and load it from `filename` if it exists."""
+        self.filename = filename
+        self.schedule_filename = osp.splitext(filename)[0] + '.schedule.json'
+        self.entries: dict[str, list[TestRecord]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load history from file, or clear it if the file can not be read."""
+        self.entries = {}
+        try:
+            with open(self.filename, encoding='utf-8') as file:
+                data = json.load(file)
+            if data['version'] != HISTORY_VERSION:
+                return
+            for testid, records in data['tests'].items():
+                self.entries[testid] = [
+                    TestRecord(float(duration), bool(failed))
+                    for duration, failed in records]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.warning(f'Ignoring test history {self.filename}: {err}')
+            self.entries = {}
+
+    def save(self) -> None:
+        """Save history and schedule to file."""
+        data = {
+            'version': HISTORY_VERSION,
+            'tests': {testid: [list(record) for record in records]
+                      for testid, records in self.entries.items()}
+        }
+        schedule = {
+            'tests': {testid: [self.last_failed(testid),
+                               self.expected_duration(testid)]
+                      for testid in self.entries}
+        }
+        try:
+            for filename, contents in [(self.filename, data),
+                                       (self.schedule_filename, schedule)]:
+                tempname = filename + '.tmp'
+                with open(tempname, 'w', encoding='utf-8') as file:
+                    json.dump(contents, file)
+                os.replace(tempname, filename)
+        except OSError as err:
+            logger.warning(f'Cannot save test history: {err}')
+
+    def expected_duration(self, testid: str) -> Optional[float]:
+        """
+        Return expected duration of test in seconds.
+
+        This is the mean duration of the test in the stored runs, or None if
+        the test is not in the history.
+        """
+        records = self.entries.get(testid)
+        if not records:
+            return None
+        return sum(record.duration for record in records) / len(records)
+
+    def last_failed(self, testid: str) -> bool:
+        """Return whether test failed the last time it ran."""
+        records = self.entries.get(testid)
+        return bool(records) and records[-1].failed
+
+    def update(self, records: dict[str, TestRecord],
+               all_tests: Optional[set[str]] = None) -> None:
+        """
+        Add records of a test run to the history.
+
+        Parameters
+        ----------
+        records : dict of (str, TestRecord)
+            Records of the tests which passed or failed in the test run,
+            indexed by test id.
+        all_tests : set of str or None
+            Ids of all tests, if they were all collected in the test run.
+            Tests which are not in this set do not exist any more, so they
+            are removed from the history.
+        """
+        if all_tests is not None:
+            self.entries = {testid: history
+                            for testid, history in self.entries.items()
+                            if testid in all_tests}
+        for testid, record in records.items():
+            history = self.entries.setdefault(testid, [])
+            history.append(record)
+            del history[:-HISTORY_LENGTH]
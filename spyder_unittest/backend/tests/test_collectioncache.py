@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for collectioncache.py"""
+
+# Standard library imports
+import json
+import os
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.collectioncache import (
+    CacheEntry, CollectionCache, file_signature, CACHE_VERSION)
+
+
+@pytest.fixture
+def testfiles(tmp_path):
+    foo = tmp_path / 'test_foo.py'
+    foo.write_text('def test_foo(): pass\n')
+    bar = tmp_path / 'test_bar.py'
+    bar.write_text('def test_bar(): pass\n')
+    return str(foo), str(bar)
+
+
+def test_collectioncache_save_and_load(tmp_path, testfiles):
+    foo, bar = testfiles
+    cache = CollectionCache(str(tmp_path / 'cache.json'))
+    assert cache.entries == {}
+
+    cache.update({foo: CacheEntry(file_signature(foo), ['test_foo.test_foo']),
+                  bar: CacheEntry(file_signature(bar), ['test_bar.test_bar'])})
+    cache.save()
+
+    cache2 = CollectionCache(str(tmp_path / 'cache.json'))
+    assert cache2.entries == cache.entries
+    assert cache2.cached_tests() == ['test_foo.test_foo', 'test_bar.test_bar']
+
+
+def test_collectioncache_cached_tests_with_changed_files(tmp_path, testfiles):
+    foo, bar = testfiles
+    cache = CollectionCache(str(tmp_path / 'cache.json'))
+    cache.update({foo: CacheEntry(file_signature(foo), ['test_foo.test_foo']),
+                  bar: CacheEntry(file_signature(bar), ['test_bar.test_bar'])})
+    mtime = os.stat(foo).st_mtime
+    os.utime(foo, (mtime + 10, mtime + 10))  # touched but not changed
+    with open(bar, 'a') as file:
+        file.write('def test_bar2(): pass\n')
+
+    assert cache.cached_tests() == ['test_foo.test_foo']
+    assert list(cache.entries) == [foo]
+    assert cache.entries[foo].signature == file_signature(foo)
+
+
+@pytest.mark.parametrize('contents', [
+    'not json', json.dumps({'version': CACHE_VERSION + 1, 'files': {}}),
+    json.dumps({'version': CACHE_VERSION, 'files': {'foo.py': 42}})])
+def test_collectioncache_load_with_invalid_file(tmp_path, contents):
+    filename = tmp_path / 'cache.json'
+    filename.write_text(contents)
+    cache = CollectionCache(str(filename))
+    assert cache.entries == {}
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for coverageindex.py"""
+
+# Standard library imports
+import os
+from unittest.mock import Mock
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.coverageindex import CoverageIndex, LineRanges
+from spyder_unittest.backend.coveragereport import (
+    CoverageReport, FileCoverage)
+
+
+@pytest.mark.parametrize('line,expected', [
+    (1, False), (2, True), (4, True), (5, False), (8, True), (9, False)])
+def test_lineranges_contains(line, expected):
+    ranges = LineRanges([(2, 4), (8, 8)])
+    assert (line in ranges) == expected
+
+
+@pytest.mark.parametrize('first,last,expected', [
+    (1, 10, [(2, 4), (8, 8), (10, 10)]),
+    (3, 8, [(3, 4), (8, 8)]),
+    (5, 7, []),
+    (9, 9, []),
+    (11, 20, [(11, 12)])
+])
+def test_lineranges_ranges_between(first, last, expected):
+    ranges = LineRanges([(2, 4), (8, 8), (10, 12)])
+    assert ranges.ranges_between(first, last) == expected
+
+
+def test_lineranges_from_lines():
+    ranges = LineRanges.from_lines([8, 2, 3, 4, 10, 3])
+    assert ranges.ranges() == [(2, 4), (8, 8), (10, 10)]
+    assert list(ranges.lines()) == [2, 3, 4, 8, 10]
+
+
+def test_lineranges_empty():
+    ranges = LineRanges()
+    assert len(ranges) == 0
+    assert 1 not in ranges
+    assert ranges.ranges_between(1, 100) == []
+
+
+@pytest.fixture
+def index_and_project(tmp_path):
+    (tmp_path / 'ham.py').write_text('x = 1\n')
+    report = CoverageReport('50', [
+        FileCoverage('ham.py', 4, 2, '50', [(3, 4)], [(1, 2)]),
+        FileCoverage('removed.py', 1, 0, '100', [], [(1, 1)])])
+    index = CoverageIndex(str(tmp_path / 'coverage.json'))
+    index.update(report, str(tmp_path))
+    return index, tmp_path
+
+
+def test_coverageindex_update_and_lookup(index_and_project):
+    index, project = index_and_project
+    lines = index.lookup(str(project / 'ham.py'))
+    assert lines.executed == LineRanges([(1, 2)])
+    assert lines.missing == LineRanges([(3, 4)])
+    assert index.lookup(str(project / 'removed.py')) is None
+    assert index.lookup(str(project / 'spam.py')) is None
+
+
+def test_coverageindex_update_leaves_out_lines_between_statements(tmp_path):
+    (tmp_path / 'ham.py').write_text('x = 1\n')
+    report = CoverageReport('50', [FileCoverage(
+        'ham.py', 4, 2, '50', [(3, 6)], [(1, 2)], [1, 2, 3, 6])])
+    index = CoverageIndex(str(tmp_path / 'coverage.json'))
+    index.update(report, str(tmp_path))
+    lines = index.lookup(str(tmp_path / 'ham.py'))
+    assert lines.executed == LineRanges([(1, 2)])
+    assert lines.missing == LineRanges([(3, 3), (6, 6)])
+
+
+def test_coverageindex_lookup_changed_file(index_and_project, monkeypatch):
+    index, project = index_and_project
+    mtime = os.stat(project / 'ham.py').st_mtime + 1
+    os.utime(project / 'ham.py', (mtime, mtime))
+    monkeypatch.setattr(os, 'stat', Mock(side_effect=os.stat))
+    assert index.lookup(str(project / 'ham.py')) is not None
+    os.stat.assert_not_called()
+    index.check(str(project / 'ham.py'))
+    assert index.lookup(str(project / 'ham.py')) is None
+    index.check(str(project / 'spam.py'))
+
+
+def test_coverageindex_load_checks_changed_files(index_and_project):
+    index, project = index_and_project
+    index.save()
+    mtime = os.stat(project / 'ham.py').st_mtime + 1
+    os.utime(project / 'ham.py', (mtime, mtime))
+    loaded = CoverageIndex(index.filename)
+    assert loaded.lookup(str(project / 'ham.py')) is None
+
+
+def test_coverageindex_save_and_load(index_and_project):
+    index, project = index_and_project
+    index.save()
+    loaded = CoverageIndex(index.filename)
+    assert loaded.entries == index.entries
+
+
+def test_coverageindex_load_invalid_file(tmp_path):
+    filename = tmp_path / 'coverage.json'
+    filename.write_text('{"version": 1, "files": {"ham.py": 42}}')
+    index = CoverageIndex(str(filename))
+    assert index.entries == {}
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for coveragereport.py"""
+
+# Standard library imports
+import json
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.coveragereport import (
+    CoverageReport, display_percent, FileCoverage, format_ranges,
+    load_coverage_report, line_ranges)
+
+
+@pytest.mark.parametrize('statements,missing,expected', [
+    ([1, 2, 3], [], []),
+    ([1, 2, 3], [1, 2, 3], [(1, 3)]),
+    ([1, 2, 5, 7, 8], [2, 5, 8], [(2, 5), (8, 8)]),
+    ([1, 2, 3, 4], [1, 3], [(1, 1), (3, 3)])
+])
+def test_line_ranges(statements, missing, expected):
+    assert line_ranges(statements, missing) == expected
+
+
+def test_format_ranges():
+    assert format_ranges([(7, 53), (94, 94)]) == '7-53, 94'
+    assert format_ranges([]) == ''
+
+
+@pytest.mark.parametrize('covered,total,expected', [
+    (1, 2, '50'), (0, 5, '0'), (1, 1000, '1'), (999, 1000, '99'),
+    (5, 5, '100'), (0, 0, '100')
+])
+def test_display_percent(covered, total, expected):
+    assert display_percent(covered, total) == expected
+
+
+def test_load_coverage_report(tmp_path):
+    data = {
+        'meta': {'version': '7.0.0'},
+        'files': {
+            'ham.py': {
+                'executed_lines': [1, 2, 6],
+                'missing_lines': [3, 4, 8],
+                'excluded_lines': [],
+                'summary': {'num_statements': 6, 'missing_lines': 3,
+                            'percent_covered': 50.0,
+                            'percent_covered_display': '50'}
+            },
+            'spam.py': {
+                'executed_lines': [1],
+                'missing_lines': [],
+                'excluded_lines': [],
+                'summary': {'num_statements': 1, 'missing_lines': 0,
+                            'percent_covered': 100.0}
+            }
+        },
+        'totals': {'num_statements': 7, 'missing_lines': 3,
+                   'percent_covered': 57.142857,
+                   'percent_covered_display': '57'}
+    }
+    filename = tmp_path / 'coverage.json'
+    filename.write_text(json.dumps(data))
+    report = load_coverage_report(str(filename))
+    assert report == CoverageReport('57', [
+        FileCoverage('ham.py', 6, 3, '50', [(3, 4), (8, 8)],
+                     [(1, 2), (6, 6)], [1, 2, 3, 4, 6, 8]),
+        FileCoverage('spam.py', 1, 0, '100', [], [(1, 1)], [1])])
+
+
+def test_load_coverage_report_with_contexts(tmp_path):
+    data = {
+        'files': {
+            'ham.py': {
+                'executed_lines': [1, 2, 3],
+                'missing_lines': [],
+                'summary': {'num_statements': 3, 'missing_lines': 0,
+                            'percent_covered': 100.0},
+                'contexts': {'3': ['test_a', 'test_b'], '1': [''],
+                             '2': ['test_a']}
+            }
+        },
+        'totals': {'percent_covered': 100.0}
+    }
+    filename = tmp_path / 'coverage.json'
+    filename.write_text(json.dumps(data))
+    report = load_coverage_report(str(filename))
+    assert report.files[0].context_lines == {
+        '': [1], 'test_a': [2, 3], 'test_b': [3]}
+
+
+def test_load_coverage_report_with_nonexisting_file(tmp_path):
+    assert load_coverage_report(str(tmp_path / 'coverage.json')) is None
+
+
+def test_load_coverage_report_with_invalid_file(tmp_path):
+    filename = tmp_path / 'coverage.json'
+    filename.write_text('{"files": []}')
+    assert load_coverage_report(str(filename)) is None
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for coveragestore.py"""
+
+# Standard library imports
+import os
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.coverageindex import LineRanges
+from spyder_unittest.backend.coveragereport import (
+    CoverageReport, FileCoverage)
+from spyder_unittest.backend.coveragestore import CoverageStore
+
+
+def make_report(context_lines, statements=(1, 2, 3, 4, 5, 6)):
+    """Return report for ham.py with given lines run by every context."""
+    return CoverageReport('0', [FileCoverage(
+        'ham.py', len(statements), 0, '0', [], [], list(statements),
+        context_lines)])
+
+
+def context_to_test(context):
+    return context or None
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / 'ham.py').write_text('x = 1\n')
+    store = CoverageStore(str(tmp_path / 'store.json'), str(tmp_path))
+    store.update(make_report({'': [1], 'test_a': [2, 3], 'test_b': [4]}),
+                 None, context_to_test)
+    return store
+
+
+def test_coveragestore_full_run(store):
+    entry = store.entries['ham.py']
+    assert entry.statements == LineRanges([(1, 6)])
+    assert entry.base == LineRanges([(1, 1)])
+    assert entry.tests == {'test_a': LineRanges([(2, 3)]),
+                           'test_b': LineRanges([(4, 4)])}
+    report = store.report()
+    assert report.percent == '67'
+    assert report.files == [FileCoverage(
+        'ham.py', 6, 2, '67', [(5, 6)], [(1, 4)], [1, 2, 3, 4, 5, 6])]
+
+
+def test_coveragestore_full_run_replaces_store(store):
+    store.update(make_report({'': [1], 'test_a': [2]}), None,
+                 context_to_test)
+    assert store.entries['ham.py'].tests == {'test_a': LineRanges([(2, 2)])}
+    assert store.report().files[0].missing_ranges == [(3, 6)]
+
+
+def test_coveragestore_partial_run_keeps_other_tests(store):
+    store.update(make_report({'': [1, 6], 'test_a': [5]}), {'test_a'},
+                 context_to_test)
+    entry = store.entries['ham.py']
+    assert entry.base == LineRanges([(1, 1), (6, 6)])
+    assert entry.tests == {'test_a': LineRanges([(5, 5)]),
+                           'test_b': LineRanges([(4, 4)])}
+    assert store.report().files[0].missing_ranges == [(2, 3)]
+
+
+def test_coveragestore_partial_run_after_file_changed(store, tmp_path):
+    (tmp_path / 'ham.py').write_text('x = 2\n')
+    mtime = os.stat(tmp_path / 'ham.py').st_mtime + 1
+    os.utime(tmp_path / 'ham.py', (mtime, mtime))
+    store.update(make_report({'': [1], 'test_a': [2]}), {'test_a'},
+                 context_to_test)
+    assert store.entries['ham.py'].tests == {'test_a': LineRanges([(2, 2)])}
+
+
+def test_coveragestore_partial_run_without_contexts(store):
+    report = CoverageReport('0', [FileCoverage(
+        'ham.py', 6, 5, '17', [(1, 5)], [(6, 6)], [1, 2, 3, 4, 5, 6])])
+    store.update(report, {'test_a'}, context_to_test)
+    entry = store.entries['ham.py']
+    assert entry.base == LineRanges([(1, 1), (6, 6)])
+    assert entry.tests['test_b'] == LineRanges([(4, 4)])
+
+
+def test_coveragestore_drops_removed_file(store):
+    report = CoverageReport('0', [FileCoverage(
+        'spam.py', 1, 0, '100', [], [(1, 1)], [1], {'test_a': [1]})])
+    store.update(report, {'test_a'}, context_to_test)
+    assert list(store.entries) == ['ham.py']
+    store.update(report, None, context_to_test)
+    assert store.entries == {}
+
+
+def test_coveragestore_save_and_load(store):
+    store.save()
+    loaded = CoverageStore(store.filename, store.wdir)
+    assert loaded.entries == store.entries
+
+
+def test_coveragestore_load_invalid_file(tmp_path):
+    filename = tmp_path / 'store.json'
+    filename.write_text('{"version": 1, "files": {"ham.py": 42}}')
+    store = CoverageStore(str(filename), str(tmp_path))
+    assert store.entries == {}
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for eventlog.py"""
+
+# Standard library imports
+import os.path as osp
+import subprocess
+import sys
+from unittest.mock import Mock
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.eventlog import (
+    EventReplay, load_event_log, read_event_log)
+from spyder_unittest.backend.pytestrunner import PyTestRunner
+from spyder_unittest.backend.runnerbase import Category
+from spyder_unittest.backend.workers.zmqwriter import (
+    create_writer, EventRecorder)
+from spyder_unittest.widgets.configdialog import Config
+
+EVENTS = [
+    {'event': 'config', 'rootdir': '/foo'},
+    {'event': 'collected', 'nodeids': ['spam.py::ham', 'spam.py::eggs']},
+    {'event': 'starttest', 'nodeid': 'spam.py::ham'},
+    {'event': 'logreport', 'outcome': 'passed', 'witherror': False,
+     'nodeid': 'spam.py::ham', 'sections': [], 'duration': 0.1,
+     'filename': 'spam.py', 'lineno': 1},
+    {'event': 'starttest', 'nodeid': 'spam.py::eggs'},
+    {'event': 'logreport', 'outcome': 'failed', 'witherror': False,
+     'nodeid': 'spam.py::eggs', 'sections': [], 'duration': 0.2,
+     'filename': 'spam.py', 'lineno': 3}
+]
+
+
+@pytest.fixture
+def eventlog(tmp_path):
+    filename = str(tmp_path / 'test.eventlog')
+    recorder = EventRecorder(filename)
+    for event in EVENTS:
+        recorder.write(event)
+    recorder.close()
+    return filename
+
+
+def test_eventrecorder_and_load_event_log(eventlog):
+    assert load_event_log(eventlog) == EVENTS
+
+
+def test_read_event_log_has_increasing_timestamps(eventlog):
+    with open(eventlog, 'rb') as file:
+        timestamps = [record.timestamp for record in read_event_log(file)]
+    assert len(timestamps) == len(EVENTS)
+    assert timestamps == sorted(timestamps)
+
+
+def test_read_event_log_with_invalid_file(tmp_path):
+    filename = tmp_path / 'test.log'
+    filename.write_text('spam')
+    with open(filename, 'rb') as file:
+        with pytest.raises(ValueError):
+            list(read_event_log(file))
+
+
+def test_read_event_log_with_truncated_file(eventlog):
+    with open(eventlog, 'rb') as file:
+        contents = file.read()
+    with open(eventlog, 'wb') as file:
+        file.write(contents[:-1])
+    with open(eventlog, 'rb') as file:
+        with pytest.raises(ValueError):
+            list(read_event_log(file))
+
+
+def test_create_writer_with_filename(tmp_path):
+    filename = str(tmp_path / 'test.eventlog')
+    writer = create_writer('file:' + filename, 'default.eventlog')
+    assert isinstance(writer, EventRecorder)
+    writer.write(42)
+    writer.close()
+    assert load_event_log(filename) == [42]
+
+
+def test_create_writer_with_options(tmp_path):
+    filename = str(tmp_path / 'test.eventlog')
+    writer = create_writer(f'file:{filename}?hwm=5&policy=drop',
+                           'default.eventlog')
+    assert writer.queue.maxsize == 5
+    assert writer.policy == 'drop'
+    writer.close()
+    writer.close()  # Closing twice does nothing
+
+
+def test_eventrecorder_records_queue_when_process_exits(tmp_path):
+    """Test that objects in the queue are recorded if close() is not called."""
+    import spyder_unittest.backend.workers.zmqwriter as zmqwriter
+    filename = str(tmp_path / 'test.eventlog')
+    script = ('from zmqwriter import create_writer\n'
+              f'writer = create_writer({"file:" + filename!r}, "")\n'
+              'for i in range(1000): writer.write(i)\n')
+    subprocess.run([sys.executable, '-c', script], check=True,
+                   cwd=osp.dirname(zmqwriter.__file__))
+    assert load_event_log(filename) == list(range(1000))
+
+
+@pytest.mark.parametrize('realtime', [False, True])
+def test_eventreplay(qtbot, eventlog, realtime):
+    runner = Mock()
+    replay = EventReplay(eventlog, runner, realtime=realtime, batch_size=4)
+    with qtbot.waitSignal(replay.sig_finished):
+        replay.start()
+    output = [event for call in runner.process_output.call_args_list
+              for event in call[0][0]]
+    assert output == EVENTS
+    if not realtime:
+        assert runner.process_output.call_count == 2
+    assert replay.file is None
+
+
+def test_eventreplay_with_pytestrunner(qtbot, eventlog):
+    runner = PyTestRunner(None)
+    runner.config = Config(wdir='/foo')
+    collected = []
+    results = []
+    runner.sig_collected.connect(collected.extend)
+    runner.sig_testresult.connect(results.extend)
+    replay = EventReplay(eventlog, runner)
+    with qtbot.waitSignal(replay.sig_finished):
+        replay.start()
+    assert collected == ['spam.ham', 'spam.eggs']
+    assert [res.category for res in results] == [Category.OK, Category.FAIL]
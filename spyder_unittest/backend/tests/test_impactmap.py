@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for impactmap.py"""
+
+# Standard library imports
+import os
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.impactmap import ImpactMap
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / 'mod.py').write_text('def f(): return 1\n')
+    (tmp_path / 'test_mod.py').write_text('def test_f(): pass\n'
+                                          'def test_g(): pass\n')
+    (tmp_path / 'test_other.py').write_text('def test_h(): pass\n')
+    (tmp_path / 'conftest.py').write_text('')
+    return tmp_path
+
+
+@pytest.fixture
+def impact_map(project):
+    result = ImpactMap(str(project / 'impact.json'), str(project))
+    result.update({
+        str(project / 'mod.py'): {'test_mod.py::test_f',
+                                  'test_other.py::test_h'},
+        str(project / 'test_mod.py'): {'test_mod.py::test_f',
+                                       'test_mod.py::test_g'},
+        str(project / 'test_other.py'): {'test_other.py::test_h'},
+        str(project / 'conftest.py'): {'test_mod.py::test_f'}
+    }, None)
+    return result
+
+
+def test_impactmap_save_and_load(impact_map, project):
+    impact_map.save()
+    impact_map2 = ImpactMap(str(project / 'impact.json'), str(project))
+    assert impact_map2.entries == impact_map.entries
+
+
+def test_impactmap_changed_files(impact_map, project):
+    assert impact_map.changed_files() == []
+    mtime = os.stat(project / 'test_other.py').st_mtime
+    os.utime(project / 'test_other.py', (mtime + 10, mtime + 10))
+    assert impact_map.changed_files() == []
+
+    (project / 'mod.py').write_text('def f(): return 2\n')
+    (project / 'test_other.py').unlink()
+    assert impact_map.changed_files() == [
+        str(project / 'mod.py'), str(project / 'test_other.py')]
+
+
+def test_impactmap_affected_tests(impact_map, project):
+    mod = str(project / 'mod.py')
+    test_mod = str(project / 'test_mod.py')
+    assert impact_map.affected_tests([]) == []
+    assert impact_map.affected_tests([mod]) == [
+        'test_mod.py::test_f', 'test_other.py::test_h']
+    assert impact_map.affected_tests([mod, test_mod]) == [
+        'test_mod.py', 'test_other.py::test_h']
+    assert impact_map.affected_tests([str(project / 'conftest.py')]) is None
+
+    # Tests in removed files are not run
+    (project / 'test_other.py').unlink()
+    assert impact_map.affected_tests([mod]) == ['test_mod.py::test_f']
+
+
+def test_impactmap_affected_tests_with_empty_map(project):
+    impact_map = ImpactMap(str(project / 'impact.json'), str(project))
+    assert impact_map.affected_tests([]) is None
+
+
+def test_impactmap_update_after_running_some_tests(impact_map, project):
+    mod = str(project / 'mod.py')
+    test_mod = str(project / 'test_mod.py')
+    (project / 'mod.py').write_text('def f(): return 2\n')
+    (project / 'test_mod.py').write_text('def test_f(): pass\n')
+    old_signature = impact_map.entries[mod].signature
+
+    # Only test_mod.py::test_f ran, and it does not use mod.py any more
+    impact_map.update({test_mod: {'test_mod.py::test_f'}},
+                      {'test_mod.py::test_f'})
+
+    assert impact_map.entries[mod].nodeids == {'test_other.py::test_h'}
+    # mod.py stays changed because test_other.py::test_h did not run
+    assert impact_map.entries[mod].signature == old_signature
+    assert impact_map.changed_files() == [mod, test_mod]
+    assert impact_map.entries[test_mod].nodeids == {
+        'test_mod.py::test_f', 'test_mod.py::test_g'}
+    assert str(project / 'conftest.py') not in impact_map.entries
+
+
+def test_impactmap_update_after_running_test_file(impact_map, project):
+    test_mod = str(project / 'test_mod.py')
+    (project / 'test_mod.py').write_text('def test_f(): pass\n')
+
+    # All tests in test_mod.py ran, and test_mod.py::test_g was removed
+    impact_map.update({test_mod: {'test_mod.py::test_f'}},
+                      {'test_mod.py', 'test_mod.py::test_f'})
+
+    assert impact_map.entries[test_mod].nodeids == {'test_mod.py::test_f'}
+    assert impact_map.changed_files() == []
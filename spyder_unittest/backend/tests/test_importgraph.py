@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for importgraph.py"""
+
+# Standard library imports
+import os
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.importgraph import (
+    ImportGraph, imported_modules, module_name)
+
+
+@pytest.fixture
+def project(tmp_path):
+    package = tmp_path / 'pkg'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'core.py').write_text('def f(): return 1\n')
+    (package / 'util.py').write_text('from .core import f\n')
+    (package / 'other.py').write_text('import os\n')
+    tests = tmp_path / 'tests'
+    tests.mkdir()
+    (tests / 'test_util.py').write_text('from pkg import util\n')
+    (tests / 'test_other.py').write_text('import pkg.other\n')
+    (tests / 'test_syntax_error.py').write_text('import pkg.core\n(\n')
+    return tmp_path
+
+
+def all_files(project):
+    return sorted(str(path) for path in project.rglob('*.py'))
+
+
+def test_module_name(project):
+    assert module_name(str(project / 'pkg' / 'util.py')) == 'pkg.util'
+    assert module_name(str(project / 'pkg' / '__init__.py')) == 'pkg'
+    assert module_name(str(project / 'tests' / 'test_util.py')) == 'test_util'
+
+
+def test_imported_modules(project):
+    assert imported_modules(str(project / 'pkg' / 'util.py')) == {
+        'pkg', 'pkg.core', 'pkg.core.f'}
+    assert imported_modules(str(project / 'tests' / 'test_util.py')) == {
+        'pkg', 'pkg.util'}
+    assert imported_modules(str(project / 'tests' / 'test_other.py')) == {
+        'pkg', 'pkg.other'}
+
+
+def test_imported_modules_with_syntax_error(project):
+    filename = str(project / 'tests' / 'test_syntax_error.py')
+    assert imported_modules(filename) == set()
+
+
+def test_imported_modules_with_relative_import_beyond_package(tmp_path):
+    (tmp_path / 'mod.py').write_text('from .. import ham\n')
+    assert imported_modules(str(tmp_path / 'mod.py')) == set()
+
+
+def test_importgraph_dependent_files(project):
+    graph = ImportGraph()
+    core = str(project / 'pkg' / 'core.py')
+    result = graph.dependent_files([core], all_files(project))
+    assert result == {core, str(project / 'pkg' / 'util.py'),
+                      str(project / 'tests' / 'test_util.py')}
+
+
+def test_importgraph_dependent_files_of_package(project):
+    graph = ImportGraph()
+    init = str(project / 'pkg' / '__init__.py')
+    result = graph.dependent_files([init], all_files(project))
+    assert str(project / 'tests' / 'test_util.py') in result
+    assert str(project / 'tests' / 'test_other.py') in result
+
+
+def test_importgraph_parses_file_again_after_change(project):
+    graph = ImportGraph()
+    core = str(project / 'pkg' / 'core.py')
+    test_other = project / 'tests' / 'test_other.py'
+    assert graph.dependent_files([core], all_files(project)) == {
+        core, str(project / 'pkg' / 'util.py'),
+        str(project / 'tests' / 'test_util.py')}
+    test_other.write_text('from pkg.core import f\n')
+    mtime = os.stat(test_other).st_mtime + 1
+    os.utime(test_other, (mtime, mtime))
+    assert str(test_other) in graph.dependent_files([core], all_files(project))
+
+
+def test_importgraph_forgets_removed_files(project):
+    graph = ImportGraph()
+    graph.dependent_files([], all_files(project))
+    os.remove(project / 'pkg' / 'other.py')
+    graph.dependent_files([], all_files(project))
+    assert str(project / 'pkg' / 'other.py') not in graph.entries
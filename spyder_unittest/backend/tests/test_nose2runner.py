@@ -5,9 +5,18 @@
 # (see LICENSE.txt for details)
 """Tests for nose2runner.py"""
 
+# Standard library imports
+import os
+import os.path as osp
+import sys
+
+# Third party imports
+import pytest
+
 # Local imports
 from spyder_unittest.backend.nose2runner import Nose2Runner
-from spyder_unittest.backend.runnerbase import Category
+from spyder_unittest.backend.runnerbase import Category, COV_TEST_NAME
+from spyder_unittest.widgets.configdialog import Config
 
 
 def test_nose2runner_load_data(tmpdir):
@@ -40,3 +49,39 @@ def test_nose2runner_load_data(tmpdir):
     assert results[1].message == 'test failure'
     assert results[1].time == 0.01
     assert results[1].extra_text == ['text']
+
+
+def test_nose2runner_create_argument_list_with_coverage():
+    runner = Nose2Runner(None, 'results')
+    config = Config('nose2', coverage=True, args=['--extra-arg'])
+    result = runner.create_argument_list(config, 'src', None)
+    assert result[0].endswith(osp.join('workers', 'coverageworker.py'))
+    assert result[1:5] == ['src', 'results.coverage.json', 'nose2',
+                           '--plugin=nose2coverage']
+    assert result[-1] == '--extra-arg'
+
+
+def test_nose2runner_with_coverage(qtbot, tmp_path):
+    pytest.importorskip('nose2')
+    pytest.importorskip('coverage')
+    (tmp_path / 'cov_mod.py').write_text(
+        'def f(x):\n'
+        '    if x:\n'
+        '        return 1\n'
+        '    return 2\n')
+    (tmp_path / 'test_foo.py').write_text(
+        'from cov_mod import f\n'
+        'def test_ok(): assert f(1) == 1\n')
+    runner = Nose2Runner(None, str(tmp_path / 'results'))
+    config = Config('nose2', str(tmp_path), True)
+
+    with qtbot.waitSignal(runner.sig_finished, timeout=60000) as blocker:
+        runner.start(config, str(tmp_path), sys.executable, [], None)
+
+    results = blocker.args[0]
+    assert [res.name for res in results] == [
+        'test_foo.test_ok', COV_TEST_NAME, 'cov_mod.py', 'test_foo.py']
+    assert results[0].category == Category.OK
+    assert results[2].missing_lines == [(4, 4)]
+    assert not any(name.startswith('results.coverage')
+                   for name in os.listdir(tmp_path))
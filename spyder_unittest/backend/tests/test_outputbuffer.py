@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for outputbuffer.py"""
+
+# Local imports
+from spyder_unittest.backend.outputbuffer import OutputBuffer
+
+
+def test_outputbuffer_decodes_characters_split_over_writes():
+    buffer = OutputBuffer()
+    data = 'héllo €\n'.encode('utf-8')
+    for i in range(len(data)):
+        buffer.write(data[i:i+1])
+    assert buffer.text() == 'héllo €\n'
+    assert len(buffer) == 8
+
+
+def test_outputbuffer_replaces_invalid_bytes():
+    buffer = OutputBuffer()
+    buffer.write(b'ab\xff')
+    buffer.write(b'c\xc3', final=True)
+    assert str(buffer) == 'ab�c�'
+
+
+def test_outputbuffer_keeps_small_output_in_memory():
+    buffer = OutputBuffer(memory_size=10, file_size=10)
+    buffer.write(b'0123')
+    buffer.write(b'456789')
+    assert buffer.text() == '0123456789'
+    assert buffer.file is None
+
+
+def test_outputbuffer_spills_to_file():
+    buffer = OutputBuffer(memory_size=10, file_size=100)
+    for i in range(5):
+        buffer.write(f'line {i}\n'.encode('utf-8'))
+    assert buffer.memory_used == 10
+    assert buffer.file is not None
+    assert buffer.text() == ''.join(f'line {i}\n' for i in range(5))
+    buffer.write(b'end')
+    assert buffer.text().endswith('line 4\nend')
+
+
+def test_outputbuffer_discards_output_when_file_is_full():
+    buffer = OutputBuffer(memory_size=10, file_size=20)
+    buffer.write(b'a' * 20 + b'b' * 20 + b'c' * 10)
+    assert buffer.discarded == 20
+    assert len(buffer) == 30
+    assert buffer.text() == ('a' * 20 + '\n[... 20 characters omitted ...]\n'
+                             + 'c' * 10)
+
+
+def test_outputbuffer_empty():
+    buffer = OutputBuffer()
+    buffer.write(b'', final=True)
+    assert not buffer
+    assert buffer.text() == ''
+
+
+def test_outputbuffer_tail():
+    buffer = OutputBuffer(memory_size=10, file_size=20)
+    buffer.write(b'0123')
+    buffer.write(b'456789')
+    assert buffer.tail(20) == '0123456789'
+    assert buffer.tail(8) == ('[... 2 older characters not shown ...]\n'
+                              '23456789')
+
+
+def test_outputbuffer_tail_does_not_read_file():
+    buffer = OutputBuffer(memory_size=10, file_size=20)
+    buffer.write(b'a' * 20 + b'b' * 20 + b'c' * 10)
+    assert buffer.tail(100) == ('[... 40 older characters not shown ...]\n'
+                                + 'c' * 10)
@@ -6,17 +6,25 @@
 """Tests for pytestrunner.py"""
 
 # Standard library imports
+import json
+import os
 import os.path as osp
 import sys
 from unittest.mock import Mock, patch
 
 # Third party imports
+from qtpy.QtCore import QProcess
 import pytest
 
 # Local imports
+from spyder_unittest.backend.collectioncache import CollectionCache
+from spyder_unittest.backend.coverageindex import CoverageIndex
+from spyder_unittest.backend.coveragestore import CoverageStore
+from spyder_unittest.backend.impactmap import ImpactMap
 from spyder_unittest.backend.pytestrunner import PyTestRunner
 from spyder_unittest.backend.runnerbase import (Category, TestResult,
                                                 COV_TEST_NAME)
+from spyder_unittest.backend.testhistory import TestHistory
 from spyder_unittest.widgets.configdialog import Config
 
 
@@ -36,18 +44,112 @@ def test_pytestrunner_create_argument_list(monkeypatch, runner):
         'spyder_unittest.backend.pytestrunner.ZmqStreamReader',
         MockZMQStreamReader)
     mock_reader = MockZMQStreamReader()
-    mock_reader.port = 42
+    mock_reader.endpoint = 'tcp://127.0.0.1:42'
     runner = PyTestRunner(None, 'results')
     runner.reader = mock_reader
     monkeypatch.setattr('spyder_unittest.backend.pytestrunner.os.path.dirname',
                         lambda _: 'dir')
     arg_list = runner.create_argument_list(config, cov_path, None)
-    pyfile, port, *coverage, last = arg_list
+    pyfile, endpoint, *coverage, last = arg_list
     assert pyfile == osp.join('dir', 'workers', 'pytestworker.py')
-    assert port == '42'
+    assert endpoint == 'tcp://127.0.0.1:42'
     assert last == '--extra-arg'
 
 
+@pytest.mark.parametrize('selected_tests', [None, ['ham.spam']])
+def test_pytestrunner_create_argument_list_with_workers(runner,
+                                                        selected_tests):
+    config = Config(workers=4)
+    runner.reader = Mock(endpoint='tcp://127.0.0.1:42')
+    arg_list = runner.create_argument_list(config, None, selected_tests)
+    if selected_tests:
+        assert '-n' not in arg_list
+    else:
+        assert arg_list[-2:] == ['-n', '4']
+
+
+def test_pytestrunner_create_argument_list_with_selected_tests(
+        monkeypatch, runner, tmp_path):
+    monkeypatch.setattr(
+        'spyder_unittest.backend.runnerbase.MAX_SELECTED_TESTS_IN_ARGUMENTS',
+        2)
+    config = Config(wdir='ham', workers=4)
+    runner.reader = Mock(endpoint='tcp://127.0.0.1:42')
+    runner.selectionfilename = str(tmp_path / 'selection')
+
+    arg_list = runner.create_argument_list(config, None, ['spam.test_a'])
+    assert arg_list[2:] == ['spam.py::test_a']
+
+    arg_list = runner.create_argument_list(
+        config, None, ['spam.test_a', 'spam.test_b', 'eggs.test_c'])
+    assert arg_list[2:] == ['-n', '4', '--spyder-selection',
+                            str(tmp_path / 'selection')]
+    assert (tmp_path / 'selection').read_text() == (
+        'spam.py::test_a\nspam.py::test_b\neggs.py::test_c\n')
+
+
+def test_pytestrunner_create_argument_list_with_selected_files(
+        monkeypatch, runner, tmp_path):
+    monkeypatch.setattr(
+        'spyder_unittest.backend.runnerbase.MAX_SELECTED_TESTS_IN_ARGUMENTS',
+        2)
+    config = Config(wdir=str(tmp_path), args=['-x'])
+    runner.reader = Mock(endpoint='tcp://127.0.0.1:42')
+    runner.selectionfilename = str(tmp_path / 'selection')
+    filenames = [str(tmp_path / f'test_{i}.py') for i in range(3)]
+    config, selected_tests = runner.select_test_files(config, filenames)
+
+    arg_list = runner.create_argument_list(config, None, selected_tests)
+    assert arg_list[2:] == ['--spyder-selection', str(tmp_path / 'selection'),
+                            '-x']
+    assert (tmp_path / 'selection').read_text() == (
+        'test_0.py\ntest_1.py\ntest_2.py\n')
+
+
+@pytest.mark.parametrize('coverage', [False, True])
+def test_pytestrunner_create_argument_list_with_impact_map(runner, coverage):
+    config = Config(coverage=coverage)
+    runner.reader = Mock(endpoint='tcp://127.0.0.1:42')
+    runner.impact_map = Mock()
+    arg_list = runner.create_argument_list(config, 'covpath', None)
+    report = f'json:{runner.coveragefilename}' if coverage else ''
+    assert arg_list[2:] == ['--cov=covpath', f'--cov-report={report}',
+                            '--cov-context=test']
+
+
+@pytest.mark.parametrize('reorder, selected_tests, scheduled', [
+    (True, None, True), (False, None, False), (True, ['ham.spam'], False),
+    (True, ['ham.spam', 'ham.eggs'], True)])
+def test_pytestrunner_create_argument_list_with_schedule(
+        runner, reorder, selected_tests, scheduled):
+    config = Config()
+    runner.reader = Mock(endpoint='tcp://127.0.0.1:42')
+    runner.history = Mock(schedule_filename='schedule.json')
+    runner.reorder_tests = reorder
+    arg_list = runner.create_argument_list(config, None, selected_tests)
+    expected = ['-p', 'pytestschedule', '--spyder-schedule=schedule.json']
+    assert (arg_list[2:5] == expected) == scheduled
+
+
+@pytest.mark.parametrize('filename,expected', [
+    ('test_ham.py', True),
+    ('ham_test.py', True),
+    ('testing.py', False)
+])
+def test_pytestrunner_is_test_file(filename, expected):
+    assert PyTestRunner.is_test_file(filename) == expected
+
+
+def test_pytestrunner_select_test_files(tmp_path):
+    config = Config('pytest', str(tmp_path), args=['-x'])
+    filenames = [str(tmp_path / 'test_ham.py'),
+                 str(tmp_path / 'tests' / 'test_spam.py')]
+    new_config, selected_tests = PyTestRunner.select_test_files(
+        config, filenames)
+    assert new_config == config
+    assert selected_tests == ['test_ham.py', osp.join('tests', 'test_spam.py')]
+
+
 def test_pytestrunner_start(monkeypatch):
     MockZMQStreamReader = Mock()
     monkeypatch.setattr(
@@ -65,8 +167,9 @@ def test_pytestrunner_start(monkeypatch):
     runner.start(config, cov_path, sys.executable, ['pythondir'], None)
     assert runner.config is config
     assert runner.reader is mock_reader
+    MockZMQStreamReader.assert_called_with(transform=runner.convert_output)
     runner.reader.sig_received.connect.assert_called_once_with(
-        runner.process_output)
+        runner.emit_output)
     mock_base_start.assert_called_once_with(
         config, cov_path, sys.executable, ['pythondir'], None)
 
@@ -80,6 +183,16 @@ def test_pytestrunner_process_output_with_collected(qtbot, runner):
     assert blocker.args == [expected]
 
 
+def test_pytestrunner_process_output_with_collected_batch(qtbot, runner):
+    output = [{'event': 'collected',
+               'nodeids': ['spam.py::ham', 'eggs.py::bacon']},
+              {'event': 'collected', 'nodeids': ['eggs.py::spam']}]
+    with qtbot.waitSignal(runner.sig_collected) as blocker:
+        runner.process_output(output)
+    expected = ['spam.ham', 'eggs.bacon', 'eggs.spam']
+    assert blocker.args == [expected]
+
+
 def test_pytestrunner_process_output_with_collecterror(qtbot, runner):
     output = [{
             'event': 'collecterror',
@@ -118,6 +231,203 @@ def test_pytestrunner_finished(qtbot, exitcode, normal_exit):
     assert blocker.args == [results, output, normal_exit]
 
 
+def test_pytestrunner_process_output_with_finished_in_daemon_mode(qtbot):
+    mock_reader = Mock()
+    runner = PyTestRunner(None)
+    runner.daemon = True
+    runner.reader = mock_reader
+    runner.read_all_process_output = lambda: 'output'
+    runner.config = Config('pytest', None, False)
+    runner.command = ['spam.py']
+    with qtbot.waitSignal(runner.sig_finished) as blocker:
+        runner.process_output([{'event': 'finished', 'exitcode': 1}])
+    assert blocker.args == [[], 'output', True]
+    assert runner.command is None
+    mock_reader.close.assert_not_called()
+
+
+def test_pytestrunner_finished_in_daemon_mode_reads_pipe(qtbot):
+    runner = PyTestRunner(None)
+    runner.daemon = True
+    runner.config = Config('pytest', None, False)
+    mock_process = Mock()
+    mock_process.state.return_value = QProcess.Running
+    mock_process.readAllStandardOutput.return_value.data.return_value = b''
+    chunks = [b'test_foo.py .\n', b'== 1 passed ==\n']
+
+    def wait_for_ready_read(timeout):
+        if not chunks:
+            return False
+        runner.output.write(chunks.pop(0))
+        return True
+
+    mock_process.waitForReadyRead = wait_for_ready_read
+    runner.process = mock_process
+    with qtbot.waitSignal(runner.sig_finished) as blocker:
+        runner.finished(0)
+    assert str(blocker.args[1]) == 'test_foo.py .\n== 1 passed ==\n'
+    assert len(runner.output) == 0
+
+
+def test_pytestrunner_daemon(qtbot, tmp_path):
+    (tmp_path / 'test_foo.py').write_text('def test_ok(): pass\n')
+    (tmp_path / 'conftest.py').write_text('')
+    runner = PyTestRunner(None)
+    runner.daemon = True
+    config = Config('pytest', str(tmp_path), False)
+    results = []
+    runner.sig_testresult.connect(results.extend)
+
+    def run_tests():
+        with qtbot.waitSignal(runner.sig_finished, timeout=30000) as blocker:
+            runner.start(config, None, sys.executable, [], None)
+        assert blocker.args[2] is True  # normal exit
+        assert '1 passed' in str(blocker.args[1])
+        assert [res.name for res in results] == ['test_foo.test_ok']
+        results.clear()
+        return runner.process.processId()
+
+    try:
+        first_pid = run_tests()
+        assert run_tests() == first_pid
+
+        # Changing conftest.py should restart the test process
+        mtime = osp.getmtime(tmp_path / 'conftest.py')
+        os.utime(tmp_path / 'conftest.py', (mtime + 10, mtime + 10))
+        assert run_tests() != first_pid
+    finally:
+        runner.stop_daemon()
+    assert runner.process is None
+
+
+def test_pytestrunner_with_standby(qtbot, tmp_path):
+    (tmp_path / 'test_foo.py').write_text('def test_ok(): pass\n')
+    runner = PyTestRunner(None)
+    config = Config('pytest', str(tmp_path), False)
+    results = []
+    runner.sig_testresult.connect(results.extend)
+
+    runner.start_standby(config, sys.executable, [])
+    process = runner.process
+    with qtbot.waitSignal(runner.sig_finished, timeout=30000) as blocker:
+        runner.start(config, None, sys.executable, [], None)
+
+    assert blocker.args[2] is True  # normal exit
+    assert runner.process is process
+    assert [res.name for res in results] == ['test_foo.test_ok']
+
+
+def test_pytestrunner_standby_exits_before_use(qtbot, tmp_path):
+    runner = PyTestRunner(None)
+    config = Config('pytest', str(tmp_path), False)
+    runner.start_standby(config, sys.executable, [])
+
+    with qtbot.assertNotEmitted(runner.sig_finished):
+        runner.process.closeWriteChannel()  # Worker exits when stdin closes
+        qtbot.waitUntil(lambda: runner.process is None, timeout=20000)
+
+    assert not runner.is_standby_for(config, sys.executable, [])
+
+
+@pytest.mark.parametrize('selected_tests', [None, ['test_foo.test_ok']])
+def test_pytestrunner_updates_collection_cache(qtbot, tmp_path,
+                                               selected_tests):
+    (tmp_path / 'test_foo.py').write_text('def test_ok(): pass\n'
+                                          'def test_fail(): assert False\n')
+    runner = PyTestRunner(None)
+    runner.collection_cache = CollectionCache(str(tmp_path / 'cache.json'))
+    config = Config('pytest', str(tmp_path), False)
+
+    with qtbot.waitSignal(runner.sig_finished, timeout=30000):
+        runner.start(config, None, sys.executable, [], selected_tests)
+
+    cache = CollectionCache(str(tmp_path / 'cache.json'))
+    if selected_tests:
+        assert cache.entries == {}
+    else:
+        assert cache.cached_tests() == ['test_foo.test_ok',
+                                        'test_foo.test_fail']
+        assert list(cache.entries) == [
+            osp.realpath(tmp_path / 'test_foo.py')]
+
+
+def test_pytestrunner_start_collection_with_selected_files(runner):
+    runner.start_collection(Config(args=['test_ham.py']),
+                            ['test_spam.py', 'test_eggs.py::test_ok'])
+    assert runner.tests_run == {'test_ham.py', 'test_spam.py'}
+
+
+def test_pytestrunner_process_output_with_dependencies(runner, tmp_path):
+    runner.rootdir = str(tmp_path)
+    runner.config = Config(wdir=str(tmp_path / 'spam'))
+    runner.start_collection(runner.config, None)
+    runner.impact_map = Mock()
+    runner.process_output([
+        {'event': 'dependencies', 'filename': 'ham.py',
+         'nodeids': ['spam/test_foo.py::test_ok']},
+        {'event': 'logreport', 'outcome': 'passed', 'witherror': False,
+         'sections': [], 'duration': 0.1, 'filename': 'spam/test_foo.py',
+         'lineno': 0, 'nodeid': 'spam/test_foo.py::test_ok'}])
+    assert runner.dependencies == {'ham.py': {'test_foo.py::test_ok'}}
+    assert runner.tests_run == {'test_foo.py::test_ok'}
+
+    runner.update_impact_map()
+    runner.impact_map.update.assert_called_once_with(
+        runner.dependencies, None)
+    runner.impact_map.save.assert_called_once_with()
+
+
+def test_pytestrunner_records_impact_map(qtbot, tmp_path):
+    pytest.importorskip('pytest_cov')
+    (tmp_path / 'impact_mod.py').write_text('def f(): return 1\n')
+    (tmp_path / 'test_foo.py').write_text(
+        'import impact_mod\n'
+        'def test_f(): assert impact_mod.f() == 1\n'
+        'def test_none(): pass\n')
+    runner = PyTestRunner(None)
+    runner.impact_map = ImpactMap(str(tmp_path / 'impact.json'),
+                                  str(tmp_path))
+    config = Config('pytest', str(tmp_path), False)
+
+    with qtbot.waitSignal(runner.sig_finished, timeout=30000):
+        runner.start(config, str(tmp_path), sys.executable, [], None)
+
+    impact_map = ImpactMap(str(tmp_path / 'impact.json'), str(tmp_path))
+    entries = {osp.basename(path): entry.nodeids
+               for path, entry in impact_map.entries.items()}
+    assert entries == {
+        'impact_mod.py': {'test_foo.py::test_f'},
+        'test_foo.py': {'test_foo.py::test_f', 'test_foo.py::test_none'}}
+
+
+def test_pytestrunner_records_history_and_reorders_tests(qtbot, tmp_path):
+    (tmp_path / 'test_a.py').write_text('def test_ok(): pass\n')
+    (tmp_path / 'test_b.py').write_text('def test_fail(): assert False\n')
+    runner = PyTestRunner(None)
+    runner.history = TestHistory(str(tmp_path / 'history.json'))
+    runner.reorder_tests = True
+    config = Config('pytest', str(tmp_path), False)
+    results = []
+    runner.sig_testresult.connect(
+        lambda batch: results.extend(result.name for result in batch))
+
+    with qtbot.waitSignal(runner.sig_finished, timeout=30000):
+        runner.start(config, None, sys.executable, [], None)
+
+    assert results == ['test_a.test_ok', 'test_b.test_fail']
+    history = TestHistory(str(tmp_path / 'history.json'))
+    assert {testid: [record.failed for record in records]
+            for testid, records in history.entries.items()} == {
+                'test_a.py::test_ok': [False], 'test_b.py::test_fail': [True]}
+
+    # The test that failed is run first in the next test run
+    results.clear()
+    with qtbot.waitSignal(runner.sig_finished, timeout=30000):
+        runner.start(config, None, sys.executable, [], None)
+
+    assert results == ['test_b.test_fail', 'test_a.test_ok']
+
+
 @pytest.mark.parametrize('wdir, expected', [
     ('ham', 'spam.eggs'),
     (osp.join('ham', 'spam'), 'eggs'),
@@ -151,6 +461,12 @@ def test_convert_testname_to_nodeid(runner):
     assert result == nodeid
 
 
+@pytest.mark.parametrize('testname', [
+    osp.join('spam', 'eggs.py') + '::test_foo', osp.join('spam', 'eggs.py')])
+def test_convert_testname_to_nodeid_with_nodeid_or_file(runner, testname):
+    assert runner.convert_testname_to_nodeid(testname) == testname
+
+
 def standard_logreport_output():
     return {
         'event': 'logreport',
@@ -172,78 +488,129 @@ def test_pytestrunner_process_output_with_logreport_passed(qtbot, runner):
     assert blocker.args == [expected]
 
 
-def test_pytestrunner_process_coverage(qtbot):
-    output = """
-============================= test session starts ==============================
-platform linux -- Python 3.9.12, pytest-7.1.2, pluggy-1.0.0
-PyQt5 5.12.3 -- Qt runtime 5.12.9 -- Qt compiled 5.12.9
-rootdir: /TRAC/TRAC-data/spyder-unittest, configfile: setup.cfg
-plugins: flaky-3.7.0, cov-3.0.0, qt-4.0.2, mock-3.7.0
-collected 152 items
-
-spyder_unittest/backend/tests/test_abbreviator.py ...........            [  7%]
-spyder_unittest/backend/tests/test_frameworkregistry.py ..               [  8%]
-spyder_unittest/backend/tests/test_noserunner.py .....                   [ 11%]
-spyder_unittest/backend/tests/test_pytestrunner.py ..................... [ 25%]
-....                                                                     [ 28%]
-spyder_unittest/backend/tests/test_pytestworker.py ..................... [ 42%]
-....                                                                     [ 44%]
-spyder_unittest/backend/tests/test_runnerbase.py .....                   [ 48%]
-spyder_unittest/backend/tests/test_unittestrunner.py ..........          [ 54%]
-spyder_unittest/backend/tests/test_zmqstream.py .                        [ 55%]
-spyder_unittest/tests/test_unittestplugin.py s.sss                       [ 58%]
-spyder_unittest/widgets/tests/test_configdialog.py ...........           [ 65%]
-spyder_unittest/widgets/tests/test_datatree.py ......................... [ 82%]
-..                                                                       [ 83%]
-spyder_unittest/widgets/tests/test_unittestgui.py ...................... [ 98%]
-...                                                                      [100%]
-
-=============================== warnings summary ===============================
-
----------- coverage: platform linux, python 3.9.12-final-0 -----------
-Name                                        Stmts   Miss  Cover   Missing
--------------------------------------------------------------------------
-setup.py                                       26     26     0%   7-53
-spyder_unittest/backend/noserunner.py          62      7    89%   17-19, 71-72, 94, 103
-spyder_unittest/backend/pytestrunner.py       101      6    94%   100-106
-spyder_unittest/backend/pytestworker.py        78      4    95%   36, 40, 44, 152
-spyder_unittest/backend/runnerbase.py          87      2    98%   20-21
-spyder_unittest/backend/unittestrunner.py      78      5    94%   69, 75, 123, 138, 146
-spyder_unittest/unittestplugin.py             119     65    45%   60, 71, 119-123, 136-141, 148-150, 161, 170-173, 183-186, 207-208, 219-226, 240-272, 280-289, 299-301, 313-314
-spyder_unittest/widgets/configdialog.py        95     10    89%   28-30, 134-135, 144, 173-176
-spyder_unittest/widgets/datatree.py           244     14    94%   26-28, 100, 105, 107, 276-277, 280, 293, 312, 417, 422-424
-spyder_unittest/widgets/unittestgui.py        218     35    84%   41-43, 49, 223, 241, 245, 249-256, 271-278, 302-305, 330, 351-352, 468-482
--------------------------------------------------------------------------
-TOTAL                                        1201    174    86%
-
-6 files skipped due to complete coverage.
-
-================= 148 passed, 4 skipped, 242 warnings in 4.25s =================
+def test_pytestrunner_coverage_results(tmp_path):
+    data = {
+        'files': {
+            'ham.py': {
+                'executed_lines': [1, 2], 'missing_lines': [3, 4],
+                'summary': {'num_statements': 4, 'missing_lines': 2,
+                            'percent_covered': 50.0,
+                            'percent_covered_display': '50'}},
+            'spam.py': {
+                'executed_lines': [1], 'missing_lines': [],
+                'summary': {'num_statements': 1, 'missing_lines': 0,
+                            'percent_covered': 100.0,
+                            'percent_covered_display': '100'}}},
+        'totals': {'percent_covered': 60.0, 'percent_covered_display': '60'}
+    }
+    runner = PyTestRunner(None, str(tmp_path / 'results'))
+    runner.config = Config('pytest', str(tmp_path), True)
+    with open(runner.coveragefilename, 'w') as file:
+        json.dump(data, file)
+
+    results = runner.coverage_results()
+
+    assert results == [
+        TestResult(Category.COVERAGE, '60%', COV_TEST_NAME),
+        TestResult(Category.COVERAGE, '50%', 'ham.py',
+                   message='Missing: 3-4',
+                   extra_text='4 statements, 2 missing',
+                   filename=str(tmp_path / 'ham.py'), lineno=2,
+                   missing_lines=[(3, 4)]),
+        TestResult(Category.COVERAGE, '100%', 'spam.py',
+                   message='Missing: (none)',
+                   extra_text='1 statements, 0 missing',
+                   filename=str(tmp_path / 'spam.py'), lineno=None,
+                   missing_lines=[])]
+    assert not osp.exists(runner.coveragefilename)
+    assert runner.coverage_results() == []
+
+
+def test_pytestrunner_coverage_results_updates_index(tmp_path):
+    (tmp_path / 'ham.py').write_text('x = 1\n')
+    data = {
+        'files': {
+            'ham.py': {
+                'executed_lines': [1, 2], 'missing_lines': [3, 4],
+                'summary': {'num_statements': 4, 'missing_lines': 2,
+                            'percent_covered': 50.0}}},
+        'totals': {'percent_covered': 50.0}
+    }
+    runner = PyTestRunner(None, str(tmp_path / 'results'))
+    runner.config = Config('pytest', str(tmp_path), True)
+    runner.coverage_index = CoverageIndex(str(tmp_path / 'index.json'))
+    with open(runner.coveragefilename, 'w') as file:
+        json.dump(data, file)
+
+    runner.coverage_results()
+
+    lines = runner.coverage_index.lookup(str(tmp_path / 'ham.py'))
+    assert lines.missing.ranges() == [(3, 4)]
+    assert osp.exists(tmp_path / 'index.json')
+
+
+@pytest.mark.parametrize('context,expected', [
+    ('test_foo.py::test_f|run', 'test_foo.py::test_f'),
+    ('test_foo.py::test_f[a|b]|setup', 'test_foo.py::test_f[a|b]'),
+    ('', None)
+])
+def test_pytestrunner_test_for_context(runner, context, expected):
+    runner.rootdir = osp.realpath('ham')
+    assert runner.test_for_context(context) == expected
+
+
+def test_pytestrunner_finished_with_coverage(qtbot, tmp_path):
+    pytest.importorskip('pytest_cov')
+    (tmp_path / 'cov_mod.py').write_text(
+        'def f(x):\n'
+        '    if x:\n'
+        '        return 1\n'
+        '    return 2\n')
+    (tmp_path / 'test_foo.py').write_text(
+        'import cov_mod\n'
+        'def test_f(): assert cov_mod.f(True) == 1\n')
+    runner = PyTestRunner(None, str(tmp_path / 'results'))
+    config = Config('pytest', str(tmp_path), True)
+
+    with qtbot.waitSignal(runner.sig_finished, timeout=30000) as blocker:
+        runner.start(config, str(tmp_path), sys.executable, [], None)
+
+    results = {res.name: res for res in blocker.args[0]}
+    assert all(res.category == Category.COVERAGE for res in results.values())
+    assert COV_TEST_NAME in results
+    assert results['cov_mod.py'].status == '75%'
+    assert results['cov_mod.py'].missing_lines == [(4, 4)]
+    assert results['cov_mod.py'].lineno == 3
+
+
+def test_pytestrunner_accumulates_coverage(qtbot, tmp_path):
     """
-    cov_text = """
----------- coverage: platform linux, python 3.9.12-final-0 -----------
-Name                                        Stmts   Miss  Cover   Missing
--------------------------------------------------------------------------
-setup.py                                       26     26     0%   7-53
-spyder_unittest/backend/noserunner.py          62      7    89%   17-19, 71-72, 94, 103
-spyder_unittest/backend/pytestrunner.py       101      6    94%   100-106
-spyder_unittest/backend/pytestworker.py        78      4    95%   36, 40, 44, 152
-spyder_unittest/backend/runnerbase.py          87      2    98%   20-21
-spyder_unittest/backend/unittestrunner.py      78      5    94%   69, 75, 123, 138, 146
-spyder_unittest/unittestplugin.py             119     65    45%   60, 71, 119-123, 136-141, 148-150, 161, 170-173, 183-186, 207-208, 219-226, 240-272, 280-289, 299-301, 313-314
-spyder_unittest/widgets/configdialog.py        95     10    89%   28-30, 134-135, 144, 173-176
-spyder_unittest/widgets/datatree.py           244     14    94%   26-28, 100, 105, 107, 276-277, 280, 293, 312, 417, 422-424
-spyder_unittest/widgets/unittestgui.py        218     35    84%   41-43, 49, 223, 241, 245, 249-256, 271-278, 302-305, 330, 351-352, 468-482
--------------------------------------------------------------------------
-TOTAL                                        1201    174    86%
-
-6 files skipped due to complete coverage."""
-    runner = PyTestRunner(None)
-    runner.rootdir = 'ham'
-    with qtbot.waitSignal(runner.sig_testresult) as blocker:
-        runner.process_coverage(output)
-    expected = TestResult(
-        Category.COVERAGE, "86%", COV_TEST_NAME, extra_text=cov_text)
+    Test that running some tests with coverage keeps the coverage of the
+    other tests in the coverage store.
+    """
+    pytest.importorskip('pytest_cov')
+    (tmp_path / 'cov_mod.py').write_text(
+        'def f(x):\n'
+        '    if x:\n'
+        '        return 1\n'
+        '    return 2\n')
+    (tmp_path / 'test_foo.py').write_text(
+        'import cov_mod\n'
+        'def test_f(): assert cov_mod.f(True) == 1\n'
+        'def test_g(): assert cov_mod.f(False) == 2\n')
+    store = CoverageStore(str(tmp_path / 'store.json'), str(tmp_path))
+    config = Config('pytest', str(tmp_path), True)
+
+    for selected_tests in (None, ['test_foo.test_f']):
+        runner = PyTestRunner(None, str(tmp_path / 'results'))
+        runner.coverage_store = store
+        with qtbot.waitSignal(runner.sig_finished, timeout=30000) as blocker:
+            runner.start(config, str(tmp_path), sys.executable, [],
+                         selected_tests)
+        results = {res.name: res for res in blocker.args[0]}
+        assert results['cov_mod.py'].status == '100%'
+        assert sorted(store.entries['cov_mod.py'].tests) == [
+            'test_foo.py::test_f', 'test_foo.py::test_g']
 
 
 @pytest.mark.parametrize('outcome,witherror,category', [
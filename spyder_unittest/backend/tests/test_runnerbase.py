@@ -7,6 +7,7 @@
 
 # Standard library imports
 import os
+import sys
 from unittest.mock import Mock
 
 # Third party imports
@@ -31,6 +32,24 @@ def test_runnerbase_with_nonexisting_module():
         foo_runner.finished(0)
 
 
+@pytest.mark.parametrize('filename,expected', [
+    ('test_ham.py', True),
+    ('testing.py', True),
+    ('ham_test.py', False),
+    ('ham.py', False)
+])
+def test_runnerbase_is_test_file(filename, expected):
+    assert RunnerBase.is_test_file(os.path.join('dir', filename)) == expected
+
+
+def test_runnerbase_select_test_files(tmp_path):
+    config = Config('unittest', str(tmp_path))
+    filenames = [str(tmp_path / 'test_ham.py'),
+                 str(tmp_path / 'tests' / 'test_spam.py')]
+    assert RunnerBase.select_test_files(config, filenames) == (
+        config, ['test_ham', 'tests.test_spam'])
+
+
 @pytest.mark.parametrize('pythonpath,env_pythonpath', [
     ([], None),
     (['pythonpath'], None),
@@ -69,6 +88,29 @@ def test_runnerbase_prepare_process(monkeypatch, pythonpath, env_pythonpath):
         mock_process.setProcessEnvironment.assert_not_called()
 
 
+def test_runnerbase_reads_output_while_process_runs(qtbot, tmp_path):
+    runner = RunnerBase(None, 'results')
+    runner.finished = Mock()
+    runner.process = runner._prepare_process(Config(wdir=str(tmp_path)), [])
+    script = 'import sys; sys.stdout.buffer.write("é\\n".encode() * 100000)'
+    with qtbot.waitSignal(runner.process.finished, timeout=10000):
+        runner.process.start(sys.executable, ['-c', script])
+    assert len(runner.output) > 0
+    output = runner.read_all_process_output()
+    assert output.text() == 'é\n' * 100000
+    assert len(runner.output) == 0
+
+
+def test_runnerbase_writer_destination():
+    runner = RunnerBase(None, 'results')
+    runner.reader = Mock(endpoint='tcp://127.0.0.1:42')
+    assert runner.writer_destination() == 'tcp://127.0.0.1:42'
+    runner.writer_high_water_mark = 100
+    runner.writer_policy = 'drop'
+    assert runner.writer_destination() == (
+        'tcp://127.0.0.1:42?hwm=100&policy=drop')
+
+
 def test_runnerbase_start(monkeypatch):
     MockQProcess = Mock()
     monkeypatch.setattr('spyder_unittest.backend.runnerbase.QProcess',
@@ -92,3 +134,16 @@ def test_runnerbase_start(monkeypatch):
         'python_exec', ['-X', 'utf8', 'arg1', 'arg2']
     )
     mock_remove.assert_called_once_with('results')
+
+
+def test_runnerbase_selected_test_arguments(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        'spyder_unittest.backend.runnerbase.MAX_SELECTED_TESTS_IN_ARGUMENTS',
+        2)
+    runner = RunnerBase(None, str(tmp_path / 'results'))
+    assert runner.selected_test_arguments(['a', 'b'], '--opt') == ['a', 'b']
+
+    result = runner.selected_test_arguments(['a', 'b', 'c'], '--opt')
+
+    assert result == ['--opt', str(tmp_path / 'results.selection')]
+    assert (tmp_path / 'results.selection').read_text() == 'a\nb\nc\n'
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for testhistory.py"""
+
+# Standard library imports
+import json
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.testhistory import (
+    TestHistory, TestRecord, HISTORY_LENGTH, HISTORY_VERSION)
+
+
+def test_testhistory_save_and_load(tmp_path):
+    history = TestHistory(str(tmp_path / 'history.json'))
+    assert history.entries == {}
+    history.update({'foo': TestRecord(1.0, False),
+                    'bar': TestRecord(0.5, True)})
+    history.update({'foo': TestRecord(2.0, True)})
+    history.save()
+
+    history2 = TestHistory(str(tmp_path / 'history.json'))
+    assert history2.entries == history.entries
+    with open(history.schedule_filename) as file:
+        schedule = json.load(file)
+    assert schedule == {'tests': {'foo': [True, 1.5], 'bar': [True, 0.5]}}
+
+
+def test_testhistory_update():
+    history = TestHistory('nonexistent.json')
+    for n in range(HISTORY_LENGTH + 2):
+        history.update({'foo': TestRecord(float(n), n == 0),
+                        'bar': TestRecord(1.0, False)})
+    assert len(history.entries['foo']) == HISTORY_LENGTH
+    assert history.entries['foo'][0] == TestRecord(2.0, False)
+    assert history.expected_duration('foo') == 4.0
+    assert history.expected_duration('spam') is None
+    assert not history.last_failed('foo')
+    assert not history.last_failed('spam')
+
+    # Tests not collected in a complete test run are removed
+    history.update({'bar': TestRecord(1.0, True)}, {'bar', 'new'})
+    assert list(history.entries) == ['bar']
+    assert history.last_failed('bar')
+
+
+@pytest.mark.parametrize('contents', [
+    'not json', json.dumps({'version': HISTORY_VERSION + 1, 'tests': {}}),
+    json.dumps({'version': HISTORY_VERSION, 'tests': {'foo': 42}})])
+def test_testhistory_load_with_invalid_file(tmp_path, contents):
+    filename = tmp_path / 'history.json'
+    filename.write_text(contents)
+    history = TestHistory(str(filename))
+    assert history.entries == {}
@@ -6,13 +6,20 @@
 """Tests for unittestrunner.py"""
 
 # Standard library imports
+import os
 import os.path as osp
 import sys
 from unittest.mock import Mock
 
+# Third party imports
+import pytest
+
 # Local imports
+from spyder_unittest.backend.coveragestore import CoverageStore
 from spyder_unittest.backend.unittestrunner import UnittestRunner
-from spyder_unittest.backend.runnerbase import Category, TestResult
+from spyder_unittest.backend.runnerbase import (
+    Category, COV_TEST_NAME, TestResult)
+from spyder_unittest.backend.testhistory import TestRecord
 from spyder_unittest.widgets.configdialog import Config
 
 
@@ -27,7 +34,7 @@ def test_unittestrunner_create_argument_list(monkeypatch):
         'spyder_unittest.backend.unittestrunner.ZmqStreamReader',
         MockZMQStreamReader)
     mock_reader = MockZMQStreamReader()
-    mock_reader.port = 42
+    mock_reader.endpoint = 'tcp://127.0.0.1:42'
     runner = UnittestRunner(None, 'resultfile')
     runner.reader = mock_reader
     monkeypatch.setattr(
@@ -37,8 +44,107 @@ def test_unittestrunner_create_argument_list(monkeypatch):
     result = runner.create_argument_list(config, cov_path, None)
 
     pyfile = osp.join('dir', 'workers', 'unittestworker.py')
-    assert result == [pyfile, '42', '--extra-arg']
+    assert result == [pyfile, 'tcp://127.0.0.1:42', '--extra-arg']
+
+
+def test_unittestrunner_create_argument_list_with_workers():
+    config = Config(args=['--extra-arg'], workers=4)
+    runner = UnittestRunner(None)
+    runner.reader = Mock(endpoint='tcp://127.0.0.1:42')
+    result = runner.create_argument_list(config, None, None)
+    assert result[1:] == [
+        'tcp://127.0.0.1:42', '--workers', '4', '--extra-arg']
+
 
+def test_unittestrunner_create_argument_list_with_schedule():
+    config = Config(workers=4)
+    runner = UnittestRunner(None)
+    runner.reader = Mock(endpoint='tcp://127.0.0.1:42')
+    runner.history = Mock(schedule_filename='schedule.json')
+    runner.reorder_tests = True
+    result = runner.create_argument_list(config, None, None)
+    assert result[2:] == ['--schedule', 'schedule.json', '--workers', '4']
+    result = runner.create_argument_list(config, None, ['spam.ham'])
+    assert result[2:] == ['spam.ham']
+
+
+def test_unittestrunner_create_argument_list_with_coverage():
+    config = Config(coverage=True, workers=4)
+    runner = UnittestRunner(None, 'results')
+    runner.reader = Mock(endpoint='tcp://127.0.0.1:42')
+    result = runner.create_argument_list(config, 'src', None)
+    assert result[2:] == ['--coverage', 'src',
+                          '--coverage-report', 'results.coverage.json',
+                          '--workers', '4']
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_unittestrunner_with_coverage(qtbot, tmp_path, workers):
+    """
+    Test that UnittestRunner reports the combined coverage of all processes
+    when the tests are run in parallel.
+    """
+    pytest.importorskip('coverage')
+    (tmp_path / 'cov_mod.py').write_text(
+        'def f(x):\n'
+        '    if x == 1:\n'
+        '        return 1\n'
+        '    if x == 2:\n'
+        '        return 2\n'
+        '    return 3\n')
+    for n in (1, 2):
+        (tmp_path / f'test_foo{n}.py').write_text(
+            'import unittest\n'
+            'from cov_mod import f\n'
+            'class MyTest(unittest.TestCase):\n'
+            f'   def test_ok(self): self.assertEqual(f({n}), {n})\n')
+    runner = UnittestRunner(None, str(tmp_path / 'results'))
+    config = Config('unittest', str(tmp_path), True, workers=workers)
+
+    with qtbot.waitSignal(runner.sig_finished, timeout=60000) as blocker:
+        runner.start(config, str(tmp_path), sys.executable, [], None)
+
+    results = blocker.args[0]
+    assert results[0].name == COV_TEST_NAME
+    cov_mod = [res for res in results if res.name == 'cov_mod.py'][0]
+    assert cov_mod.missing_lines == [(6, 6)]
+    assert [name for name in os.listdir(tmp_path)
+            if name.startswith('results')] == []
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_unittestrunner_accumulates_coverage(qtbot, tmp_path, workers):
+    """
+    Test that UnittestRunner records which test ran every line in the
+    coverage store, and that running some tests keeps the coverage of the
+    other tests.
+    """
+    pytest.importorskip('coverage')
+    (tmp_path / 'cov_mod.py').write_text(
+        'def f(x):\n'
+        '    if x == 1:\n'
+        '        return 1\n'
+        '    return 2\n')
+    for n in (1, 2):
+        (tmp_path / f'test_foo{n}.py').write_text(
+            'import unittest\n'
+            'from cov_mod import f\n'
+            'class MyTest(unittest.TestCase):\n'
+            f'   def test_ok(self): self.assertEqual(f({n}), {n})\n')
+    store = CoverageStore(str(tmp_path / 'store.json'), str(tmp_path))
+    config = Config('unittest', str(tmp_path), True, workers=workers)
+
+    for selected_tests in (None, ['test_foo1.MyTest.test_ok']):
+        runner = UnittestRunner(None, str(tmp_path / 'results'))
+        runner.coverage_store = store
+        with qtbot.waitSignal(runner.sig_finished, timeout=60000) as blocker:
+            runner.start(config, str(tmp_path), sys.executable, [],
+                         selected_tests)
+        results = blocker.args[0]
+        assert results[0].name == COV_TEST_NAME
+        assert results[0].status == '100%'
+        assert sorted(store.entries['cov_mod.py'].tests) == [
+            'test_foo1.MyTest.test_ok', 'test_foo2.MyTest.test_ok']
 
 def test_unittestrunner_start(monkeypatch):
     """
@@ -62,12 +168,66 @@ def test_unittestrunner_start(monkeypatch):
 
     assert runner.config is config
     assert runner.reader is mock_reader
+    MockZMQStreamReader.assert_called_with(transform=runner.convert_output)
     runner.reader.sig_received.connect.assert_called_once_with(
-        runner.process_output)
+        runner.emit_output)
     mock_base_start.assert_called_once_with(
         config, cov_path, sys.executable, ['pythondir'], None)
 
 
+def test_unittestrunner_with_standby(qtbot, tmp_path):
+    """
+    Test that UnittestRunner.start() runs the tests in the process started
+    by UnittestRunner.start_standby().
+    """
+    (tmp_path / 'test_foo.py').write_text(
+        'import unittest\n'
+        'class MyTest(unittest.TestCase):\n'
+        '   def test_ok(self): pass\n')
+    runner = UnittestRunner(None)
+    config = Config('unittest', str(tmp_path))
+    results = []
+    runner.sig_testresult.connect(results.extend)
+
+    runner.start_standby(config, sys.executable, [])
+    process = runner.process
+    assert runner.is_standby_for(config, sys.executable, [])
+    assert not runner.is_standby_for(config, sys.executable, ['pythondir'])
+    with qtbot.waitSignal(runner.sig_finished, timeout=20000):
+        runner.start(config, None, sys.executable, [], None)
+
+    assert runner.process is process
+    assert runner.standby_key is None
+    assert [res.name for res in results] == ['test_foo.MyTest.test_ok']
+
+
+def test_unittestrunner_stop_standby(qtbot, tmp_path):
+    runner = UnittestRunner(None)
+    runner.start_standby(
+        Config('unittest', str(tmp_path)), sys.executable, [])
+    process = runner.process
+
+    with qtbot.assertNotEmitted(runner.sig_finished):
+        runner.stop_standby()
+
+    assert process.state() == process.NotRunning
+    assert runner.process is None
+    assert runner.standby_key is None
+
+
+def test_unittestrunner_testid_to_filename(tmp_path):
+    (tmp_path / 'pkg').mkdir()
+    (tmp_path / 'pkg' / 'test_foo.py').write_text('')
+    runner = UnittestRunner(None)
+    runner.config = Config('unittest', str(tmp_path))
+    runner.test_files = {}
+
+    filename = str(tmp_path / 'pkg' / 'test_foo.py')
+    assert runner.testid_to_filename('pkg.test_foo.MyTest.test_ok') == filename
+    assert runner.testid_to_filename('pkg.test_foo.test_func') == filename
+    assert runner.testid_to_filename('pkg.test_bar.MyTest.test_ok') is None
+
+
 def test_unittestrunner_process_output_with_collected(qtbot):
     """Test UnittestRunner.processOutput() with two `collected` events."""
     runner = UnittestRunner(None)
@@ -106,6 +266,25 @@ def test_unittestrunner_process_output_with_addsuccess(qtbot):
     assert blocker.args == [expected]
 
 
+def test_unittestrunner_process_output_records_history():
+    runner = UnittestRunner(None)
+    runner.history = Mock()
+    runner.start_collection(Config(), None)
+    runner.process_output([
+        {'event': 'collected', 'id': 'spam.ham'},
+        {'event': 'collected', 'id': 'spam.eggs'},
+        {'event': 'addFailure', 'id': 'spam.ham', 'duration': 0.5,
+         'reason': 'exception', 'err': 'traceback'},
+        {'event': 'addSkip', 'id': 'spam.eggs', 'duration': 0.0,
+         'reason': 'skip'}])
+
+    runner.update_history()
+
+    runner.history.update.assert_called_once_with(
+        {'spam.ham': TestRecord(0.5, True)}, {'spam.ham', 'spam.eggs'})
+    runner.history.save.assert_called_once_with()
+
+
 def test_unittestrunner_process_output_with_addfailure(qtbot):
     """Test UnittestRunner.processOutput() with an `addFailure` event."""
     runner = UnittestRunner(None)
@@ -5,16 +5,244 @@
 # (see LICENSE.txt for details)
 """Tests for zmqstream.py"""
 
+# Standard library imports
+import io
+import os.path as osp
+import sys
+import threading
+import time
+
+# Third party imports
+import pytest
+import zmq
+
 # Local imports
-from spyder_unittest.backend.zmqreader import ZmqStreamReader
-from spyder_unittest.backend.workers.zmqwriter import ZmqStreamWriter
+from spyder_unittest.backend.zmqreader import EventDecoder, ZmqStreamReader
+from spyder_unittest.backend.workers.zmqwriter import (
+    EventEncoder, format_destination, parse_destination, read_arguments,
+    read_selection, ZmqStreamWriter)
+
+
+@pytest.mark.parametrize('use_ipc', [False, None])
+def test_zmqstream(qtbot, use_ipc):
+    manager = ZmqStreamReader(use_ipc)
+    worker = ZmqStreamWriter(manager.endpoint)
+    with qtbot.waitSignal(manager.sig_received) as blocker:
+        worker.write(42)
+    assert blocker.args == [[42]]
+    worker.close()
+    manager.close()
+    assert manager.tempdir is None
+
+
+def test_zmqstream_with_transform_in_background_thread(qtbot):
+    threads = []
+
+    def transform(objs):
+        threads.append(threading.current_thread())
+        return [obj + 1 for obj in objs]
+
+    manager = ZmqStreamReader(transform=transform)
+    worker = ZmqStreamWriter(manager.endpoint)
+    with qtbot.waitSignal(manager.sig_received) as blocker:
+        worker.write(42)
+    assert blocker.args == [[43]]
+    assert threads == [manager.thread]
+    worker.close()
+    manager.close()
+    assert not manager.thread.is_alive()
 
 
-def test_zmqstream(qtbot):
+def test_zmqstream_close_delivers_remaining_messages(qtbot):
     manager = ZmqStreamReader()
-    worker = ZmqStreamWriter(manager.port)
+    worker = ZmqStreamWriter(manager.endpoint)
+    received = []
+    manager.sig_received.connect(received.extend)
+    worker.write(42)
+    worker.close()
+    for i in range(100):  # wait without processing Qt events
+        if not manager.received.empty():
+            break
+        time.sleep(0.01)
+    manager.close()
+    assert received == [42]
+
+
+def test_zmqstream_with_ipc_uses_temporary_directory(qtbot):
+    if not (sys.platform.startswith('linux') and zmq.has('ipc')):
+        pytest.skip('ipc transport is only used on Linux')
+    manager = ZmqStreamReader()
+    assert manager.endpoint.startswith('ipc://')
+    tempdir = manager.tempdir
+    assert osp.isdir(tempdir)
+    manager.close()
+    assert not osp.exists(tempdir)
+
+
+def test_zmqstream_with_tcp_uses_loopback(qtbot):
+    manager = ZmqStreamReader(use_ipc=False)
+    assert manager.endpoint.startswith('tcp://127.0.0.1:')
+    manager.close()
+
+
+def test_zmqstreamwriter_accepts_port_number(qtbot):
+    manager = ZmqStreamReader(use_ipc=False)
+    port = manager.endpoint.rsplit(':', 1)[1]
+    worker = ZmqStreamWriter(port)
     with qtbot.waitSignal(manager.sig_received) as blocker:
         worker.write(42)
     assert blocker.args == [[42]]
     worker.close()
     manager.close()
+
+
+def test_zmqstreamwriter_sends_in_background_thread(qtbot):
+    manager = ZmqStreamReader()
+    worker = ZmqStreamWriter(manager.endpoint)
+    threads = []
+    original_send = worker.send
+
+    def send(frame):
+        threads.append(threading.current_thread())
+        original_send(frame)
+
+    worker.send = send
+    with qtbot.waitSignal(manager.sig_received):
+        worker.write(42)
+    assert threads == [worker.thread]
+    worker.close()
+    assert not worker.thread.is_alive()
+    manager.close()
+
+
+@pytest.mark.parametrize('policy', ['block', 'drop'])
+def test_zmqstreamwriter_with_full_queue(qtbot, policy):
+    manager = ZmqStreamReader()
+    worker = ZmqStreamWriter(manager.endpoint, high_water_mark=1,
+                             policy=policy)
+    sending = threading.Event()
+    proceed = threading.Event()
+    original_send = worker.send
+
+    def send(frame):
+        sending.set()
+        proceed.wait()
+        original_send(frame)
+
+    worker.send = send
+    worker.write(1)  # taken by background thread, which waits in send()
+    assert sending.wait(5)
+    worker.write(2)  # fills queue
+    if policy == 'drop':
+        worker.write(3)
+    else:
+        threading.Timer(0.1, proceed.set).start()
+        worker.write(3)  # waits until there is space in queue
+    proceed.set()
+    received = []
+    manager.sig_received.connect(received.extend)
+    worker.close()
+    qtbot.waitUntil(lambda: len(received) >= 2)
+    manager.close()
+    if policy == 'drop':
+        assert received == [1, 2]
+        assert worker.dropped == 1
+    else:
+        assert received == [1, 2, 3]
+        assert worker.dropped == 0
+
+
+def test_zmqstreamwriter_with_unknown_policy():
+    with pytest.raises(ValueError):
+        ZmqStreamWriter('tcp://127.0.0.1:42', policy='spam')
+
+
+@pytest.mark.parametrize('high_water_mark,policy,expected', [
+    (None, None, 'tcp://127.0.0.1:42'),
+    (100, None, 'tcp://127.0.0.1:42?hwm=100'),
+    (0, 'drop', 'tcp://127.0.0.1:42?hwm=0&policy=drop')
+])
+def test_format_and_parse_destination(high_water_mark, policy, expected):
+    destination = format_destination('tcp://127.0.0.1:42', high_water_mark,
+                                     policy)
+    assert destination == expected
+    assert parse_destination(destination) == (
+        'tcp://127.0.0.1:42',
+        10000 if high_water_mark is None else high_water_mark,
+        policy or 'block')
+
+
+def test_parse_destination_with_unknown_option():
+    with pytest.raises(ValueError):
+        parse_destination('tcp://127.0.0.1:42?spam=1')
+
+
+def test_read_arguments():
+    stdin = io.StringIO('{"args": ["-x", "test_foo.py"]}\n')
+    assert read_arguments(stdin) == ['-x', 'test_foo.py']
+    assert read_arguments(stdin) is None
+
+
+def test_read_selection(tmp_path):
+    filename = tmp_path / 'selection'
+    filename.write_text('test_foo.py::test_ok\ntest_foo.py::test_[a b]\n',
+                        encoding='utf-8')
+    assert read_selection(str(filename)) == [
+        'test_foo.py::test_ok', 'test_foo.py::test_[a b]']
+
+
+def test_zmqstream_with_events(qtbot):
+    manager = ZmqStreamReader()
+    worker = ZmqStreamWriter(manager.endpoint)
+    events = [{'event': 'collected', 'nodeids': ['foo.py::bar']},
+              {'event': 'starttest', 'nodeid': 'foo.py::bar'}]
+    with qtbot.waitSignal(manager.sig_received) as blocker:
+        for event in events:
+            worker.write(event)
+    received = blocker.args[0]
+    if len(received) < len(events):
+        with qtbot.waitSignal(manager.sig_received) as blocker:
+            pass
+        received += blocker.args[0]
+    assert received == events
+    worker.close()
+    manager.close()
+
+
+@pytest.mark.parametrize('obj', [
+    42,
+    None,
+    ('event', 'not a dict'),
+    {'no': 'event'},
+    {'event': 'config', 'rootdir': '/ham'},
+    {'event': 'unknown event', 'unknown field': [1, 2]},
+    {'event': 'logreport', 'outcome': 'passed', 'witherror': False,
+     'sections': [['Captured stdout', 'ham\n']], 'duration': 0.5,
+     'nodeid': 'foo.py::bar', 'filename': 'foo.py', 'lineno': 24,
+     'message': 'msg', 'longrepr': 'long msg'},
+    {'event': 'addSkip', 'id': 'foo.Bar.test_baz', 'reason': 'because'}
+])
+def test_encode_and_decode(obj):
+    encoder = EventEncoder()
+    decoder = EventDecoder()
+    assert decoder.decode(encoder.encode(obj)) == obj
+
+
+def test_encode_and_decode_interns_test_identifiers():
+    encoder = EventEncoder()
+    decoder = EventDecoder()
+    events = [{'event': 'collected', 'nodeids': ['foo.py::bar', 'foo.py::baz']},
+              {'event': 'starttest', 'nodeid': 'foo.py::baz'},
+              {'event': 'logreport', 'nodeid': 'foo.py::baz'},
+              {'event': 'starttest', 'nodeid': 'foo.py::qux'},
+              {'event': 'starttest', 'nodeid': 'foo.py::bar'}]
+    frames = [encoder.encode(event) for event in events]
+    assert len(frames[2]) < len(EventEncoder().encode(events[2]))
+    assert [decoder.decode(frame) for frame in frames] == events
+
+
+def test_decode_with_unsupported_version():
+    frame = bytearray(EventEncoder().encode(42))
+    frame[0] += 1
+    with pytest.raises(ValueError):
+        EventDecoder().decode(bytes(frame))
@@ -13,36 +13,64 @@ from typing import Any, Optional
 
 # Local imports
 from spyder_unittest.widgets.configdialog import Config
-from spyder_unittest.backend.runnerbase import Category, RunnerBase, TestResult
+from spyder_unittest.backend.runnerbase import (
+    Category, OutputBatch, RunnerBase, TestResult)
 from spyder_unittest.backend.zmqreader import ZmqStreamReader
 
 
 class UnittestRunner(RunnerBase):
-    """Class for running tests with unittest module in standard library."""
+    """
+    Class for running tests with unittest module in standard library.
+
+    If `reorder_tests` is set, then the worker runs the tests in the order
+    given by the schedule; see `order_by_schedule()` in `unittestworker.py`.
+    Tests are identified in the history by their test id. Coverage is
+    recorded with coverage.py, also when the tests are run in parallel; see
+    `coverageworker.py`.
+    """
 
     module = 'unittest'
     name = 'unittest'
+    supports_standby = True
+    supports_scheduling = True
+    test_files: dict[str, Optional[str]]
 
     def create_argument_list(self, config: Config,
                              cov_path: Optional[str],
-                             single_test: Optional[str]) -> list[str]:
+                             selected_tests: Optional[list[str]]) -> list[str]:
         """Create argument list for testing process."""
         dirname = osp.dirname(__file__)
         pyfile = osp.join(dirname, 'workers', 'unittestworker.py')
-        arguments = [pyfile, str(self.reader.port)]
-        if single_test:
-            arguments.append(single_test)
+        arguments = [pyfile, self.writer_destination()]
+        if selected_tests:
+            arguments += self.selected_test_arguments(
+                selected_tests, '--selection')
+        if config.workers and (selected_tests is None
+                               or len(selected_tests) > 1):
+            arguments[2:2] = ['--workers', str(config.workers)]
+        if self.use_schedule(selected_tests):
+            assert self.history is not None
+            arguments[2:2] = ['--schedule', self.history.schedule_filename]
+        if config.coverage:
+            arguments[2:2] = ['--coverage', cov_path,
+                              '--coverage-report', self.coveragefilename]
         arguments += config.args
         return arguments
 
     def start(self, config: Config, cov_path: Optional[str],
               executable: str, pythonpath: list[str],
-              single_test: Optional[str]) -> None:
+              selected_tests: Optional[list[str]]) -> None:
         """Start process which will run the unit test suite."""
         self.config = config
-        self.reader = ZmqStreamReader()
-        self.reader.sig_received.connect(self.process_output)
-        super().start(config, cov_path, executable, pythonpath, single_test)
+        self.test_files = {}
+        if self.standby_key is None:
+            self.create_reader()
+        super().start(config, cov_path, executable, pythonpath, selected_tests)
+
+    def create_reader(self) -> None:
+        """Create reader for output sent by test process."""
+        self.reader = ZmqStreamReader(transform=self.convert_output)
+        self.reader.sig_received.connect(self.emit_output)
 
     def finished(self, exitcode: int) -> None:
         """
@@ -52,11 +80,18 @@ class UnittestRunner(RunnerBase):
         """
         self.reader.close()
         output = self.read_all_process_output()
-        self.sig_finished.emit([], output, True)
-
-    def process_output(self, output: list[dict[str, Any]]) -> None:
+        results = (self.coverage_results(exitcode == 0)
+                   if self.config.coverage else [])
+        if exitcode == 0:
+            self.update_collection_cache()
+            self.update_history()
+        self.sig_finished.emit(results, output, True)
+
+    def convert_output(self, output: list[dict[str, Any]]) -> OutputBatch:
         """
-        Process output of test process.
+        Convert output of test process.
+
+        This is run in the background thread of the ZMQ stream reader.
 
         Parameters
         ----------
@@ -69,19 +104,40 @@ class UnittestRunner(RunnerBase):
 
         for result_item in output:
             if result_item['event'] == 'collected':
-                collected_list.append(result_item['id'])
+                testid = result_item['id']
+                collected_list.append(testid)
+                if self.collection_cache is not None:
+                    self.record_collected(
+                        self.testid_to_filename(testid), testid)
+                self.record_history_collected(testid)
             elif result_item['event'] == 'startTest':
                 starttest_list.append(result_item['id'])
             elif result_item['event'].startswith('add'):
                 testresult = add_event_to_testresult(result_item)
                 result_list.append(testresult)
+                self.record_history(result_item['id'], testresult)
+                self.tests_run.add(result_item['id'])
 
-        if collected_list:
-            self.sig_collected.emit(collected_list)
-        if starttest_list:
-            self.sig_starttest.emit(starttest_list)
-        if result_list:
-            self.sig_testresult.emit(result_list)
+        return OutputBatch(collected_list, [], starttest_list, result_list)
+
+    def testid_to_filename(self, testid: str) -> Optional[str]:
+        """
+        Return absolute path of file containing test with given id.
+
+        The test id is of the form `package.module.Class.test`. Return None
+        if no part of it corresponds to a Python file in the working
+        directory.
+        """
+        parent = testid.rpartition('.')[0]
+        if parent not in self.test_files:
+            self.test_files[parent] = None
+            parts = parent.split('.')
+            for length in range(len(parts), 0, -1):
+                filename = osp.join(self.config.wdir, *parts[:length]) + '.py'
+                if osp.isfile(filename):
+                    self.test_files[parent] = osp.abspath(filename)
+                    break
+        return self.test_files[parent]
 
 
 def add_event_to_testresult(event: dict[str, Any]) -> TestResult:
@@ -97,5 +153,5 @@ def add_event_to_testresult(event: dict[str, Any]) -> TestResult:
     message = event.get('reason', '')
     extra_text = event.get('err', '')
     result = TestResult(cat, status, testname, message=message,
-                        extra_text=extra_text)
+                        time=event.get('duration'), extra_text=extra_text)
     return result
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Record coverage in test processes with coverage.py.
+
+Every process which runs tests records coverage in its own data file, so
+that processes running in parallel do not overwrite each other's data. The
+data files are named after the report with a suffix unique to the process.
+When all processes are finished, the data files are combined and a report
+in JSON format is written; see `write_report()`. This is the same report as
+written by pytest-cov, so the test runner reads it in the same way for all
+frameworks. The report records which test ran every line, if the test
+framework switches the coverage context to the id of every test it runs;
+see `switch_context()`.
+
+This module can also be run as a script, to run a test framework which does
+not record coverage itself:
+
+Usage: python coverageworker.py source report module [arg ...]
+
+This runs `module` like `python -m module arg ...`, while recording the
+coverage of the code in the directory `source`, and writes the report in
+JSON format to the file `report`.
+"""
+
+from __future__ import annotations
+
+# Standard library imports
+import os
+import os.path as osp
+import runpy
+import sys
+from typing import Any
+
+# Warnings of coverage.py which are not useful if a process only runs some
+# of the tests
+DISABLED_WARNINGS = ['module-not-imported', 'module-not-measured',
+                     'no-data-collected']
+
+
+def data_filename(report: str) -> str:
+    """Return base name of data files for coverage report."""
+    return osp.splitext(report)[0] + '.data'
+
+
+def erase_data(report: str) -> None:
+    """Remove data files left over from earlier runs."""
+    import coverage
+    coverage.CoverageData(data_filename(report)).erase(parallel=True)
+
+
+def start_coverage(source: str, report: str) -> Any:
+    """
+    Start recording coverage in this process.
+
+    Return the `coverage.Coverage` object, which should be passed to
+    `save_coverage()` after the tests in this process are run.
+    """
+    import coverage
+    cov = coverage.Coverage(data_file=data_filename(report),
+                            data_suffix=True, source=[source])
+    cov.set_option('run:disable_warnings', DISABLED_WARNINGS)
+    cov.start()
+    return cov
+
+
+def switch_context(context: str) -> None:
+    """
+    Switch coverage context of the coverage started in this process.
+
+    Lines run afterwards are recorded under the given context, which should
+    be the id of the test that is run, or the empty string outside tests. Do
+    nothing if coverage is not recorded.
+    """
+    coverage = sys.modules.get('coverage')
+    if coverage is None:
+        return
+    cov = coverage.Coverage.current()
+    if cov is not None:
+        cov.switch_context(context)
+
+
+def save_coverage(cov: Any) -> None:
+    """
+    Save coverage recorded so far in the data file of this process.
+
+    Coverage is still recorded afterwards, so this can be called several
+    times.
+    """
+    cov.save()
+
+
+def write_report(source: str, report: str) -> None:
+    """
+    Combine data files of all processes and write report in JSON format.
+
+    The data files are removed afterwards. Errors are written to stderr.
+    """
+    import coverage
+    cov = coverage.Coverage(data_file=data_filename(report),
+                            source=[source])
+    try:
+        cov.combine(keep=False)
+        cov.json_report(outfile=report, show_contexts=True)
+    except coverage.CoverageException as exception:
+        print(f'Cannot write coverage report: {exception}', file=sys.stderr)
+    finally:
+        cov.erase()
+
+
+def main(args: list[str]) -> None:
+    """Run module with coverage."""
+    source, report, module = args[1:4]
+    erase_data(report)
+    sys.argv = [module] + args[4:]
+    sys.path.insert(0, os.getcwd())  # Same as for `python -m module`
+    cov = start_coverage(source, report)
+    try:
+        runpy.run_module(module, run_name='__main__', alter_sys=True)
+        exitcode = 0
+    except SystemExit as exception:
+        exitcode = exception.code
+    finally:
+        cov.stop()
+        save_coverage(cov)
+    write_report(source, report)
+    sys.exit(exitcode)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Plugin for nose2 which records which test runs every line.
+
+This plugin is loaded with `--plugin=nose2coverage` when nose2 is run from
+`coverageworker.py`. It switches the coverage context to the id of every
+test while it runs, so that the coverage report records which test ran
+every line.
+"""
+
+# Third party imports
+from nose2.events import Plugin
+
+# Local imports
+# Note that the script can be run in an environment that does not contain
+# spyder_unittest so `from spyder_unittest.xxx import xxx` does not work.
+from coverageworker import switch_context
+
+
+class CoverageContextPlugin(Plugin):
+    """Switch coverage context to the test that is run."""
+
+    alwaysOn = True
+    configSection = 'spyder-coverage'
+
+    def startTest(self, event):
+        """Called by nose2 before a test is run."""
+        switch_context(event.test.id())
+
+    def stopTest(self, event):
+        """Called by nose2 after a test is run."""
+        switch_context('')
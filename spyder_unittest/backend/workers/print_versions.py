@@ -37,12 +37,27 @@ def get_pytest_info():
             'plugins': plugins}
 
 
+def get_coverage_plugins():
+    """
+    Return coverage.py as plugin for frameworks other than pytest.
+
+    These frameworks use coverage.py directly to record coverage. Return an
+    empty dict if coverage.py is not installed.
+    """
+    try:
+        import coverage
+    except ImportError:
+        return {}
+
+    return {'coverage': coverage.__version__}
+
+
 def get_nose2_info():
     """
     Return information about nose2.
 
-    This only returns the version of nose2. The function does not gather any
-    information about plugins.
+    This returns the version of nose2. The only plugin reported is
+    coverage.py, which is not a nose2 plugin but is used to record coverage.
     """
     try:
         import nose2
@@ -51,19 +66,20 @@ def get_nose2_info():
 
     return {'available': True,
             'version': nose2.__version__,
-            'plugins': {}}
+            'plugins': get_coverage_plugins()}
 
 
 def get_unittest_info():
     """
     Return versions of framework and its plugins.
 
-    As 'unittest' is a built-in framework, we use the python version.
+    As 'unittest' is a built-in framework, we use the python version. The
+    only plugin reported is coverage.py, which is used to record coverage.
     """
     from platform import python_version
     return {'available': True,
             'version': python_version(),
-            'plugins': {}}
+            'plugins': get_coverage_plugins()}
 
 
 def get_all_info():
@@ -74,7 +90,8 @@ def get_all_info():
     {'pytest': {'available': True, 'version': '7.1.1',
                 'plugins': {'flaky': '3.7.0', 'pytest-mock': '3.6.1'}},
      'nose2': {'available': False},
-     'unittest': {'available': True, 'version': '3.10.5', 'plugins': {}}}
+     'unittest': {'available': True, 'version': '3.10.5',
+                  'plugins': {'coverage': '7.2.7'}}}
     """
     return {'pytest': get_pytest_info(),
             'nose2': get_nose2_info(),
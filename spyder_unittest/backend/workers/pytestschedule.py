@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Pytest plugin which runs tests in the order given by a schedule.
+
+The plugin is loaded with `-p pytestschedule` and reads the schedule from
+the file given with `--spyder-schedule`; see `testschedule.py` for the
+format. It is loaded by name, instead of being passed to `pytest.main()`
+like the plugin in `pytestworker.py`, so that it is also loaded in the
+worker processes of pytest-xdist, which collect the tests themselves.
+
+The tests are reordered per test file, so fixtures with module or class
+scope are still set up once for each file.
+"""
+
+# Third party imports
+import pytest
+
+# Local imports
+# Note that the script can be run in an environment that does not contain
+# spyder_unittest so `from spyder_unittest.xxx import xxx` does not work.
+from testschedule import load_schedule, unit_key
+
+
+def pytest_addoption(parser):
+    """Add command line option for the schedule."""
+    parser.addoption('--spyder-schedule', metavar='FILE',
+                     help='run tests in order given by schedule in FILE')
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    """Reorder collected tests according to the schedule."""
+    filename = config.getoption('spyder_schedule')
+    if not filename:
+        return
+    schedule = load_schedule(filename)
+    if not schedule:
+        return
+    units = {}
+    for item in items:
+        units.setdefault(item.nodeid.split('::')[0], []).append(item)
+    ordered = sorted(
+        units.values(),
+        key=lambda unit: unit_key([item.nodeid for item in unit], schedule))
+    items[:] = [item for unit in ordered for item in unit]
@@ -9,9 +9,23 @@ Script for running pytest tests.
 This script is meant to be run in a separate process by a PyTestRunner.
 It runs tests via the pytest framework and prints the results so that the
 PyTestRunner can read them.
+
+Usage: python pytestworker.py endpoint [--daemon | --standby | pytest_args ...]
+
+Here, `endpoint` is the endpoint of the ZMQ socket. Use `file` to record the
+results in the event log `pytestworker.eventlog`, or `file:<filename>` to
+record them in the given file. Options for the writer, such as
+`?hwm=1000&policy=drop`, may be appended; see `create_writer()` in
+`zmqwriter.py`. If `--daemon` is given, then the worker runs
+as a persistent worker; see `serve()`. If `--standby` is given, then the
+worker waits until it reads the pytest arguments from stdin; see
+`read_arguments()` in `zmqwriter.py`. Otherwise, all other arguments are
+passed to pytest, except that `--spyder-selection FILE` is replaced by the
+nodeids of the tests listed in FILE; see `expand_selection()`.
 """
 
 # Standard library imports
+import os
 import sys
 
 # Third party imports
@@ -20,18 +34,15 @@ import pytest
 # Local imports
 # Note that the script can be run in an environment that does not contain
 # spyder_unittest so `from spyder_unittest.xxx import xxx` does not work.
-from zmqwriter import FileStub, ZmqStreamWriter
+from zmqwriter import (
+    create_writer, read_arguments, read_selection, RESTART_EXIT_CODE)
 
 
-class SpyderPlugin():
-    """Pytest plugin which reports in format suitable for Spyder."""
+class ReportState:
+    """Information about a test gathered from the reports of its phases."""
 
-    def __init__(self, writer):
+    def __init__(self):
         """Constructor."""
-        self.writer = writer
-
-    def initialize_logreport(self):
-        """Reset accumulator variables."""
         self.status = '---'
         self.duration = 0
         self.longrepr = []
@@ -40,6 +51,37 @@ class SpyderPlugin():
         self.was_skipped = False
         self.was_xfail = False
 
+
+class SpyderPlugin():
+    """
+    Pytest plugin which reports in format suitable for Spyder.
+
+    Collected test items are not reported one by one, but in batches of at
+    most `collect_batch_size` items. Any remaining items are reported when
+    collection is finished.
+
+    The information about every test that is running is kept in a ReportState
+    in `self.states`, indexed by nodeid, because reports of different tests
+    are interleaved if the tests are run in parallel with pytest-xdist.
+    """
+
+    def __init__(self, writer, collect_batch_size=1000):
+        """Constructor."""
+        self.writer = writer
+        self.collect_batch_size = collect_batch_size
+        self.collected = []
+        self.xdist_collected = False
+        self.states = {}
+        self.test_modules = set()
+
+    def get_state(self, nodeid):
+        """Return state of test with given nodeid, creating it if needed."""
+        try:
+            return self.states[nodeid]
+        except KeyError:
+            state = self.states[nodeid] = ReportState()
+            return state
+
     def pytest_report_header(self, config, startdir):
         """Called by pytest before any reporting."""
         self.writer.write({
@@ -58,10 +100,38 @@ class SpyderPlugin():
 
     def pytest_itemcollected(self, item):
         """Called by pytest when a test item is collected."""
-        self.writer.write({
-            'event': 'collected',
-            'nodeid': item.nodeid
-        })
+        self.collected.append(item.nodeid)
+        module = getattr(item, 'module', None)
+        if module is not None:
+            self.test_modules.add(module.__name__)
+        if len(self.collected) >= self.collect_batch_size:
+            self.report_collected()
+
+    def pytest_collection_finish(self, session):
+        """Called by pytest after collection is finished."""
+        self.report_collected()
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_node_collection_finished(self, node, ids):
+        """
+        Called by pytest-xdist after a worker collected tests.
+
+        All workers collect the same tests, so only report the tests
+        collected by the first worker.
+        """
+        if not self.xdist_collected:
+            self.xdist_collected = True
+            self.collected = list(ids)
+            self.report_collected()
+
+    def report_collected(self):
+        """Report test items collected since last report, if any."""
+        if self.collected:
+            self.writer.write({
+                'event': 'collected',
+                'nodeids': self.collected
+            })
+            self.collected = []
 
     def pytest_runtest_logstart(self, nodeid, location):
         """Called by pytest before running a test."""
@@ -69,70 +139,245 @@ class SpyderPlugin():
             'event': 'starttest',
             'nodeid': nodeid
         })
-        self.initialize_logreport()
+        self.states[nodeid] = ReportState()
 
     def pytest_runtest_logreport(self, report):
         """Called by pytest when a phase of a test is completed."""
+        state = self.get_state(report.nodeid)
         if report.when == 'call':
-            self.status = report.outcome
-            self.duration = report.duration
+            state.status = report.outcome
+            state.duration = report.duration
         else:
             if report.outcome == 'failed':
-                self.had_error = True
+                state.had_error = True
             elif report.outcome == 'skipped':
-                self.was_skipped = True
+                state.was_skipped = True
         if hasattr(report, 'wasxfail'):
-            self.was_xfail = True
-            self.longrepr.append(report.wasxfail if report.wasxfail else 
+            state.was_xfail = True
+            state.longrepr.append(report.wasxfail if report.wasxfail else 
                 'WAS EXPECTED TO FAIL')
-        self.sections = report.sections  # already accumulated over phases
+        state.sections = report.sections  # already accumulated over phases
         if report.longrepr:
-            first_msg_idx = len(self.longrepr)
+            first_msg_idx = len(state.longrepr)
             if hasattr(report.longrepr, 'reprcrash'):
-                self.longrepr.append(report.longrepr.reprcrash.message)
+                state.longrepr.append(report.longrepr.reprcrash.message)
             if isinstance(report.longrepr, tuple):
-                self.longrepr.append(report.longrepr[2])
+                state.longrepr.append(report.longrepr[2])
             elif isinstance(report.longrepr, str):
-                self.longrepr.append(report.longrepr)
+                state.longrepr.append(report.longrepr)
             else:
-                self.longrepr.append(str(report.longrepr))
+                state.longrepr.append(str(report.longrepr))
             if report.outcome == 'failed' and report.when in (
                     'setup', 'teardown'):
-                self.longrepr[first_msg_idx] = '{} {}: {}'.format(
-                    'ERROR at', report.when, self.longrepr[first_msg_idx])
+                state.longrepr[first_msg_idx] = '{} {}: {}'.format(
+                    'ERROR at', report.when, state.longrepr[first_msg_idx])
 
     def pytest_runtest_logfinish(self, nodeid, location):
         """Called by pytest when the entire test is completed."""
-        if self.was_xfail:
-            if self.status == 'passed':
-                self.status = 'xpassed'
+        state = self.states.pop(nodeid, None) or ReportState()
+        if state.was_xfail:
+            if state.status == 'passed':
+                state.status = 'xpassed'
             else: # 'skipped'
-                self.status = 'xfailed'
-        elif self.was_skipped:
-            self.status = 'skipped'
+                state.status = 'xfailed'
+        elif state.was_skipped:
+            state.status = 'skipped'
         data = {'event': 'logreport',
-                'outcome': self.status,
-                'witherror': self.had_error,
-                'sections': self.sections,
-                'duration': self.duration,
+                'outcome': state.status,
+                'witherror': state.had_error,
+                'sections': state.sections,
+                'duration': state.duration,
                 'nodeid': nodeid,
                 'filename': location[0],
                 'lineno': location[1]}
-        if self.longrepr:
-            msg_lines = self.longrepr[0].rstrip().splitlines()
+        if state.longrepr:
+            msg_lines = state.longrepr[0].rstrip().splitlines()
             data['message'] = msg_lines[0]
             start_item = 1 if len(msg_lines) == 1 else 0
-            data['longrepr'] = '\n'.join(self.longrepr[start_item:])
+            data['longrepr'] = '\n'.join(state.longrepr[start_item:])
         self.writer.write(data)
 
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionstart(self, session):
+        """
+        Called by pytest after the session is created.
+
+        If pytest-cov records which test ran every line, then include this in
+        the coverage report in JSON format, so that the coverage of every test
+        can be stored. This runs after pytest-cov started, which creates two
+        coverage objects: one for recording and one for combining the data
+        and writing the reports.
+        """
+        if session.config.getoption('cov_context', None) != 'test':
+            return
+        controller = coverage_controller(session.config)
+        if controller is None:
+            return
+        for cov in (controller.cov,
+                    getattr(controller, 'combining_cov', None)):
+            if cov is not None:
+                cov.set_option('json:show_contexts', True)
+
+    def pytest_sessionfinish(self, session):
+        """Called by pytest after all tests are run."""
+        self.report_dependencies(session.config)
+
+    def report_dependencies(self, config):
+        """
+        Report which tests ran code in which files, if recorded.
+
+        This uses the coverage data of pytest-cov, which needs to be run with
+        `--cov-context=test` so that it records which test ran every line.
+        For every measured file, a `dependencies` event is written with the
+        nodeids of the tests that ran code in that file. The coverage data is
+        complete at this point, because pytest-cov finishes when the test
+        loop is done.
+        """
+        controller = coverage_controller(config)
+        if controller is None or controller.cov is None:
+            return
+        data = controller.cov.get_data()
+        if not data.measured_contexts() - {''}:
+            return  # No test contexts recorded
+        for filename in sorted(data.measured_files()):
+            nodeids = set()
+            for contexts in data.contexts_by_lineno(filename).values():
+                for context in contexts:
+                    # Context is nodeid followed by |setup, |run or |teardown
+                    nodeid, sep, when = context.rpartition('|')
+                    if sep:
+                        nodeids.add(nodeid)
+            if nodeids:
+                self.writer.write({'event': 'dependencies',
+                                   'filename': filename,
+                                   'nodeids': sorted(nodeids)})
+
+
+def coverage_controller(config):
+    """Return controller of pytest-cov, or None if it is not active."""
+    cov_plugin = config.pluginmanager.getplugin('_cov')
+    return getattr(cov_plugin, 'cov_controller', None)
+
+
+class ModuleWatcher:
+    """
+    Keep track of which modules of the project under test are modified.
+
+    The project consists of all modules whose source file is in the
+    directory `rootdir` or one of its subdirectories.
+    """
+
+    def __init__(self, rootdir):
+        """Constructor."""
+        self.rootdir = os.path.join(os.path.realpath(rootdir), '')
+        self.mtimes = {}
+
+    def project_modules(self):
+        """Yield (name, filename) for all loaded modules in project."""
+        for (name, module) in list(sys.modules.items()):
+            filename = getattr(module, '__file__', None)
+            if filename and os.path.realpath(filename).startswith(
+                    self.rootdir):
+                yield (name, filename)
+
+    def record(self):
+        """Record modification time of newly loaded modules in project."""
+        for (name, filename) in self.project_modules():
+            if name not in self.mtimes:
+                try:
+                    self.mtimes[name] = (filename, os.path.getmtime(filename))
+                except OSError:
+                    pass
+
+    def changed_modules(self):
+        """Return set of names of modules modified since they were loaded."""
+        changed = set()
+        for (name, (filename, mtime)) in self.mtimes.items():
+            try:
+                if os.path.getmtime(filename) != mtime:
+                    changed.add(name)
+            except OSError:
+                changed.add(name)
+        return changed
+
+    def unload(self, names):
+        """Remove modules from `sys.modules` so that they are imported anew."""
+        for name in names:
+            sys.modules.pop(name, None)
+            del self.mtimes[name]
+
+
+def expand_selection(args):
+    """
+    Return pytest arguments with `--spyder-selection FILE` expanded.
+
+    The option is replaced by the nodeids in FILE; see `read_selection()` in
+    `zmqwriter.py`.
+    """
+    if '--spyder-selection' not in args:
+        return args
+    index = args.index('--spyder-selection')
+    return (args[:index] + read_selection(args[index + 1])
+            + args[index + 2:])
+
+
+def serve(writer, stdin):
+    """
+    Run tests repeatedly as a persistent worker.
+
+    Every line read from `stdin` is a command in JSON format. The command
+    `{"args": [...]}` runs pytest with the given arguments and then writes
+    `{'event': 'finished', 'exitcode': ...}` to `writer`. The worker stops
+    when `stdin` is closed.
+
+    Modules stay imported between runs, which is what makes re-runs fast.
+    Before every run, test modules that were modified since they were
+    imported are removed from `sys.modules`, so that pytest imports them
+    again. If any other module in the project (including `conftest.py`) is
+    modified, then it is not safe to keep using this process, so the worker
+    exits with exit code RESTART_EXIT_CODE without running the tests.
+
+    Returns
+    -------
+    int
+        Exit code for the worker process.
+    """
+    watcher = ModuleWatcher(os.getcwd())
+    test_modules = set()
+    while True:
+        args = read_arguments(stdin)
+        if args is None:
+            return 0
+        changed = watcher.changed_modules()
+        if not changed <= test_modules:
+            return RESTART_EXIT_CODE
+        watcher.unload(changed)
+        plugin = SpyderPlugin(writer)
+        exitcode = pytest.main(expand_selection(args), plugins=[plugin])
+        test_modules |= plugin.test_modules
+        watcher.record()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        writer.write({'event': 'finished', 'exitcode': int(exitcode)})
+
+
 def main(args):
     """Run pytest with the Spyder plugin."""
-    if args[1] == 'file':
-        writer = FileStub('pytestworker.log')
-    else:
-        writer = ZmqStreamWriter(int(args[1]))
-    result = pytest.main(args[2:], plugins=[SpyderPlugin(writer)])
-    writer.close()
+    writer = create_writer(args[1], 'pytestworker.eventlog')
+    try:
+        pytest_args = args[2:]
+        if pytest_args == ['--standby']:
+            pytest_args = read_arguments(sys.stdin)
+        if pytest_args == ['--daemon']:
+            result = serve(writer, sys.stdin)
+        elif pytest_args is None:
+            result = 0  # Standby worker is not needed after all
+        else:
+            result = pytest.main(expand_selection(pytest_args),
+                                 plugins=[SpyderPlugin(writer)])
+    finally:
+        # Send results still in the queue, also if pytest raised
+        writer.close()
     return result
 
 
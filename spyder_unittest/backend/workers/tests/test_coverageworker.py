@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for coverageworker.py"""
+
+# Standard library imports
+import json
+import os.path as osp
+import subprocess
+import sys
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.workers.coverageworker import (
+    data_filename, write_report)
+
+
+def test_data_filename():
+    assert data_filename('results.coverage.json') == 'results.coverage.data'
+
+
+def test_write_report_without_data(tmp_path, capsys):
+    pytest.importorskip('coverage')
+    report = str(tmp_path / 'results.coverage.json')
+    write_report(str(tmp_path), report)
+    assert not osp.exists(report)
+    assert 'Cannot write coverage report' in capsys.readouterr().err
+
+
+def test_coverageworker_main(tmp_path):
+    pytest.importorskip('coverage')
+    (tmp_path / 'cov_mod.py').write_text(
+        'import sys\n'
+        'if len(sys.argv) > 1:\n'
+        '    sys.exit(3)\n'
+        'print("not reached")\n')
+    script = osp.join(osp.dirname(__file__), osp.pardir, 'coverageworker.py')
+    report = str(tmp_path / 'results.coverage.json')
+
+    process = subprocess.run(
+        [sys.executable, script, str(tmp_path), report, 'cov_mod', 'arg'],
+        cwd=str(tmp_path))
+
+    assert process.returncode == 3
+    with open(report) as file:
+        data = json.load(file)
+    assert data['files']['cov_mod.py']['missing_lines'] == [4]
+    assert not osp.exists(data_filename(report))
@@ -5,8 +5,12 @@
 # (see LICENSE.txt for details)
 """Tests for print_versions.py"""
 
+# Standard library imports
+import sys
+
+# Local imports
 from spyder_unittest.backend.workers.print_versions import (
-    get_nose2_info, get_pytest_info, get_unittest_info)
+    get_coverage_plugins, get_nose2_info, get_pytest_info, get_unittest_info)
 
 
 def test_get_pytest_info_without_plugins(monkeypatch):
@@ -40,6 +44,9 @@ def test_get_pytest_info_with_plugins(monkeypatch):
 def test_get_nose2_info(monkeypatch):
     import nose2
     monkeypatch.setattr(nose2, '__version__', '1.2.3')
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.print_versions.get_coverage_plugins',
+        lambda: {})
     expected = {'available': True, 'version': '1.2.3', 'plugins': {}}
     assert get_nose2_info() == expected
 
@@ -47,5 +54,20 @@ def test_get_nose2_info(monkeypatch):
 def test_get_unittest_imfo(monkeypatch):
     import platform
     monkeypatch.setattr(platform, 'python_version', lambda: '1.2.3')
-    expected = {'available': True, 'version': '1.2.3', 'plugins': {}}
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.print_versions.get_coverage_plugins',
+        lambda: {'coverage': '4.5.6'})
+    expected = {'available': True, 'version': '1.2.3',
+                'plugins': {'coverage': '4.5.6'}}
     assert get_unittest_info() == expected
+
+
+def test_get_coverage_plugins(monkeypatch):
+    import coverage
+    monkeypatch.setattr(coverage, '__version__', '4.5.6')
+    assert get_coverage_plugins() == {'coverage': '4.5.6'}
+
+
+def test_get_coverage_plugins_without_coverage(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'coverage', None)
+    assert get_coverage_plugins() == {}
@@ -6,8 +6,11 @@
 """Tests for pytestworker.py"""
 
 # Standard library imports
+import io
+import json
 import os
 import os.path as osp
+import subprocess
 import sys
 from unittest.mock import create_autospec, MagicMock, Mock
 
@@ -15,13 +18,15 @@ from unittest.mock import create_autospec, MagicMock, Mock
 import pytest
 
 # Local imports
-# Local imports
+from spyder_unittest.backend.eventlog import load_event_log
 # Modules in spyder_unittest.backend.workers assume that their directory
 # is in `sys.path`, so add that directory to the path.
 old_path = sys.path
 sys.path.insert(0, osp.join(osp.dirname(__file__), osp.pardir))
-from spyder_unittest.backend.workers.pytestworker import SpyderPlugin, main
-from spyder_unittest.backend.workers.zmqwriter import ZmqStreamWriter
+from spyder_unittest.backend.workers.pytestworker import (
+    ModuleWatcher, ReportState, SpyderPlugin, expand_selection, main, serve)
+from spyder_unittest.backend.workers.zmqwriter import (
+    RESTART_EXIT_CODE, ZmqStreamWriter)
 sys.path = old_path
 
 
@@ -49,16 +54,15 @@ def test_spyderplugin_test_report_header(plugin):
 def plugin_ini():
     mock_writer = create_autospec(ZmqStreamWriter)
     plugin = SpyderPlugin(mock_writer)
-    plugin.status = '---'
-    plugin.duration = 0
-    plugin.longrepr = []
-    plugin.sections = []
-    plugin.had_error = False
-    plugin.was_skipped = False
-    plugin.was_xfail = False
+    plugin.states['foo.py::bar'] = ReportState()
     return plugin
 
 
+@pytest.fixture
+def state(plugin_ini):
+    return plugin_ini.states['foo.py::bar']
+
+
 def test_spyderplugin_test_collectreport_with_success(plugin):
     report = EmptyClass()
     report.outcome = 'success'
@@ -85,12 +89,37 @@ def test_spyderplugin_test_itemcollected(plugin):
     testitem = EmptyClass()
     testitem.nodeid = 'foo.py::bar'
     plugin.pytest_itemcollected(testitem)
+    plugin.writer.write.assert_not_called()
+    plugin.pytest_collection_finish(None)
     plugin.writer.write.assert_called_once_with({
         'event': 'collected',
-        'nodeid': 'foo.py::bar'
+        'nodeids': ['foo.py::bar']
     })
 
 
+def test_spyderplugin_test_itemcollected_in_batches(plugin):
+    plugin.collect_batch_size = 2
+    for name in ['foo', 'bar', 'baz']:
+        testitem = EmptyClass()
+        testitem.nodeid = f'spam.py::{name}'
+        plugin.pytest_itemcollected(testitem)
+    plugin.writer.write.assert_called_once_with({
+        'event': 'collected',
+        'nodeids': ['spam.py::foo', 'spam.py::bar']
+    })
+    plugin.writer.write.reset_mock()
+    plugin.pytest_collection_finish(None)
+    plugin.writer.write.assert_called_once_with({
+        'event': 'collected',
+        'nodeids': ['spam.py::baz']
+    })
+
+
+def test_spyderplugin_test_collection_finish_without_items(plugin):
+    plugin.pytest_collection_finish(None)
+    plugin.writer.write.assert_not_called()
+
+
 def standard_logreport():
     report = EmptyClass()
     report.when = 'call'
@@ -103,59 +132,60 @@ def standard_logreport():
     return report
 
 
-def test_pytest_runtest_logreport_passed(plugin_ini):
+def test_pytest_runtest_logreport_passed(plugin_ini, state):
     report = standard_logreport()
     report.sections = ['output']
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.status == 'passed'
-    assert plugin_ini.duration == 42
-    assert plugin_ini.sections == ['output']
-    assert plugin_ini.had_error is False
-    assert plugin_ini.was_skipped is False
-    assert plugin_ini.was_xfail is False
+    assert state.status == 'passed'
+    assert state.duration == 42
+    assert state.sections == ['output']
+    assert state.had_error is False
+    assert state.was_skipped is False
+    assert state.was_xfail is False
 
 
-def test_pytest_runtest_logreport_failed(plugin_ini):
+def test_pytest_runtest_logreport_failed(plugin_ini, state):
     report = standard_logreport()
     report.when = 'teardown'
     report.outcome = 'failed'
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.status == '---'
-    assert plugin_ini.duration == 0
-    assert plugin_ini.had_error is True
-    assert plugin_ini.was_skipped is False
-    assert plugin_ini.was_xfail is False
+    assert state.status == '---'
+    assert state.duration == 0
+    assert state.had_error is True
+    assert state.was_skipped is False
+    assert state.was_xfail is False
 
 
-def test_pytest_runtest_logreport_skipped(plugin_ini):
+def test_pytest_runtest_logreport_skipped(plugin_ini, state):
     report = standard_logreport()
     report.when = 'setup'
     report.outcome = 'skipped'
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.status == '---'
-    assert plugin_ini.duration == 0
-    assert plugin_ini.had_error is False
-    assert plugin_ini.was_skipped is True
-    assert plugin_ini.was_xfail is False
+    assert state.status == '---'
+    assert state.duration == 0
+    assert state.had_error is False
+    assert state.was_skipped is True
+    assert state.was_xfail is False
 
 
 @pytest.mark.parametrize('xfail_msg,longrepr', [
     ('msg', 'msg'),
     ('', 'WAS EXPECTED TO FAIL')
 ])
-def test_pytest_runtest_logreport_xfail(plugin_ini, xfail_msg, longrepr):
+def test_pytest_runtest_logreport_xfail(plugin_ini, state, xfail_msg,
+                                       longrepr):
     report = standard_logreport()
     report.wasxfail = xfail_msg
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.status == 'passed'
-    assert plugin_ini.duration == 42
-    assert plugin_ini.had_error is False
-    assert plugin_ini.was_skipped is False
-    assert plugin_ini.was_xfail is True
-    assert plugin_ini.longrepr == [longrepr]
+    assert state.status == 'passed'
+    assert state.duration == 42
+    assert state.had_error is False
+    assert state.was_skipped is False
+    assert state.was_xfail is True
+    assert state.longrepr == [longrepr]
 
 
-def test_pytest_runtest_logreport_with_reprcrash_longrepr(plugin_ini):
+def test_pytest_runtest_logreport_with_reprcrash_longrepr(plugin_ini, state):
     class MockLongrepr:
         def __init__(self):
             self.reprcrash = EmptyClass()
@@ -167,24 +197,24 @@ def test_pytest_runtest_logreport_with_reprcrash_longrepr(plugin_ini):
     report = standard_logreport()
     report.longrepr = MockLongrepr()
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.longrepr == ['msg', 'reprtraceback']
+    assert state.longrepr == ['msg', 'reprtraceback']
 
 
-def test_pytest_runtest_logreport_with_tuple_longrepr(plugin_ini):
+def test_pytest_runtest_logreport_with_tuple_longrepr(plugin_ini, state):
     report = standard_logreport()
     report.longrepr = ('path', 'lineno', 'msg')
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.longrepr == ['msg']
+    assert state.longrepr == ['msg']
 
 
-def test_pytest_runtest_logreport_with_str_longrepr(plugin_ini):
+def test_pytest_runtest_logreport_with_str_longrepr(plugin_ini, state):
     report = standard_logreport()
     report.longrepr = 'msg'
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.longrepr == ['msg']
+    assert state.longrepr == ['msg']
 
 
-def test_pytest_runtest_logreport_with_excinfo_longrepr(plugin_ini):
+def test_pytest_runtest_logreport_with_excinfo_longrepr(plugin_ini, state):
     class MockLongrepr:
         def __str__(self):
             return 'msg'
@@ -192,7 +222,7 @@ def test_pytest_runtest_logreport_with_excinfo_longrepr(plugin_ini):
     report = standard_logreport()
     report.longrepr = MockLongrepr()
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.longrepr == ['msg']
+    assert state.longrepr == ['msg']
 
 @pytest.mark.parametrize('when,longrepr,expected',[
     ('setup', [], ['ERROR at setup: msg']),
@@ -200,18 +230,18 @@ def test_pytest_runtest_logreport_with_excinfo_longrepr(plugin_ini):
     ('teardown', ['prev msg'], ['prev msg', 'ERROR at teardown: msg'])
 ])
 def test_pytest_runtest_logreport_error_in_setup_or_teardown_message(
-        plugin_ini, when, longrepr, expected):
+        plugin_ini, state, when, longrepr, expected):
     report = standard_logreport()
     report.when = when
     report.outcome = 'failed'
     report.longrepr = 'msg'
-    plugin_ini.longrepr = longrepr
+    state.longrepr = longrepr
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.longrepr == expected
+    assert state.longrepr == expected
 
 
 def test_pytest_runtest_logreport_error_in_setup_or_teardown_multiple_messages(
-        plugin_ini):
+        plugin_ini, state):
     class MockLongrepr:
         def __init__(self):
             self.reprcrash = EmptyClass()
@@ -225,14 +255,14 @@ def test_pytest_runtest_logreport_error_in_setup_or_teardown_multiple_messages(
     report.outcome = 'failed'
     report.longrepr = MockLongrepr()
     plugin_ini.pytest_runtest_logreport(report)
-    assert plugin_ini.longrepr == ['ERROR at setup: msg', 'reprtraceback']
+    assert state.longrepr == ['ERROR at setup: msg', 'reprtraceback']
 
 
-def test_pytest_runtest_logfinish_skipped(plugin_ini):
+def test_pytest_runtest_logfinish_skipped(plugin_ini, state):
     nodeid = 'foo.py::bar'
     location = ('foo.py', 24)
-    plugin_ini.was_skipped = True
-    plugin_ini.duration = 42
+    state.was_skipped = True
+    state.duration = 42
     plugin_ini.pytest_runtest_logfinish(nodeid, location)
     plugin_ini.writer.write.assert_called_once_with({
         'event': 'logreport',
@@ -246,12 +276,12 @@ def test_pytest_runtest_logfinish_skipped(plugin_ini):
     })
 
 
-def test_pytest_runtest_logfinish_xfailed(plugin_ini):
+def test_pytest_runtest_logfinish_xfailed(plugin_ini, state):
     nodeid = 'foo.py::bar'
     location = ('foo.py', 24)
-    plugin_ini.was_xfail = True
-    plugin_ini.status = 'skipped'
-    plugin_ini.duration = 42
+    state.was_xfail = True
+    state.status = 'skipped'
+    state.duration = 42
     plugin_ini.pytest_runtest_logfinish(nodeid, location)
     plugin_ini.writer.write.assert_called_once_with({
         'event': 'logreport',
@@ -265,12 +295,12 @@ def test_pytest_runtest_logfinish_xfailed(plugin_ini):
     })
 
 
-def test_pytest_runtest_logfinish_xpassed(plugin_ini):
+def test_pytest_runtest_logfinish_xpassed(plugin_ini, state):
     nodeid = 'foo.py::bar'
     location = ('foo.py', 24)
-    plugin_ini.was_xfail = True
-    plugin_ini.status = 'passed'
-    plugin_ini.duration = 42
+    state.was_xfail = True
+    state.status = 'passed'
+    state.duration = 42
     plugin_ini.pytest_runtest_logfinish(nodeid, location)
     plugin_ini.writer.write.assert_called_once_with({
         'event': 'logreport',
@@ -291,13 +321,14 @@ def test_pytest_runtest_logfinish_xpassed(plugin_ini):
     (['msg1 line1\nmsg1 line2', 'msg2'], 'msg1 line1',
      'msg1 line1\nmsg1 line2\nmsg2'),
 ])
-def test_pytest_runtest_logfinish_handles_longrepr(plugin_ini, self_longrepr,
-                                                   message, longrepr):
+def test_pytest_runtest_logfinish_handles_longrepr(plugin_ini, state,
+                                                   self_longrepr, message,
+                                                   longrepr):
     nodeid = 'foo.py::bar'
     location = ('foo.py', 24)
-    plugin_ini.status = 'passed'
-    plugin_ini.duration = 42
-    plugin_ini.longrepr = self_longrepr
+    state.status = 'passed'
+    state.duration = 42
+    state.longrepr = self_longrepr
     plugin_ini.pytest_runtest_logfinish(nodeid, location)
     plugin_ini.writer.write.assert_called_once_with({
         'event': 'logreport',
@@ -313,6 +344,40 @@ def test_pytest_runtest_logfinish_handles_longrepr(plugin_ini, self_longrepr,
     })
 
 
+def test_pytest_runtest_with_interleaved_reports(plugin):
+    location = ('foo.py', 24)
+    plugin.pytest_runtest_logstart('foo.py::bar', location)
+    plugin.pytest_runtest_logstart('foo.py::baz', location)
+    report = standard_logreport()
+    report.nodeid = 'foo.py::baz'
+    report.outcome = 'failed'
+    report.longrepr = 'msg'
+    plugin.pytest_runtest_logreport(report)
+    report = standard_logreport()
+    plugin.pytest_runtest_logreport(report)
+    plugin.writer.write.reset_mock()
+
+    plugin.pytest_runtest_logfinish('foo.py::bar', location)
+    data = plugin.writer.write.call_args[0][0]
+    assert data['outcome'] == 'passed'
+    assert 'message' not in data
+    plugin.pytest_runtest_logfinish('foo.py::baz', location)
+    data = plugin.writer.write.call_args[0][0]
+    assert data['outcome'] == 'failed'
+    assert data['message'] == 'msg'
+    assert plugin.states == {}
+
+
+def test_pytest_xdist_node_collection_finished(plugin):
+    ids = ['foo.py::bar', 'foo.py::baz']
+    plugin.pytest_xdist_node_collection_finished(None, ids)
+    plugin.pytest_xdist_node_collection_finished(None, ids)
+    plugin.writer.write.assert_called_once_with({
+        'event': 'collected',
+        'nodeids': ['foo.py::bar', 'foo.py::baz']
+    })
+
+
 @pytest.fixture(scope='module')
 def testfile_path(tmp_path_factory):
     tmp_path = tmp_path_factory.mktemp('pytestworker')
@@ -325,10 +390,10 @@ def testfile_path(tmp_path_factory):
 @pytest.mark.parametrize('alltests', [True, False])
 def test_pytestworker_integration(monkeypatch, testfile_path, alltests):
     mock_writer = create_autospec(ZmqStreamWriter)
-    MockZmqStreamWriter = Mock(return_value=mock_writer)
+    mock_create_writer = Mock(return_value=mock_writer)
     monkeypatch.setattr(
-        'spyder_unittest.backend.workers.pytestworker.ZmqStreamWriter',
-        MockZmqStreamWriter)
+        'spyder_unittest.backend.workers.pytestworker.create_writer',
+        mock_create_writer)
 
     os.chdir(testfile_path.parent)
     testfilename = testfile_path.name
@@ -336,23 +401,23 @@ def test_pytestworker_integration(monkeypatch, testfile_path, alltests):
     if not alltests:
         pytest_args.append(f'{testfilename}::test_ok')
     main(pytest_args)
+    mock_create_writer.assert_called_once_with('42', 'pytestworker.eventlog')
 
     args = mock_writer.write.call_args_list
     messages = [arg[0][0] for arg in args]
-    assert len(messages) == 7 if alltests else 4
+    assert len(messages) == 6 if alltests else 4
 
     assert messages[0]['event'] == 'config'
     assert 'rootdir' in messages[0]
 
     assert messages[1]['event'] == 'collected'
-    assert messages[1]['nodeid'] == f'{testfilename}::test_ok'
-
     if alltests:
-        n = 3
-        assert messages[2]['event'] == 'collected'
-        assert messages[2]['nodeid'] == f'{testfilename}::test_fail'
+        assert messages[1]['nodeids'] == [f'{testfilename}::test_ok',
+                                          f'{testfilename}::test_fail']
     else:
-        n = 2
+        assert messages[1]['nodeids'] == [f'{testfilename}::test_ok']
+
+    n = 2
 
     assert messages[n]['event'] == 'starttest'
     assert messages[n]['nodeid'] == f'{testfilename}::test_ok'
@@ -376,3 +441,216 @@ def test_pytestworker_integration(monkeypatch, testfile_path, alltests):
         assert messages[n+3]['filename'] == testfilename
         assert messages[n+3]['lineno'] == 1
         assert 'duration' in messages[n+3]
+
+
+@pytest.mark.parametrize('stdin', ['{"args": ["-x"]}\n', ''])
+def test_pytestworker_main_in_standby_mode(monkeypatch, stdin):
+    mock_writer = create_autospec(ZmqStreamWriter)
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.pytestworker.create_writer',
+        Mock(return_value=mock_writer))
+    mock_main = Mock(return_value=0)
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.pytestworker.pytest.main', mock_main)
+    monkeypatch.setattr('sys.stdin', io.StringIO(stdin))
+
+    main(['mockscriptname', '42', '--standby'])
+
+    if stdin:
+        mock_main.assert_called_once()
+        assert mock_main.call_args[0][0] == ['-x']
+    else:
+        mock_main.assert_not_called()
+    mock_writer.close.assert_called_once_with()
+
+
+def test_pytestworker_integration_with_xdist(monkeypatch, testfile_path):
+    pytest.importorskip('xdist')
+    mock_writer = create_autospec(ZmqStreamWriter)
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.pytestworker.create_writer',
+        Mock(return_value=mock_writer))
+
+    os.chdir(testfile_path.parent)
+    testfilename = testfile_path.name
+    main(['mockscriptname', '42', '-n', '2', '-p', 'no:cacheprovider'])
+
+    args = mock_writer.write.call_args_list
+    messages = [arg[0][0] for arg in args]
+    collected = [msg for msg in messages if msg['event'] == 'collected']
+    assert len(collected) == 1
+    assert set(collected[0]['nodeids']) == {f'{testfilename}::test_ok',
+                                            f'{testfilename}::test_fail'}
+    outcomes = {msg['nodeid']: msg['outcome'] for msg in messages
+                if msg['event'] == 'logreport'}
+    assert outcomes == {f'{testfilename}::test_ok': 'passed',
+                        f'{testfilename}::test_fail': 'failed'}
+
+
+def test_pytestworker_reports_dependencies(monkeypatch, tmp_path):
+    pytest.importorskip('pytest_cov')
+    (tmp_path / 'impact_mod.py').write_text('def f(): return 1\n'
+                                            'def g(): return 2\n')
+    (tmp_path / 'test_impact.py').write_text(
+        'import impact_mod\n'
+        'def test_f(): assert impact_mod.f() == 1\n'
+        'def test_none(): pass\n')
+    mock_writer = create_autospec(ZmqStreamWriter)
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.pytestworker.create_writer',
+        Mock(return_value=mock_writer))
+    monkeypatch.chdir(tmp_path)
+
+    main(['mockscriptname', '42', '--cov=.', '--cov-report=',
+          '--cov-context=test', '-p', 'no:cacheprovider'])
+
+    messages = [arg[0][0] for arg in mock_writer.write.call_args_list]
+    dependencies = {osp.basename(msg['filename']): msg['nodeids']
+                    for msg in messages if msg['event'] == 'dependencies'}
+    assert dependencies == {
+        'impact_mod.py': ['test_impact.py::test_f'],
+        'test_impact.py': ['test_impact.py::test_f',
+                           'test_impact.py::test_none']}
+
+
+@pytest.mark.parametrize('xdist', [False, True])
+def test_pytestworker_with_schedule(tmp_path, xdist):
+    """
+    Test that the worker runs the tests in the order given by the schedule,
+    also with pytest-xdist. The worker is run in a separate process, because
+    the processes of pytest-xdist only find the plugin in the directory of
+    the worker if it is in the Python path when the interpreter starts.
+    """
+    if xdist:
+        pytest.importorskip('xdist')
+    (tmp_path / 'test_quick.py').write_text('def test_a(): pass\n'
+                                            'def test_b(): pass\n')
+    (tmp_path / 'test_slow.py').write_text('def test_c(): pass\n')
+    (tmp_path / 'test_broken.py').write_text('def test_d(): pass\n')
+    schedule = tmp_path / 'schedule.json'
+    schedule.write_text(json.dumps({'tests': {
+        'test_quick.py::test_a': [False, 0.5],
+        'test_slow.py::test_c': [False, 2.0],
+        'test_broken.py::test_d': [True, 0.1]}}))
+    eventlog = tmp_path / 'events.log'
+    pyfile = osp.join(osp.dirname(__file__), osp.pardir, 'pytestworker.py')
+    args = [sys.executable, pyfile, f'file:{eventlog}', '-p', 'pytestschedule',
+            f'--spyder-schedule={schedule}', '-p', 'no:cacheprovider']
+    if xdist:
+        args += ['-n', '1']
+
+    subprocess.run(args, cwd=tmp_path, capture_output=True, check=False)
+
+    messages = load_event_log(str(eventlog))
+    finished = [msg['nodeid'] for msg in messages
+                if msg['event'] == 'logreport']
+    assert finished == ['test_broken.py::test_d', 'test_slow.py::test_c',
+                        'test_quick.py::test_a', 'test_quick.py::test_b']
+
+
+@pytest.mark.parametrize('source,exitcode', [
+    ('def test_ok(): pass\n', 0),
+    ('def test_fail(): assert False\n', 1),
+    ('import nonexistent_module\n', 2)
+])
+def test_pytestworker_script_exit_code(tmp_path, source, exitcode):
+    """
+    Test that the worker run as a script exits with the exit code of pytest,
+    which the runner uses to tell whether the test run completed.
+    """
+    (tmp_path / 'test_foo.py').write_text(source)
+    pyfile = osp.join(osp.dirname(__file__), osp.pardir, 'pytestworker.py')
+    args = [sys.executable, pyfile, f'file:{tmp_path / "events.log"}',
+            '-p', 'no:cacheprovider']
+    process = subprocess.run(args, cwd=tmp_path, capture_output=True,
+                             check=False)
+    assert process.returncode == exitcode
+
+
+def test_expand_selection(tmp_path):
+    selection = tmp_path / 'selection'
+    selection.write_text('test_foo.py::test_ok\ntest_bar.py\n')
+    assert expand_selection(['-x']) == ['-x']
+    assert expand_selection(
+        ['-x', '--spyder-selection', str(selection), '-v']) == [
+            '-x', 'test_foo.py::test_ok', 'test_bar.py', '-v']
+
+
+def test_modulewatcher(monkeypatch, tmp_path):
+    module_path = tmp_path / 'watched_module.py'
+    module_path.write_text('x = 1\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import watched_module  # noqa: F401
+    watcher = ModuleWatcher(str(tmp_path))
+    watcher.record()
+    assert watcher.changed_modules() == set()
+
+    mtime = os.path.getmtime(module_path)
+    os.utime(module_path, (mtime + 10, mtime + 10))
+    assert watcher.changed_modules() == {'watched_module'}
+    watcher.unload({'watched_module'})
+    assert 'watched_module' not in sys.modules
+    assert watcher.changed_modules() == set()
+
+
+@pytest.fixture
+def daemon_dir(monkeypatch, tmp_path):
+    (tmp_path / 'test_daemon_foo.py').write_text(
+        'def test_spam(): assert True\n')
+    (tmp_path / 'conftest.py').write_text('')
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    for name in ['test_daemon_foo', 'conftest']:
+        sys.modules.pop(name, None)
+
+
+def touch_later(path):
+    mtime = os.path.getmtime(path)
+    os.utime(path, (mtime + 10, mtime + 10))
+
+
+def test_serve_reloads_changed_test_module(daemon_dir):
+    mock_writer = create_autospec(ZmqStreamWriter)
+    command = json.dumps({'args': ['-p', 'no:cacheprovider']}) + '\n'
+    stdin = Mock()
+    lines = [command, command, '']
+
+    def readline():
+        if len(lines) == 2:
+            # Change test module before second run
+            path = daemon_dir / 'test_daemon_foo.py'
+            path.write_text('def test_spam(): assert False\n')
+            touch_later(path)
+        return lines.pop(0)
+
+    stdin.readline = readline
+
+    assert serve(mock_writer, stdin) == 0
+
+    messages = [arg[0][0] for arg in mock_writer.write.call_args_list]
+    outcomes = [msg['outcome'] for msg in messages
+                if msg['event'] == 'logreport']
+    assert outcomes == ['passed', 'failed']
+    finished = [msg for msg in messages if msg['event'] == 'finished']
+    assert finished == [{'event': 'finished', 'exitcode': 0},
+                        {'event': 'finished', 'exitcode': 1}]
+
+
+def test_serve_asks_for_restart_if_conftest_changes(daemon_dir):
+    mock_writer = create_autospec(ZmqStreamWriter)
+    command = json.dumps({'args': ['-p', 'no:cacheprovider']}) + '\n'
+    stdin = Mock()
+    lines = [command, command]
+
+    def readline():
+        if len(lines) == 1:
+            touch_later(daemon_dir / 'conftest.py')
+        return lines.pop(0)
+
+    stdin.readline = readline
+
+    assert serve(mock_writer, stdin) == RESTART_EXIT_CODE
+
+    messages = [arg[0][0] for arg in mock_writer.write.call_args_list]
+    finished = [msg for msg in messages if msg['event'] == 'finished']
+    assert len(finished) == 1
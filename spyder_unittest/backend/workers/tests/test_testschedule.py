@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for testschedule.py"""
+
+# Standard library imports
+import json
+import os.path as osp
+import sys
+
+# Third party imports
+import pytest
+
+# Local imports
+# Modules in spyder_unittest.backend.workers assume that their directory
+# is in `sys.path`, so add that directory to the path.
+old_path = sys.path
+sys.path.insert(0, osp.join(osp.dirname(__file__), osp.pardir))
+from spyder_unittest.backend.workers.testschedule import (
+    load_schedule, unit_key)
+sys.path = old_path
+
+
+def test_load_schedule(tmp_path):
+    filename = tmp_path / 'schedule.json'
+    filename.write_text(json.dumps({'tests': {'foo': [True, 1],
+                                              'bar': [False, 0.5]}}))
+    assert load_schedule(str(filename)) == {'foo': (True, 1.0),
+                                            'bar': (False, 0.5)}
+
+
+@pytest.mark.parametrize('contents', [
+    None, 'not json', json.dumps({'tests': {'foo': 42}})])
+def test_load_schedule_with_invalid_file(tmp_path, contents):
+    filename = tmp_path / 'schedule.json'
+    if contents is not None:
+        filename.write_text(contents)
+    assert load_schedule(str(filename)) == {}
+
+
+def test_unit_key():
+    schedule = {'fail': (True, 0.1), 'slow': (False, 3.0),
+                'quick': (False, 0.5)}
+    units = [['quick'], ['new'], ['quick', 'slow'], ['slow'],
+             ['quick', 'fail']]
+    units.sort(key=lambda unit: unit_key(unit, schedule))
+    assert units == [['quick', 'fail'], ['quick', 'slow'], ['slow'],
+                     ['quick'], ['new']]
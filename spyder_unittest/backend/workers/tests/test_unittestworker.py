@@ -6,9 +6,12 @@
 """Tests for pytestworker.py"""
 
 # Standard library imports
+import io
+import json
 import os
 import os.path as osp
 import sys
+import types
 import unittest
 from unittest.mock import call, create_autospec, Mock
 
@@ -21,7 +24,8 @@ import pytest
 old_path = sys.path
 sys.path.insert(0, osp.join(osp.dirname(__file__), osp.pardir))
 from spyder_unittest.backend.workers.unittestworker import (
-    main, report_collected, SpyderTestResult)
+    main, order_by_schedule, report_collected, split_into_units,
+    SpyderTestResult)
 from spyder_unittest.backend.workers.zmqwriter import ZmqStreamWriter
 sys.path = old_path
 
@@ -54,7 +58,7 @@ def test_spydertestresult_addsuccess(testresult):
     """Test that SpyderTestResult.addSuccess() writes the correct info."""
     test = MyTest(methodName='first')
     testresult.addSuccess(test)
-    expected = {'event': 'addSuccess', 'id': test.id()}
+    expected = {'event': 'addSuccess', 'id': test.id(), 'duration': 0.0}
     testresult.writer.write.assert_called_once_with(expected)
 
 
@@ -65,6 +69,7 @@ def test_spydertestresult_addfailure(testresult):
     testresult.addFailure(test, err)
     expected = {'event': 'addFailure',
                 'id': test.id(),
+                'duration': 0.0,
                 'reason': 'AssertionError: xxx',
                 'err': 'some exception info'}
     testresult.writer.write.assert_called_once_with(expected)
@@ -77,6 +82,7 @@ def test_spydertestresult_adderror(testresult):
     testresult.addError(test, err)
     expected = {'event': 'addError',
                 'id': test.id(),
+                'duration': 0.0,
                 'reason': 'AssertionError: xxx',
                 'err': 'some exception info'}
     testresult.writer.write.assert_called_once_with(expected)
@@ -89,6 +95,7 @@ def test_spydertestresult_addskip(testresult):
     testresult.addSkip(test, reason)
     expected = {'event': 'addSkip',
                 'id': test.id(),
+                'duration': 0.0,
                 'reason': reason}
     testresult.writer.write.assert_called_once_with(expected)
 
@@ -100,6 +107,7 @@ def test_spydertestresult_addexpectedfailure(testresult):
     testresult.addExpectedFailure(test, err)
     expected = {'event': 'addExpectedFailure',
                 'id': test.id(),
+                'duration': 0.0,
                 'reason': 'AssertionError: xxx',
                 'err': 'some exception info'}
     testresult.writer.write.assert_called_once_with(expected)
@@ -109,10 +117,22 @@ def test_spydertestresult_addunexpectedsuccess(testresult):
     """Test that SpyderTestResult.addUnexpectedSuccess() writes the correct info."""
     test = MyTest(methodName='first')
     testresult.addUnexpectedSuccess(test)
-    expected = {'event': 'addUnexpectedSuccess', 'id': test.id()}
+    expected = {'event': 'addUnexpectedSuccess', 'id': test.id(),
+                'duration': 0.0}
     testresult.writer.write.assert_called_once_with(expected)
 
 
+def test_spydertestresult_reports_duration(testresult, monkeypatch):
+    """Test that SpyderTestResult reports the time since the test started."""
+    times = iter([10.0, 12.5])
+    monkeypatch.setattr('time.perf_counter', lambda: next(times))
+    test = MyTest(methodName='first')
+    testresult.startTest(test)
+    testresult.addSuccess(test)
+    expected = {'event': 'addSuccess', 'id': test.id(), 'duration': 2.5}
+    assert testresult.writer.write.call_args == call(expected)
+
+
 def test_unittestworker_report_collected():
     """
     Test that report_collected() with a test suite containing two tests
@@ -131,6 +151,52 @@ def test_unittestworker_report_collected():
     assert mock_writer.write.mock_calls == expected
 
 
+def test_split_into_units(monkeypatch):
+    module_with_fixture = types.ModuleType('module_with_fixture')
+    module_with_fixture.setUpModule = lambda: None
+    monkeypatch.setitem(sys.modules, 'module_with_fixture',
+                        module_with_fixture)
+
+    class OtherTest(unittest.TestCase):
+        def first(self):
+            pass
+
+    class FixtureTest1(OtherTest):
+        __module__ = 'module_with_fixture'
+
+    class FixtureTest2(OtherTest):
+        __module__ = 'module_with_fixture'
+
+    tests = [MyTest('first'), FixtureTest1('first'), OtherTest('first'),
+             MyTest('second'), FixtureTest2('first')]
+    test_suite = unittest.TestSuite([unittest.TestSuite(tests[:2]),
+                                     unittest.TestSuite(tests[2:])])
+
+    units = split_into_units(test_suite)
+
+    assert [list(unit) for unit in units] == [
+        [tests[0], tests[3]], [tests[1], tests[4]], [tests[2]]]
+
+
+def test_order_by_schedule():
+    class OtherTest(unittest.TestCase):
+        def first(self):
+            pass
+
+    class SlowTest(OtherTest):
+        pass
+
+    tests = [MyTest('first'), OtherTest('first'), MyTest('second'),
+             SlowTest('first')]
+    schedule = {tests[2].id(): (False, 1.0), tests[3].id(): (False, 2.0),
+                tests[1].id(): (True, 0.5)}
+
+    test_suite = order_by_schedule(unittest.TestSuite(tests), schedule)
+
+    assert [list(unit) for unit in test_suite] == [
+        [tests[1]], [tests[3]], [tests[0], tests[2]]]
+
+
 @pytest.fixture(scope='module')
 def testfile_path(tmp_path_factory):
     tmp_path = tmp_path_factory.mktemp('unittestworker')
@@ -149,10 +215,10 @@ def test_unittestworker_main(monkeypatch, testfile_path, alltests):
     output to the ZMQ stream.
     """
     mock_writer = create_autospec(ZmqStreamWriter)
-    MockZmqStreamWriter = Mock(return_value=mock_writer)
+    mock_create_writer = Mock(return_value=mock_writer)
     monkeypatch.setattr(
-        'spyder_unittest.backend.workers.unittestworker.ZmqStreamWriter',
-        MockZmqStreamWriter)
+        'spyder_unittest.backend.workers.unittestworker.create_writer',
+        mock_create_writer)
 
     os.chdir(testfile_path.parent)
     testfilename = testfile_path.stem  # `stem` removes the .py suffix
@@ -160,6 +226,8 @@ def test_unittestworker_main(monkeypatch, testfile_path, alltests):
     if not alltests:
         main_args.append(f'{testfilename}.MyTest.test_fail')
     main(main_args)
+    mock_create_writer.assert_called_once_with(
+        '42', 'unittestworker.eventlog')
 
     args = mock_writer.write.call_args_list
     messages = [arg[0][0] for arg in args]
@@ -189,3 +257,155 @@ def test_unittestworker_main(monkeypatch, testfile_path, alltests):
 
         assert messages[n+3]['event'] == 'addSuccess'
         assert messages[n+3]['id'] == f'{testfilename}.MyTest.test_ok'
+
+
+def test_unittestworker_main_in_standby_mode(monkeypatch, testfile_path):
+    """
+    Test that the main function in standby mode reads the name of the test
+    from stdin and runs it.
+    """
+    mock_writer = create_autospec(ZmqStreamWriter)
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.unittestworker.create_writer',
+        Mock(return_value=mock_writer))
+    testname = f'{testfile_path.stem}.MyTest.test_ok'
+    command = json.dumps({'args': [testname]}) + '\n'
+    monkeypatch.setattr('sys.stdin', io.StringIO(command))
+    monkeypatch.chdir(testfile_path.parent)
+
+    main(['mockscriptname', '42', '--standby'])
+
+    messages = [arg[0][0] for arg in mock_writer.write.call_args_list]
+    assert [(msg['event'], msg['id']) for msg in messages] == [
+        ('collected', testname), ('startTest', testname),
+        ('addSuccess', testname)]
+    mock_writer.close.assert_called_once_with()
+
+
+def test_unittestworker_main_with_schedule(monkeypatch, tmp_path):
+    """
+    Test that the main function with the --schedule option runs the tests
+    in the order given by the schedule.
+    """
+    (tmp_path / 'test_schedule_foo.py').write_text(
+        'import unittest\n'
+        'class FastTest(unittest.TestCase):\n'
+        '   def test_fast(self): pass\n'
+        'class SlowTest(unittest.TestCase):\n'
+        '   def test_slow(self): pass\n'
+        'class BrokenTest(unittest.TestCase):\n'
+        '   def test_broken(self): pass\n')
+    schedule = tmp_path / 'schedule.json'
+    schedule.write_text(json.dumps({'tests': {
+        'test_schedule_foo.FastTest.test_fast': [False, 0.1],
+        'test_schedule_foo.SlowTest.test_slow': [False, 1.5],
+        'test_schedule_foo.BrokenTest.test_broken': [True, 0.0]}}))
+    mock_writer = create_autospec(ZmqStreamWriter)
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.unittestworker.create_writer',
+        Mock(return_value=mock_writer))
+    monkeypatch.chdir(tmp_path)
+
+    main(['mockscriptname', '42', '--schedule', str(schedule)])
+
+    messages = [arg[0][0] for arg in mock_writer.write.call_args_list]
+    assert [msg['id'] for msg in messages if msg['event'] == 'startTest'] == [
+        'test_schedule_foo.BrokenTest.test_broken',
+        'test_schedule_foo.SlowTest.test_slow',
+        'test_schedule_foo.FastTest.test_fast']
+
+
+def test_unittestworker_main_with_selection(monkeypatch, testfile_path,
+                                            tmp_path):
+    """
+    Test that the main function with the --selection option runs the tests
+    listed in the given file.
+    """
+    mock_writer = create_autospec(ZmqStreamWriter)
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.unittestworker.create_writer',
+        Mock(return_value=mock_writer))
+    testnames = [f'{testfile_path.stem}.MyTest.test_ok',
+                 f'{testfile_path.stem}.MyTest.test_fail']
+    selection = tmp_path / 'selection'
+    selection.write_text(''.join(name + '\n' for name in testnames))
+    monkeypatch.chdir(testfile_path.parent)
+
+    main(['mockscriptname', '42', '--selection', str(selection)])
+
+    messages = [arg[0][0] for arg in mock_writer.write.call_args_list]
+    assert [msg['id'] for msg in messages if msg['event'] == 'startTest'] == (
+        testnames)
+
+
+def test_unittestworker_main_with_workers(monkeypatch, tmp_path):
+    """
+    Test that the main function with the --workers option runs all tests
+    in other processes and writes their results to the ZMQ stream.
+    """
+    (tmp_path / 'test_shard_foo.py').write_text(
+        'import unittest\n'
+        'class FooTest(unittest.TestCase):\n'
+        '   def test_ok(self): pass\n'
+        'class BarTest(unittest.TestCase):\n'
+        '   def test_fail(self): self.fail()\n')
+    (tmp_path / 'test_shard_bar.py').write_text(
+        'import os, unittest\n'
+        'def setUpModule(): os.environ["SHARD_FIXTURE"] = "yes"\n'
+        'class BazTest(unittest.TestCase):\n'
+        '   def test_fixture(self):\n'
+        '       self.assertEqual(os.environ.get("SHARD_FIXTURE"), "yes")\n')
+    mock_writer = create_autospec(ZmqStreamWriter)
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.unittestworker.create_writer',
+        Mock(return_value=mock_writer))
+    # Processes in pool need to import modules in workers directory
+    monkeypatch.syspath_prepend(osp.join(osp.dirname(__file__), osp.pardir))
+    monkeypatch.chdir(tmp_path)
+
+    main(['mockscriptname', '42', '--workers', '2'])
+
+    messages = [arg[0][0] for arg in mock_writer.write.call_args_list]
+    collected = {msg['id'] for msg in messages if msg['event'] == 'collected'}
+    assert collected == {'test_shard_foo.FooTest.test_ok',
+                         'test_shard_foo.BarTest.test_fail',
+                         'test_shard_bar.BazTest.test_fixture'}
+    results = {msg['id']: msg['event'] for msg in messages
+               if msg['event'].startswith('add')}
+    assert results == {'test_shard_foo.FooTest.test_ok': 'addSuccess',
+                       'test_shard_foo.BarTest.test_fail': 'addFailure',
+                       'test_shard_bar.BazTest.test_fixture': 'addSuccess'}
+    mock_writer.close.assert_called_once()
+
+
+def test_unittestworker_main_with_workers_when_process_dies(
+        monkeypatch, tmp_path, capsys):
+    """
+    Test that the main function with the --workers option finishes if a
+    process in the pool dies after other units have sent their results.
+    """
+    (tmp_path / 'test_shard_ok.py').write_text(
+        'import unittest\n'
+        'class OkTest(unittest.TestCase):\n'
+        '   def test_ok(self): pass\n')
+    (tmp_path / 'test_shard_die.py').write_text(
+        'import os, time, unittest\n'
+        'class DieTest(unittest.TestCase):\n'
+        '   def test_die(self):\n'
+        '       time.sleep(0.5)\n'
+        '       os._exit(1)\n')
+    mock_writer = create_autospec(ZmqStreamWriter)
+    monkeypatch.setattr(
+        'spyder_unittest.backend.workers.unittestworker.create_writer',
+        Mock(return_value=mock_writer))
+    monkeypatch.syspath_prepend(osp.join(osp.dirname(__file__), osp.pardir))
+    monkeypatch.chdir(tmp_path)
+
+    main(['mockscriptname', '42', '--workers', '2'])
+
+    messages = [arg[0][0] for arg in mock_writer.write.call_args_list]
+    results = {msg['id']: msg['event'] for msg in messages
+               if msg['event'].startswith('add')}
+    assert results == {'test_shard_ok.OkTest.test_ok': 'addSuccess'}
+    assert 'worker process died' in capsys.readouterr().err
+    mock_writer.close.assert_called_once()
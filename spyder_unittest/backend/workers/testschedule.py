@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""
+Order in which tests are run, based on the history of earlier test runs.
+
+The test runner writes a schedule to a file in JSON format, containing
+`{"tests": {testid: [failed, duration], ...}}`. Here, `failed` says whether
+the test failed the last time it ran and `duration` is its expected duration
+in seconds. The workers use the schedule to run the tests in an order such
+that failures are reported early and parallel test runs finish soon: first
+the tests that failed, and then the tests that take the longest time.
+
+Tests are not reordered individually, but in units that are run together,
+for instance all tests in a module, so that fixtures shared by these tests
+are still set up only once. Units are ordered by the key returned by
+`unit_key()`. This is the longest-processing-time-first rule, which
+assigns the units in order of decreasing duration to whichever parallel
+worker becomes free first.
+"""
+
+# Standard library imports
+import json
+
+
+def load_schedule(filename):
+    """
+    Load schedule from file.
+
+    Return a dict mapping test ids to (failed, duration) tuples, or an empty
+    dict if the file can not be read.
+    """
+    try:
+        with open(filename, encoding='utf-8') as file:
+            tests = json.load(file)['tests']
+        return {testid: (bool(failed), float(duration))
+                for testid, (failed, duration) in tests.items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def unit_key(testids, schedule):
+    """
+    Return key for sorting a unit with the given tests.
+
+    Units with tests that failed come first; among the others, the units with
+    the longest total expected duration come first. Tests that are not in the
+    schedule, for instance new tests, count as passed with duration 0.
+    """
+    failed = False
+    duration = 0.0
+    for testid in testids:
+        test_failed, test_duration = schedule.get(testid, (False, 0.0))
+        failed = failed or test_failed
+        duration += test_duration
+    return (not failed, -duration)
@@ -10,26 +10,51 @@ This script is meant to be run in a separate process by a UnittestRunner.
 It runs tests via the unittest framework and transmits the results over a ZMQ
 socket so that the UnittestRunner can read them.
 
-Usage: python unittestworker.py port [testname]
+Usage: python unittestworker.py endpoint
+           [--standby | [--workers N] [--schedule FILE] [--selection FILE]
+                        [--coverage SOURCE --coverage-report FILE]
+                        [testname ...]]
 
-Here, `port` is the port number of the ZMQ socket. Use `file` to store the
-results in the file `unittestworker.json`. The optional argument `testname`
-is the test to run; if omitted, run all tests.
+Here, `endpoint` is the endpoint of the ZMQ socket. Use `file` to record the
+results in the event log `unittestworker.eventlog`, or `file:<filename>` to
+record them in the given file. Options for the writer, such as
+`?hwm=1000&policy=drop`, may be appended; see `create_writer()` in
+`zmqwriter.py`. If `--workers N` is given, then the tests are
+run in N processes in parallel; see `run_sharded()`. If `--schedule FILE` is
+given, then the tests are run in the order given by the schedule in FILE;
+see `order_by_schedule()`. The optional arguments `testname` are the tests
+to run; if omitted, run all tests. If `--selection FILE` is given, then the
+tests listed in FILE are run as well; see `read_selection()` in
+`zmqwriter.py`. If `--coverage SOURCE` and `--coverage-report FILE` are
+given, then the coverage of the code in the directory SOURCE is recorded,
+also in the parallel processes, and written to FILE in JSON format; see
+`coverageworker.py`. If `--standby` is given, then the worker waits until it
+reads the other arguments from stdin; see `read_arguments()` in
+`zmqwriter.py`.
 """
 
 from __future__ import annotations
 
 # Standard library imports
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import os
+import pickle
+import queue
 import sys
-from typing import ClassVar
+import time
+from typing import Any, ClassVar, Iterator, Optional
 from unittest import (
-    defaultTestLoader, TestCase, TestSuite, TextTestResult, TextTestRunner)
+    TestCase, TestLoader, TestSuite, TextTestResult, TextTestRunner)
 
 # Local imports
 # Note that the script can be run in an environment that does not contain
 # spyder_unittest so `from spyder_unittest.xxx import xxx` does not work.
-from zmqwriter import FileStub, ZmqStreamWriter
+from coverageworker import (
+    erase_data, save_coverage, start_coverage, switch_context, write_report)
+from testschedule import load_schedule, unit_key
+from zmqwriter import (
+    create_writer, read_arguments, read_selection, ZmqStreamWriter)
 
 
 class SpyderTestResult(TextTestResult):
@@ -41,18 +66,39 @@ class SpyderTestResult(TextTestResult):
     """
 
     writer: ClassVar[ZmqStreamWriter]
+    current_test: Optional[TestCase] = None
+    start_time = 0.0
+
+    def elapsed(self, test: TestCase) -> float:
+        """
+        Return time in seconds since the given test started.
+
+        Return 0 if the test was not started, which happens for errors in
+        class or module fixtures.
+        """
+        if test is not self.current_test:
+            return 0.0
+        return time.perf_counter() - self.start_time
 
     def startTest(self, test: TestCase) -> None:
         self.writer.write({
             'event': 'startTest',
             'id': test.id()
         })
+        self.current_test = test
+        self.start_time = time.perf_counter()
+        switch_context(test.id())
         super().startTest(test)
 
+    def stopTest(self, test: TestCase) -> None:
+        super().stopTest(test)
+        switch_context('')
+
     def addSuccess(self, test: TestCase) -> None:
         self.writer.write({
             'event': 'addSuccess',
-            'id': test.id()
+            'id': test.id(),
+            'duration': self.elapsed(test)
         })
         super().addSuccess(test)
 
@@ -62,6 +108,7 @@ class SpyderTestResult(TextTestResult):
         self.writer.write({
             'event': 'addError',
             'id': test.id(),
+            'duration': self.elapsed(test),
             'reason': f'{type(value).__name__}: {first_line}',
             'err': self._exc_info_to_string(err, test)
         })
@@ -73,6 +120,7 @@ class SpyderTestResult(TextTestResult):
         self.writer.write({
             'event': 'addFailure',
             'id': test.id(),
+            'duration': self.elapsed(test),
             'reason': f'{type(value).__name__}: {first_line}',
             'err': self._exc_info_to_string(err, test)
         })
@@ -82,6 +130,7 @@ class SpyderTestResult(TextTestResult):
         self.writer.write({
             'event': 'addSkip',
             'id': test.id(),
+            'duration': self.elapsed(test),
             'reason': reason
         })
         super().addSkip(test, reason)
@@ -92,6 +141,7 @@ class SpyderTestResult(TextTestResult):
         self.writer.write({
             'event': 'addExpectedFailure',
             'id': test.id(),
+            'duration': self.elapsed(test),
             'reason': f'{type(value).__name__}: {first_line}',
             'err': self._exc_info_to_string(err, test)
         })
@@ -100,7 +150,8 @@ class SpyderTestResult(TextTestResult):
     def addUnexpectedSuccess(self, test: TestCase) -> None:
         self.writer.write({
             'event': 'addUnexpectedSuccess',
-            'id': test.id()
+            'id': test.id(),
+            'duration': self.elapsed(test)
         })
         super().addUnexpectedSuccess(test)
 
@@ -116,28 +167,236 @@ def report_collected(writer: ZmqStreamWriter, test_suite: TestSuite) -> None:
             })
 
 
-def main(args: list[str]) -> None:
-    """Run unittest tests."""
-    # Parse first command line argument and create writer
-    if args[1] != 'file':
-        writer = ZmqStreamWriter(args[1])
-    else:
-        writer = FileStub('unittestworker.log')
-    SpyderTestResult.writer = writer
+def iterate_tests(test_suite: TestSuite) -> Iterator[TestCase]:
+    """Iterate over all test cases in a nested test suite."""
+    for test in test_suite:
+        if isinstance(test, TestSuite):
+            yield from iterate_tests(test)
+        else:
+            yield test
+
+
+def split_into_units(test_suite: TestSuite) -> list[TestSuite]:
+    """
+    Split test suite into units which can be run independently.
+
+    Every unit contains all tests of one class, so that `setUpClass()` and
+    `tearDownClass()` are called once. If a module defines `setUpModule()`
+    or `tearDownModule()`, then all tests in that module are in one unit.
+    Units are in the order in which their first test appears in the suite.
+    """
+    units: dict[tuple[str, str], list[TestCase]] = {}
+    for test in iterate_tests(test_suite):
+        module_name = type(test).__module__
+        module = sys.modules.get(module_name)
+        if (hasattr(module, 'setUpModule')
+                or hasattr(module, 'tearDownModule')):
+            key = (module_name, '')
+        else:
+            key = (module_name, type(test).__qualname__)
+        units.setdefault(key, []).append(test)
+    return [TestSuite(tests) for tests in units.values()]
+
+
+def order_by_schedule(test_suite: TestSuite,
+                      schedule: dict[str, tuple[bool, float]]) -> TestSuite:
+    """
+    Return test suite with the same tests, ordered according to schedule.
+
+    The test suite is split in units as described in `split_into_units()`
+    and these units are sorted as described in `testschedule.py`.
+    """
+    units = split_into_units(test_suite)
+    units.sort(key=lambda unit: unit_key([test.id() for test in unit],
+                                         schedule))
+    return TestSuite(units)
+
+
+class QueueWriter:
+    """Writer which puts objects in a multiprocessing queue."""
+
+    def __init__(self, result_queue: multiprocessing.Queue) -> None:
+        """Constructor."""
+        self.queue = result_queue
+
+    def write(self, obj: object) -> None:
+        """Put object in queue."""
+        self.queue.put(obj)
+
+    def close(self) -> None:
+        """Do nothing; the queue is closed by the process which made it."""
+        pass
+
+
+# Coverage recorded in process in pool, if any
+shard_coverage: Any = None
+
+
+def initialize_shard(result_queue: multiprocessing.Queue,
+                     coverage_args: Optional[tuple[str, str]]) -> None:
+    """
+    Set up process in pool for running units of tests.
+
+    If `coverage_args` is not None, it contains the source directory and
+    report file for recording coverage; see `start_coverage()`.
+    """
+    global shard_coverage
+    SpyderTestResult.writer = QueueWriter(result_queue)
+    if coverage_args:
+        shard_coverage = start_coverage(*coverage_args)
+
+
+def run_unit(shard: int, pickled_unit: bytes) -> None:
+    """
+    Run unit of tests in process in pool.
+
+    The results are put in the queue, followed by the index `shard` of the
+    unit to signal that the unit is finished. The sentinel is also sent if
+    the unit could not be run, so that the parent process does not wait for
+    it. If coverage is recorded, it is saved before the sentinel is sent, so
+    that the data is complete once all units are finished.
+    """
+    try:
+        unit = pickle.loads(pickled_unit)
+        test_runner = TextTestRunner(verbosity=2,
+                                     resultclass=SpyderTestResult)
+        test_runner.run(unit)
+    except Exception as exception:
+        print(f'Error in running tests: {exception}', file=sys.stderr)
+    finally:
+        if shard_coverage is not None:
+            save_coverage(shard_coverage)
+        SpyderTestResult.writer.write(shard)
+
+
+def run_sharded(test_suite: TestSuite, writer: ZmqStreamWriter,
+                workers: int,
+                coverage_args: Optional[tuple[str, str]] = None) -> None:
+    """
+    Run tests in a pool of processes.
+
+    The test suite is split in units as described in `split_into_units()`
+    and the units are distributed over `workers` processes. The processes
+    send their results to this process, which writes them all to `writer`.
+    Units which cannot be sent to another process are run in this process
+    after the others. If `coverage_args` is given, then every process
+    records coverage in its own data file; see `initialize_shard()`.
+    """
+    pickled_units = []
+    local_units = []
+    for unit in split_into_units(test_suite):
+        try:
+            pickled_units.append(pickle.dumps(unit))
+        except Exception:
+            local_units.append(unit)
+
+    context = multiprocessing.get_context('spawn')
+    result_queue = context.Queue()
+    with ProcessPoolExecutor(workers, mp_context=context,
+                             initializer=initialize_shard,
+                             initargs=(result_queue, coverage_args)
+                             ) as executor:
+        futures = [executor.submit(run_unit, shard, pickled_unit)
+                   for shard, pickled_unit in enumerate(pickled_units)]
+        finished: set[int] = set()
+        broken = False
+        while len(finished) < len(futures):
+            try:
+                obj = result_queue.get(timeout=0.1)
+            except queue.Empty:
+                # If a process in the pool died, the units it was running or
+                # had not started yet will never send their sentinel.
+                for shard, future in enumerate(futures):
+                    if future.done() and future.exception():
+                        finished.add(shard)
+                        broken = True
+                continue
+            if isinstance(obj, int):
+                finished.add(obj)
+            else:
+                writer.write(obj)
+        if broken:
+            print('Some tests were not run because a worker process died',
+                  file=sys.stderr)
+
+    if local_units:
+        test_runner = TextTestRunner(verbosity=2,
+                                     resultclass=SpyderTestResult)
+        test_runner.run(TestSuite(local_units))
+
+
+def run(writer: ZmqStreamWriter, names: list[str]) -> None:
+    """Run unittest tests selected by command line arguments `names`."""
+    # Wait for the other arguments if started in advance
+    if names == ['--standby']:
+        names = read_arguments(sys.stdin)
+        if names is None:
+            return
+
+    # Parse options for number of worker processes, schedule, file with
+    # names of selected tests and coverage
+    workers = 0
+    schedule = {}
+    selected = []
+    coverage_source = coverage_report = None
+    while names[:1] in (['--workers'], ['--schedule'], ['--selection'],
+                        ['--coverage'], ['--coverage-report']):
+        if names[0] == '--workers':
+            workers = int(names[1])
+        elif names[0] == '--schedule':
+            schedule = load_schedule(names[1])
+        elif names[0] == '--selection':
+            selected = read_selection(names[1])
+        elif names[0] == '--coverage':
+            coverage_source = names[1]
+        else:
+            coverage_report = names[1]
+        names = names[2:]
+    names = selected + names
+
+    # Start recording coverage before the tests are imported
+    coverage_args = None
+    cov = None
+    if coverage_source and coverage_report:
+        coverage_args = (coverage_source, coverage_report)
+        erase_data(coverage_report)
+        cov = start_coverage(*coverage_args)
 
     # Gather tests
-    if args[2:]:
+    loader = TestLoader()
+    if names:
         # Add cwd to path so that modules can be found
         sys.path = [os.getcwd()] + sys.path
-        test_suite = defaultTestLoader.loadTestsFromNames(args[2:])
+        test_suite = loader.loadTestsFromNames(names)
     else:
-        test_suite = defaultTestLoader.discover('.')
+        test_suite = loader.discover('.')
     report_collected(writer, test_suite)
+    if schedule:
+        test_suite = order_by_schedule(test_suite, schedule)
 
     # Run tests
-    test_runner = TextTestRunner(verbosity=2, resultclass=SpyderTestResult)
-    test_runner.run(test_suite)
-    writer.close()
+    if workers:
+        run_sharded(test_suite, writer, workers, coverage_args)
+    else:
+        test_runner = TextTestRunner(verbosity=2,
+                                     resultclass=SpyderTestResult)
+        test_runner.run(test_suite)
+    if cov is not None:
+        cov.stop()
+        save_coverage(cov)
+        write_report(*coverage_args)
+
+
+def main(args: list[str]) -> None:
+    """Run unittest tests."""
+    # Parse first command line argument and create writer
+    writer = create_writer(args[1], 'unittestworker.eventlog')
+    SpyderTestResult.writer = writer
+    try:
+        run(writer, args[2:])
+    finally:
+        # Send results still in the queue, also if the tests raised
+        writer.close()
 
 
 if __name__ == '__main__':
@@ -7,63 +7,379 @@
 Writer for sending stream of python objects over a ZMQ socket.
 
 The intended usage is that you construct a ZmqStreamReader in one process
-and a ZmqStreamWriter (with the same port number as the reader) in a worker
+and a ZmqStreamWriter (with the same endpoint as the reader) in a worker
 process. The worker process can then use the stream to send its result to the
 reader.
+
+Objects are sent in a compact format, described in the docstring of
+`EventEncoder`. This module also defines the tables used for encoding, so
+that the reader can use them for decoding.
+
+Instead of sending the objects to a reader, an EventRecorder writes them to
+an event log, which can be replayed later with the `eventlog` module in the
+backend.
 """
 
+from __future__ import annotations
+
 # Standard library imports
+import atexit
+import json
+import pickle
+import queue
+import struct
 import sys
+import threading
+import time
+from typing import Optional
 
 # Third party imports
 import zmq
 
+# Version of the format in which objects are encoded. This should be
+# increased whenever the format or the tables below change in an incompatible
+# way (appending names to the tables is compatible).
+WIRE_FORMAT_VERSION = 1
+
+# Kinds of encoded objects
+KIND_EVENT = 0
+KIND_OBJECT = 1
+
+# Event names and field names which are encoded as their index in the list
+EVENT_NAMES = [
+    # Sent by pytestworker.py
+    'config', 'collected', 'collecterror', 'starttest', 'logreport',
+    # Sent by unittestworker.py
+    'startTest', 'addSuccess', 'addError', 'addFailure', 'addSkip',
+    'addExpectedFailure', 'addUnexpectedSuccess',
+    # Sent by persistent workers
+    'finished',
+    # Sent by pytestworker.py
+    'dependencies'
+]
+FIELD_NAMES = [
+    'rootdir', 'nodeid', 'nodeids', 'longrepr', 'outcome', 'witherror',
+    'sections', 'duration', 'filename', 'lineno', 'message', 'id', 'reason',
+    'err', 'exitcode'
+]
+
+# Fields whose value is a test identifier (or a list of test identifiers);
+# these are sent in full only once and referred to by an integer afterwards
+INTERNED_FIELDS = {'nodeid', 'nodeids', 'id'}
+
+# Pickle protocol used for encoding; protocol 4 is supported by Python 3.4+
+PICKLE_PROTOCOL = 4
+
+# Every event log starts with EVENT_LOG_MAGIC followed by one byte with
+# EVENT_LOG_VERSION. Every record consists of EVENT_LOG_RECORD_HEADER (time
+# in seconds since the start of recording, and length of the frame) followed
+# by the frame as sent over the ZMQ stream.
+EVENT_LOG_MAGIC = b'SPYUTLOG'
+EVENT_LOG_VERSION = 1
+EVENT_LOG_RECORD_HEADER = struct.Struct('<dI')
+
+
+class EventEncoder:
+    """
+    Encoder for objects sent over a ZMQ stream.
+
+    Every object is encoded as two bytes followed by a pickled payload. The
+    first byte is WIRE_FORMAT_VERSION and the second byte is the kind of the
+    object. Events (dicts with an 'event' key) are of kind KIND_EVENT and
+    their payload is a flat tuple `(event, key1, value1, key2, value2, ...)`,
+    where the event name and the keys are replaced by their index in
+    EVENT_NAMES and FIELD_NAMES if they appear there. Every other object is
+    of kind KIND_OBJECT and is pickled as is.
+
+    Values of fields in INTERNED_FIELDS are strings (or lists of strings).
+    Every string is assigned an integer, counting from zero in the order in
+    which the strings are first sent. The first time a string is sent, it is
+    sent in full; afterwards, only its integer is sent. The decoder assigns
+    the same integers, so it can recover the original string.
+    """
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.event_codes = {name: i for (i, name) in enumerate(EVENT_NAMES)}
+        self.field_codes = {name: i for (i, name) in enumerate(FIELD_NAMES)}
+        self.interned: dict[str, int] = {}
+
+    def intern(self, value: str):
+        """Return integer for string if sent before, otherwise the string."""
+        try:
+            return self.interned[value]
+        except KeyError:
+            self.interned[value] = len(self.interned)
+            return value
+
+    def encode(self, obj: object) -> bytes:
+        """Encode arbitrary Python object."""
+        if not (isinstance(obj, dict) and 'event' in obj):
+            header = bytes([WIRE_FORMAT_VERSION, KIND_OBJECT])
+            return header + pickle.dumps(obj, protocol=PICKLE_PROTOCOL)
+        event = obj['event']
+        payload = [self.event_codes.get(event, event)]
+        for (key, value) in obj.items():
+            if key == 'event':
+                continue
+            if key in INTERNED_FIELDS:
+                if isinstance(value, list):
+                    value = [self.intern(item) for item in value]
+                else:
+                    value = self.intern(value)
+            payload.append(self.field_codes.get(key, key))
+            payload.append(value)
+        header = bytes([WIRE_FORMAT_VERSION, KIND_EVENT])
+        return header + pickle.dumps(tuple(payload), protocol=PICKLE_PROTOCOL)
+
+
+# Exit code of a persistent worker which asks to be restarted
+RESTART_EXIT_CODE = 75
+
+# Default maximum number of objects waiting to be sent by a writer
+DEFAULT_HIGH_WATER_MARK = 10000
+
+# Sentinel put in the queue to stop the background thread
+_CLOSE = object()
+
 
 class ZmqStreamWriter:
-    """Writer for sending stream of Python object over a ZMQ stream."""
+    """
+    Writer for sending stream of Python object over a ZMQ stream.
+
+    Objects passed to `write()` are put in a queue. A background thread takes
+    them from the queue, encodes them and sends them over the socket, so that
+    reporting results does not slow down the tests themselves.
+
+    The queue holds at most `high_water_mark` objects. If the queue is full,
+    `write()` waits until there is space if `policy` is `'block'`, and
+    discards the object if `policy` is `'drop'`. Discarded objects are
+    counted in the `dropped` attribute.
 
-    def __init__(self, port: str) -> None:
+    The objects in the queue are only sent if `close()` is called. This is
+    also done when the process exits, in case the worker does not get to
+    call `close()` itself.
+    """
+
+    def __init__(self, endpoint: str,
+                 high_water_mark: int = DEFAULT_HIGH_WATER_MARK,
+                 policy: str = 'block') -> None:
         """
         Constructor.
 
         Arguments
         ---------
-        port : str
-            TCP port number to be used for the stream. This should equal the
-            `port` attribute of the corresponding `ZmqStreamReader`.
+        endpoint : str
+            ZMQ endpoint to be used for the stream. This should equal the
+            `endpoint` attribute of the corresponding `ZmqStreamReader`. For
+            backward compatibility, a TCP port number on localhost is also
+            accepted.
+        high_water_mark : int
+            Maximum number of objects waiting to be sent. If zero, the number
+            is not limited.
+        policy : str
+            What to do if the maximum number of objects is reached: either
+            `'block'` (wait) or `'drop'` (discard new objects).
         """
+        if str(endpoint).isdigit():
+            endpoint = 'tcp://localhost:{}'.format(endpoint)
         context = zmq.Context()
         self.socket = context.socket(zmq.PAIR)
-        self.socket.connect('tcp://localhost:{}'.format(port))
+        self.socket.connect(endpoint)
+        self.start_thread(high_water_mark, policy)
+
+    def start_thread(self, high_water_mark: int, policy: str) -> None:
+        """Create queue and start background thread which empties it."""
+        if policy not in ('block', 'drop'):
+            raise ValueError('Unknown policy: {}'.format(policy))
+        self.encoder = EventEncoder()
+        self.policy = policy
+        self.dropped = 0
+        self.queue: queue.Queue = queue.Queue(high_water_mark)
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
 
     def write(self, obj: object) -> None:
         """Write arbitrary Python object to stream."""
-        self.socket.send_pyobj(obj)
+        if self.policy == 'block':
+            self.queue.put(obj)
+            return
+        try:
+            self.queue.put_nowait(obj)
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self) -> None:
+        """Handle items in queue until stream is closed."""
+        while True:
+            item = self.queue.get()
+            if item is _CLOSE:
+                break
+            self.handle(item)
+
+    def handle(self, item: object) -> None:
+        """Encode and send item taken from queue."""
+        self.send(self.encoder.encode(item))
+
+    def send(self, frame: bytes) -> None:
+        """Send encoded object over the socket."""
+        self.socket.send(frame)
 
     def close(self) -> None:
-        """Close stream."""
+        """
+        Send all objects in the queue and close stream.
+
+        Do nothing if the stream is already closed.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        self.queue.put(_CLOSE)
+        self.thread.join()
+        self.close_destination()
+
+    def close_destination(self) -> None:
+        """Close socket after all objects are sent."""
         self.socket.close()
 
 
-class FileStub(ZmqStreamWriter):
-    """Stub for ZmqStreamWriter which instead writes to a file."""
+class EventRecorder(ZmqStreamWriter):
+    """
+    Writer which records the stream in an event log instead of sending it.
+
+    Objects are encoded exactly as they would be sent over the ZMQ stream
+    and appended to a binary file, together with the time at which they were
+    written; see EVENT_LOG_MAGIC for the format. The event log can be read
+    back and replayed with the `eventlog` module in the backend.
+    """
 
-    def __init__(self, filename: str) -> None:
-        """Constructor; connect to specified filename."""
-        self.file = open(filename, 'w')
+    def __init__(self, filename: str,
+                 high_water_mark: int = DEFAULT_HIGH_WATER_MARK,
+                 policy: str = 'block') -> None:
+        """Constructor; create event log with specified filename."""
+        self.file = open(filename, 'wb')
+        self.file.write(EVENT_LOG_MAGIC + bytes([EVENT_LOG_VERSION]))
+        self.start_time = time.monotonic()
+        self.start_thread(high_water_mark, policy)
 
     def write(self, obj: object) -> None:
-        """Write Python object to file."""
-        self.file.write(str(obj) + '\n')
+        """Record Python object, together with current time."""
+        super().write((time.monotonic() - self.start_time, obj))
 
-    def close(self) -> None:
-        """Close file."""
+    def handle(self, item: object) -> None:
+        """Encode item taken from queue and append it to event log."""
+        timestamp, obj = item
+        frame = self.encoder.encode(obj)
+        self.file.write(EVENT_LOG_RECORD_HEADER.pack(timestamp, len(frame)))
+        self.file.write(frame)
+
+    def close_destination(self) -> None:
+        """Close event log after all objects are recorded."""
         self.file.close()
 
 
+def format_destination(destination: str,
+                       high_water_mark: Optional[int] = None,
+                       policy: Optional[str] = None) -> str:
+    """
+    Add options of writer to destination passed to worker process.
+
+    The options are appended as `?hwm=<high_water_mark>&policy=<policy>`;
+    see `parse_destination()`. Options which are None are left out.
+    """
+    options = []
+    if high_water_mark is not None:
+        options.append('hwm={}'.format(high_water_mark))
+    if policy is not None:
+        options.append('policy={}'.format(policy))
+    if not options:
+        return destination
+    return destination + '?' + '&'.join(options)
+
+
+def parse_destination(destination: str) -> tuple[str, int, str]:
+    """
+    Split destination passed to worker process into destination and options.
+
+    Return the destination without options, the high water mark and the
+    policy of the writer; see `format_destination()`.
+
+    Raises
+    ------
+    ValueError
+        If an option is unknown or has an invalid value.
+    """
+    high_water_mark = DEFAULT_HIGH_WATER_MARK
+    policy = 'block'
+    destination, sep, options = destination.partition('?')
+    for option in options.split('&') if sep else []:
+        name, __, value = option.partition('=')
+        if name == 'hwm':
+            high_water_mark = int(value)
+        elif name == 'policy':
+            policy = value
+        else:
+            raise ValueError('Unknown writer option: {}'.format(option))
+    return destination, high_water_mark, policy
+
+
+def create_writer(destination: str,
+                  default_filename: str) -> ZmqStreamWriter:
+    """
+    Create writer for worker process.
+
+    Arguments
+    ---------
+    destination : str
+        Either a ZMQ endpoint, or `'file'` to record the stream in an event
+        log with the default filename, or `'file:<filename>'` to record the
+        stream in an event log with the given filename. This may be followed
+        by options for the writer; see `format_destination()`.
+    default_filename : str
+        Filename of event log if destination is `'file'`.
+    """
+    destination, high_water_mark, policy = parse_destination(destination)
+    if destination == 'file':
+        return EventRecorder(default_filename, high_water_mark, policy)
+    if destination.startswith('file:'):
+        return EventRecorder(destination[len('file:'):], high_water_mark,
+                             policy)
+    return ZmqStreamWriter(destination, high_water_mark, policy)
+
+
+def read_arguments(stdin):
+    """
+    Read arguments for a test run from the test runner.
+
+    Workers which are started before the test run is requested (in daemon or
+    standby mode) receive their arguments as a line on `stdin` containing
+    `{"args": [...]}` in JSON format. Return the list of arguments, or None
+    if `stdin` is closed.
+    """
+    line = stdin.readline()
+    if not line:
+        return None
+    return json.loads(line)['args']
+
+
+def read_selection(filename):
+    """
+    Read names of tests selected to be run from file.
+
+    The test runner writes the names of the selected tests to a file, one
+    name per line, if there are too many to pass them on the command line.
+    """
+    with open(filename, encoding='utf-8') as file:
+        return file.read().splitlines()
+
+
 if __name__ == '__main__':
-    # Usage: python zmqwriter.py <port>
-    # Construct a ZMQ stream on the given port number and send the number 42
+    # Usage: python zmqwriter.py <endpoint>
+    # Construct a ZMQ stream on the given endpoint and send the number 42
     # over the stream (for testing)
     worker = ZmqStreamWriter(sys.argv[1])
     worker.write(42)
+    worker.close()
@@ -7,66 +7,235 @@
 Reader for sending stream of python objects over a ZMQ socket.
 
 The intended usage is that you construct a ZmqStreamReader in one process
-and a ZmqStreamWriter (with the same port number as the reader) in a worker
+and a ZmqStreamWriter (with the same endpoint as the reader) in a worker
 process. The worker process can then use the stream to send its result to the
 reader.
 """
 
+# Standard library imports
+import logging
+import os.path as osp
+import pickle
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, Optional
+
 # Third party imports
-from qtpy.QtCore import QObject, QProcess, QSocketNotifier, Signal
+from qtpy.QtCore import QObject, QProcess, Qt, Signal
 from qtpy.QtWidgets import QApplication
 import zmq
 
+# Local imports
+from spyder_unittest.backend.workers.zmqwriter import (
+    EVENT_NAMES, FIELD_NAMES, INTERNED_FIELDS, KIND_EVENT,
+    WIRE_FORMAT_VERSION)
+
+# Logging
+logger = logging.getLogger(__name__)
+
+
+class EventDecoder:
+    """
+    Decoder for objects sent over a ZMQ stream.
+
+    This decodes objects encoded by `EventEncoder`; see the docstring of that
+    class for a description of the format. Since test identifiers are only
+    sent in full the first time, the same decoder should be used for all
+    objects sent by one encoder.
+    """
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.interned: list[str] = []
+        self.interned_codes = {FIELD_NAMES.index(name)
+                               for name in INTERNED_FIELDS}
+
+    def unintern(self, value):
+        """Return string for integer, or register string sent in full."""
+        if isinstance(value, int):
+            return self.interned[value]
+        self.interned.append(value)
+        return value
+
+    def decode(self, frame: bytes) -> object:
+        """
+        Decode Python object.
+
+        Raises
+        ------
+        ValueError
+            If the object is encoded in an unsupported version of the format.
+        """
+        if frame[0] != WIRE_FORMAT_VERSION:
+            raise ValueError(f'Unsupported wire format version {frame[0]}')
+        payload = pickle.loads(memoryview(frame)[2:])
+        if frame[1] != KIND_EVENT:
+            return payload
+        event = payload[0]
+        result = {'event': EVENT_NAMES[event] if isinstance(event, int)
+                  else event}
+        for i in range(1, len(payload), 2):
+            key = payload[i]
+            value = payload[i + 1]
+            if isinstance(key, int):
+                if key in self.interned_codes:
+                    if isinstance(value, list):
+                        value = [self.unintern(item) for item in value]
+                    else:
+                        value = self.unintern(value)
+                key = FIELD_NAMES[key]
+            result[key] = value
+        return result
+
 
 class ZmqStreamReader(QObject):
     """
     Reader for receiving stream of Python objects via a ZMQ stream.
 
+    On Linux, the stream uses a Unix domain socket (ZMQ's ipc transport) in
+    a temporary directory which is removed when the stream is closed. On other
+    platforms, or if that fails, the stream uses a TCP socket which only
+    listens on the loopback interface.
+
+    Messages are received and decoded in a background thread, so that a heavy
+    stream of messages does not block the GUI. If a `transform` function is
+    given, then it is also called in the background thread, with the list of
+    decoded objects as argument. The result is passed to the GUI thread, which
+    emits it in `sig_received`. Thus, `transform` should not touch any GUI
+    objects.
+
     Attributes
     ----------
-    port : int
-        TCP port number used for the stream.
+    endpoint : str
+        ZMQ endpoint used for the stream, for instance `ipc:///tmp/xxx/stream`
+        or `tcp://127.0.0.1:12345`. This should be passed to the writer.
+    tempdir : str or None
+        Temporary directory containing the socket for the ipc transport, or
+        None if the tcp transport is used.
 
     Signals
     -------
-    sig_received(list)
+    sig_received(object)
         Emitted when objects are received; argument is list of received
-        objects.
+        objects, or the result of applying `transform` to that list.
     """
 
     sig_received = Signal(object)
 
-    def __init__(self) -> None:
-        """Constructor; also constructs ZMQ stream."""
+    # Emitted in the background thread when data is available
+    _sig_ready = Signal()
+
+    # Time in ms that background thread waits for messages before checking
+    # whether it should stop
+    POLL_TIMEOUT = 50
+
+    def __init__(self, use_ipc: Optional[bool] = None,
+                 transform: Optional[Callable[[list], Any]] = None) -> None:
+        """
+        Constructor; also constructs ZMQ stream and starts background thread.
+
+        Parameters
+        ----------
+        use_ipc
+            Whether to try the ipc transport. If None, try it only on Linux.
+        transform
+            Function applied in the background thread to every list of
+            received objects. If None, the list is emitted as is.
+        """
         super().__init__()
         self.context = zmq.Context()
         self.socket = self.context.socket(zmq.PAIR)
-        self.port = self.socket.bind_to_random_port('tcp://*')
-        fid = self.socket.getsockopt(zmq.FD)
-        self.notifier = QSocketNotifier(fid, QSocketNotifier.Read, self)
-        self.notifier.activated.connect(self.received_message)
-
-    def received_message(self) -> None:
-        """Called when a message is received."""
-        self.notifier.setEnabled(False)
+        self.tempdir: Optional[str] = None
+        if use_ipc is None:
+            use_ipc = sys.platform.startswith('linux')
+        self.endpoint = self.bind(use_ipc and zmq.has('ipc'))
+        self.decoder = EventDecoder()
+        self.transform = transform
+        self.received: queue.SimpleQueue = queue.SimpleQueue()
+        self._sig_ready.connect(self.deliver, Qt.QueuedConnection)
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def bind(self, use_ipc: bool) -> str:
+        """Bind socket and return endpoint, falling back to tcp if needed."""
+        if use_ipc:
+            self.tempdir = tempfile.mkdtemp(prefix='spyder-unittest-')
+            endpoint = 'ipc://' + osp.join(self.tempdir, 'stream')
+            try:
+                self.socket.bind(endpoint)
+                return endpoint
+            except zmq.ZMQError as err:
+                logger.debug(f'Cannot bind to {endpoint}, using tcp: {err}')
+                self.remove_tempdir()
+        port = self.socket.bind_to_random_port('tcp://127.0.0.1')
+        return f'tcp://127.0.0.1:{port}'
+
+    def remove_tempdir(self) -> None:
+        """Remove temporary directory for ipc socket, if any."""
+        if self.tempdir:
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+            self.tempdir = None
+
+    def run(self) -> None:
+        """Receive messages until asked to stop; run in background thread."""
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        while not self._stop.is_set():
+            if poller.poll(self.POLL_TIMEOUT):
+                self.receive_messages()
+        self.receive_messages()  # Flush remaining messages
+
+    def receive_messages(self) -> None:
+        """
+        Read, decode and transform all available messages.
+
+        This is run in the background thread. The result is put in the
+        `received` queue and the GUI thread is notified.
+        """
         messages = []
         try:
             while 1:
-                message = self.socket.recv_pyobj(flags=zmq.NOBLOCK)
-                messages.append(message)
+                frame = self.socket.recv(flags=zmq.NOBLOCK)
+                try:
+                    messages.append(self.decoder.decode(frame))
+                except ValueError as err:
+                    logger.warning(f'Ignoring message: {err}')
         except zmq.ZMQError:
             pass
-        finally:
-            self.notifier.setEnabled(True)
-        if messages:
-            self.sig_received.emit(messages)
+        if not messages:
+            return
+        if self.transform:
+            try:
+                result = self.transform(messages)
+            except Exception:
+                logger.exception('Error when processing messages')
+                return
+        else:
+            result = messages
+        self.received.put(result)
+        self._sig_ready.emit()
+
+    def deliver(self) -> None:
+        """Emit all results received from background thread."""
+        while 1:
+            try:
+                result = self.received.get_nowait()
+            except queue.Empty:
+                return
+            self.sig_received.emit(result)
 
     def close(self) -> None:
         """Read any remaining messages and close stream."""
-        self.received_message()  # Flush remaining messages
-        self.notifier.setEnabled(False)
+        self._stop.set()
+        self.thread.join()
+        self.deliver()
         self.socket.close()
         self.context.destroy()
+        self.remove_tempdir()
 
 
 if __name__ == '__main__':
@@ -76,7 +245,6 @@ if __name__ == '__main__':
     # sends over the ZMQ stream.
 
     import os.path
-    import sys
 
     app = QApplication(sys.argv)
     manager = ZmqStreamReader()
@@ -84,6 +252,6 @@ if __name__ == '__main__':
     process = QProcess()
     dirname = os.path.dirname(sys.argv[0])
     writer_name = os.path.join(dirname, 'workers', 'zmqwriter.py')
-    process.start('python', [writer_name, str(manager.port)])
+    process.start('python', [writer_name, manager.endpoint])
     process.finished.connect(app.quit)
     sys.exit(app.exec_())
@@ -50,14 +50,22 @@ class UnitTestPlugin(SpyderDockablePlugin):
                        'wdir': '',
                        'coverage': False,
                        'args': [],
-                       'abbrev_test_names': False}),
+                       'workers': 0,
+                       'abbrev_test_names': False,
+                       'update_interval': 50,
+                       'daemon_mode': False,
+                       'reorder_tests': False,
+                       'show_coverage_in_editor': True,
+                       'writer_high_water_mark': 10000,
+                       'writer_policy': 'block'}),
                      ('shortcuts',
                       {'unittest/Run tests': 'Alt+Shift+F11'})]
     CONF_NAMEMAP = {CONF_SECTION:
                     [(CONF_SECTION,
-                      ['framework', 'wdir', 'coverage', 'args'])]}
+                      ['framework', 'wdir', 'coverage', 'args',
+                       'workers'])]}
     CONF_FILE = True
-    CONF_VERSION = '0.2.0'
+    CONF_VERSION = '0.7.0'
     CONF_WIDGET_CLASS = UnitTestConfigPage
 
     # --- Mandatory SpyderDockablePlugin methods ------------------------------
@@ -113,6 +121,11 @@ class UnitTestPlugin(SpyderDockablePlugin):
             context=Qt.ApplicationShortcut,
             register_shortcut=True)
 
+    def on_close(self, cancelable=False):
+        """Stop test processes waiting for test runs when closing Spyder."""
+        self.get_widget().stop_daemon()
+        self.get_widget().stop_standby()
+
     # ----- Set up interactions with other plugins ----------------------------
 
     @on_plugin_available(plugin=Plugins.Editor)
@@ -123,6 +136,7 @@ class UnitTestPlugin(SpyderDockablePlugin):
         Add 'Run unit tests' to context menu in editor for Python files.
         Save all files in editor before running tests.
         Go to test definition in editor on double click in unit test plugin.
+        Mark lines not covered by tests in the editor.
         """
         editor = self.get_plugin(Plugins.Editor)
         run_action = self.get_action(UnitTestPluginActions.Run)
@@ -131,6 +145,14 @@ class UnitTestPlugin(SpyderDockablePlugin):
         self.get_widget().pre_test_hook = editor.get_widget().save_all
         self.get_widget().sig_edit_goto.connect(self.goto_in_editor)
 
+        overlay = self.get_widget().coverage_overlay
+        editor.sig_codeeditor_created.connect(overlay.add_editor)
+        editor.sig_codeeditor_deleted.connect(overlay.remove_editor)
+        for filename in editor.get_filenames():
+            codeeditor = editor.get_codeeditor_for_filename(filename)
+            if codeeditor is not None:
+                overlay.add_editor(codeeditor)
+
     @on_plugin_teardown(plugin=Plugins.Editor)
     def on_editor_teardown(self):
         """
@@ -139,6 +161,14 @@ class UnitTestPlugin(SpyderDockablePlugin):
         self.get_widget().pre_test_hook = None
         self.get_widget().sig_edit_goto.disconnect(self.goto_in_editor)
 
+        editor = self.get_plugin(Plugins.Editor)
+        overlay = self.get_widget().coverage_overlay
+        editor.sig_codeeditor_created.disconnect(overlay.add_editor)
+        editor.sig_codeeditor_deleted.disconnect(overlay.remove_editor)
+        overlay.set_index(None)
+        for codeeditor in list(overlay.editors):
+            overlay.remove_editor(codeeditor)
+
     @on_plugin_available(plugin=Plugins.MainMenu)
     def on_main_menu_available(self):
         """
@@ -321,10 +351,12 @@ class UnitTestPlugin(SpyderDockablePlugin):
             framework=project.get_option('framework', self.CONF_SECTION),
             wdir=project.get_option('wdir', self.CONF_SECTION),
             coverage=project.get_option('coverage', self.CONF_SECTION),
-            args=project.get_option('args', self.CONF_SECTION))
+            args=project.get_option('args', self.CONF_SECTION),
+            workers=project.get_option('workers', self.CONF_SECTION))
         if not widget.config_is_valid(new_config):
             new_config = None
         widget.set_config_without_emit(new_config)
+        widget.show_cached_tests()
 
     def save_config(self, test_config):
         """
@@ -343,6 +375,7 @@ class UnitTestPlugin(SpyderDockablePlugin):
         project.set_option('wdir', test_config.wdir, self.CONF_SECTION)
         project.set_option('coverage', test_config.coverage, self.CONF_SECTION)
         project.set_option('args', test_config.args, self.CONF_SECTION)
+        project.set_option('workers', test_config.workers, self.CONF_SECTION)
 
     def goto_in_editor(self, filename, lineno):
         """
@@ -22,7 +22,8 @@ from qtpy.compat import getexistingdirectory
 from qtpy.QtCore import Slot
 from qtpy.QtWidgets import (
     QApplication, QComboBox, QDialog, QDialogButtonBox, QGridLayout,
-    QHBoxLayout, QLabel, QLineEdit, QPushButton, QVBoxLayout, QCheckBox)
+    QHBoxLayout, QLabel, QLineEdit, QPushButton, QSpinBox, QVBoxLayout,
+    QCheckBox)
 from spyder.config.base import get_translation
 from spyder.utils import icon_manager as ima
 
@@ -38,6 +39,7 @@ class Config(NamedTuple):
     wdir: str = ''
     coverage: bool = False
     args: list[str] = []
+    workers: int = 0
 
 
 class ConfigDialog(QDialog):
@@ -58,6 +60,9 @@ class ConfigDialog(QDialog):
     # Extra vertical space added between elements in the dialog
     EXTRA_SPACE = 10
 
+    # Maximum number of parallel workers that can be selected
+    MAX_WORKERS = 256
+
     def __init__(self, frameworks, config, versions, parent=None):
         """
         Construct a dialog window.
@@ -116,7 +121,8 @@ class ConfigDialog(QDialog):
         # Checkbox for enabling coverage report
 
         coverage_label = _('Include coverage report in output')
-        coverage_toolTip = _('Works only for pytest, requires pytest-cov')
+        coverage_toolTip = _('Requires pytest-cov for pytest and coverage '
+                             'for other frameworks')
         coverage_layout = QHBoxLayout()
         self.coverage_checkbox = QCheckBox(coverage_label, self)
         self.coverage_checkbox.setToolTip(coverage_toolTip)
@@ -124,6 +130,23 @@ class ConfigDialog(QDialog):
         coverage_layout.addWidget(self.coverage_checkbox)
         layout.addLayout(coverage_layout)
 
+        # Spin box for number of parallel workers
+
+        workers_label = QLabel(_('Number of parallel workers:'))
+        workers_toolTip = _('Run tests in several processes at the same '
+                            'time; 0 means run all tests in one process. '
+                            'Works only for pytest and unittest; pytest '
+                            'requires pytest-xdist')
+        workers_layout = QHBoxLayout()
+        workers_layout.addWidget(workers_label)
+        self.workers_spinbox = QSpinBox(self)
+        self.workers_spinbox.setRange(0, self.MAX_WORKERS)
+        self.workers_spinbox.setToolTip(workers_toolTip)
+        self.workers_spinbox.setEnabled(False)
+        workers_layout.addWidget(self.workers_spinbox)
+        workers_layout.addStretch()
+        layout.addLayout(workers_layout)
+
         layout.addSpacing(self.EXTRA_SPACE)
 
         # Line edit field for selecting directory
@@ -163,6 +186,8 @@ class ConfigDialog(QDialog):
                 self.framework_combobox.setCurrentIndex(index)
         self.coverage_checkbox.setChecked(config.coverage)
         self.enable_coverage_checkbox_if_available()
+        self.workers_spinbox.setValue(config.workers)
+        self.enable_workers_spinbox_if_available()
         self.args_lineedit.setText(shlex.join(config.args))
         self.wdir_lineedit.setText(config.wdir)
 
@@ -172,22 +197,43 @@ class ConfigDialog(QDialog):
         if index != -1:
             self.ok_button.setEnabled(True)
             self.enable_coverage_checkbox_if_available()
+            self.enable_workers_spinbox_if_available()
 
     def enable_coverage_checkbox_if_available(self):
         """
         Enable coverage checkbox only if coverage is available.
 
-        Coverage is only implemented for pytest and requires pytest_cov.
-        Enable the coverage checkbox if these conditions are satisfied,
-        otherwise, disable and un-check the checkbox.
+        Coverage requires pytest-cov for pytest and coverage.py for the other
+        frameworks. Enable the coverage checkbox if the required plugin is
+        installed, otherwise, disable and un-check the checkbox.
         """
-        if (str(self.framework_combobox.currentText()) != 'pytest'
-                or 'pytest-cov' not in self.versions['pytest']['plugins']):
+        framework = str(self.framework_combobox.currentText())
+        required = 'pytest-cov' if framework == 'pytest' else 'coverage'
+        plugins = self.versions.get(framework, {}).get('plugins', {})
+        if required not in plugins:
             self.coverage_checkbox.setEnabled(False)
             self.coverage_checkbox.setChecked(False)
         else:
             self.coverage_checkbox.setEnabled(True)
 
+    def enable_workers_spinbox_if_available(self):
+        """
+        Enable spin box for parallel workers only if they are available.
+
+        Parallel workers are only implemented for unittest and for pytest,
+        where they require pytest-xdist. Enable the spin box if these
+        conditions are satisfied, otherwise, disable the spin box and set it
+        to zero.
+        """
+        framework = str(self.framework_combobox.currentText())
+        if framework == 'unittest' or (
+                framework == 'pytest'
+                and 'pytest-xdist' in self.versions['pytest']['plugins']):
+            self.workers_spinbox.setEnabled(True)
+        else:
+            self.workers_spinbox.setEnabled(False)
+            self.workers_spinbox.setValue(0)
+
     def select_directory(self):
         """Display dialog for user to select working directory."""
         basedir = self.wdir_lineedit.text()
@@ -215,7 +261,8 @@ class ConfigDialog(QDialog):
         args = shlex.split(args)
 
         return Config(framework=framework, wdir=self.wdir_lineedit.text(),
-                      coverage=self.coverage_checkbox.isChecked(), args=args)
+                      coverage=self.coverage_checkbox.isChecked(), args=args,
+                      workers=self.workers_spinbox.value())
 
 
 def ask_for_config(frameworks, config, versions, parent=None):
@@ -240,7 +287,8 @@ if __name__ == '__main__':
     versions = {
         'nose2': {'available': False},
         'unittest': {'available': True},
-        'pytest': {'available': True, 'plugins': {'pytest-cov', '3.1.4'}}
+        'pytest': {'available': True,
+                   'plugins': {'pytest-cov': '3.1.4', 'pytest-xdist': '3.2.1'}}
     }
     config = Config(wdir=getcwd())
     print(ask_for_config(frameworks, config, versions))
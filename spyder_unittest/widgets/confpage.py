@@ -28,8 +28,63 @@ class UnitTestConfigPage(PluginConfigPage):
             _('Abbreviate test names'), 'abbrev_test_names', default=False)
         self.abbrev_box = widget.checkbox
 
+        self.interval_widget = self.create_spinbox(
+            _('Interval between updates of the results:'), _('ms'),
+            'update_interval', default=50, min_=0, max_=1000, step=10,
+            tip=_('Changes to the results while tests are running are shown '
+                  'together after this interval; use 0 to show every change '
+                  'immediately'))
+
+        widget = self.create_checkbox(
+            _('Keep pytest process running between test runs'),
+            'daemon_mode', default=False,
+            tip=_('Tests run faster after the first run, because pytest '
+                  'and the modules of your project are already imported. '
+                  'Test modules that you change are imported again; if you '
+                  'change other modules, the process is restarted. Not used '
+                  'when collecting coverage.'))
+        self.daemon_box = widget.checkbox
+
+        widget = self.create_checkbox(
+            _('Run tests that failed last time and slow tests first'),
+            'reorder_tests', default=False,
+            tip=_('Failures are shown sooner, and tests run in parallel '
+                  'finish sooner. Tests are reordered per module, or per '
+                  'class for unittest, based on the durations and outcomes '
+                  'of earlier runs. Only for pytest and unittest.'))
+        self.reorder_box = widget.checkbox
+
+        widget = self.create_checkbox(
+            _('Mark lines not covered by tests in the editor'),
+            'show_coverage_in_editor', default=True,
+            tip=_('Uses the coverage recorded in the last test run with '
+                  'coverage. Files changed since then are not marked.'))
+        self.coverage_box = widget.checkbox
+
+        self.high_water_mark_widget = self.create_spinbox(
+            _('Maximum number of results waiting to be sent:'), '',
+            'writer_high_water_mark', default=10000, min_=0, max_=1000000,
+            step=1000,
+            tip=_('Results are sent by the test process in the background, '
+                  'so that the tests are not slowed down; use 0 for no '
+                  'limit'))
+
+        self.policy_widget = self.create_combobox(
+            _('When this maximum is reached:'),
+            [(_('Wait until results are sent'), 'block'),
+             (_('Discard new results'), 'drop')],
+            'writer_policy', default='block',
+            tip=_('Discarding results keeps the tests fast if there are '
+                  'many results, but some results are then not shown'))
+
         settings_layout = QVBoxLayout()
         settings_layout.addWidget(self.abbrev_box)
+        settings_layout.addWidget(self.interval_widget)
+        settings_layout.addWidget(self.daemon_box)
+        settings_layout.addWidget(self.reorder_box)
+        settings_layout.addWidget(self.coverage_box)
+        settings_layout.addWidget(self.high_water_mark_widget)
+        settings_layout.addWidget(self.policy_widget)
         settings_group.setLayout(settings_layout)
 
         vlayout = QVBoxLayout()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Marks for lines not covered by tests in the editor."""
+
+# Third party imports
+from qtpy.QtCore import QObject
+from qtpy.QtGui import QColor
+from spyder.config.base import get_translation
+from spyder.plugins.editor.api.decoration import TextDecoration
+from spyder.utils.palette import SpyderPalette
+
+try:
+    _ = get_translation('spyder_unittest')
+except KeyError:
+    import gettext
+    _ = gettext.gettext
+
+# Key under which the marks are stored in the decorations of the editor
+DECORATION_KEY = 'unittest_coverage'
+
+
+class CoverageOverlay(QObject):
+    """
+    Mark lines not covered by tests in code editors.
+
+    Only the lines around the visible part of every editor are marked, and
+    the marks are updated when the editor scrolls, so the cost does not
+    depend on the size of the file. Files which are changed after the
+    coverage was recorded, either on disk or in the editor, are not marked,
+    because the line numbers may be wrong. Whether the file on disk is
+    changed is checked when the editor is added and when it is saved.
+
+    Attributes
+    ----------
+    index : CoverageIndex or None
+        Index of the lines to be marked, or None if no lines are marked.
+    editors : list of CodeEditor
+        Editors in which lines are marked.
+    """
+
+    def __init__(self, parent=None):
+        """Constructor."""
+        super().__init__(parent)
+        self.index = None
+        self.editors = []
+        self.color = QColor(SpyderPalette.COLOR_ERROR_1)
+        self.color.setAlpha(60)
+
+    def set_index(self, index):
+        """Set index of lines to be marked and update all editors."""
+        self.index = index
+        for editor in self.editors:
+            self.update_editor(editor)
+
+    def add_editor(self, editor):
+        """Start marking lines in given editor."""
+        if editor in self.editors:
+            return
+        self.editors.append(editor)
+        editor.verticalScrollBar().valueChanged.connect(
+            lambda value: self.update_editor(editor))
+        editor.document().modificationChanged.connect(
+            lambda changed: self.modification_changed(editor, changed))
+        self.check_file(editor)
+        self.update_editor(editor)
+
+    def remove_editor(self, editor):
+        """Stop marking lines in given editor."""
+        if editor in self.editors:
+            self.editors.remove(editor)
+
+    def check_file(self, editor):
+        """Check whether file in editor was changed on disk."""
+        filename = getattr(editor, 'filename', None)
+        if self.index is not None and filename:
+            self.index.check(filename)
+
+    def modification_changed(self, editor, changed):
+        """Update marks when editor is modified or saved."""
+        if not changed:
+            self.check_file(editor)
+        self.update_editor(editor)
+
+    def update_editor(self, editor):
+        """Mark uncovered lines around the visible part of given editor."""
+        if editor not in self.editors:
+            return
+        lines = None
+        filename = getattr(editor, 'filename', None)
+        if (self.index is not None and filename
+                and not editor.document().isModified()):
+            lines = self.index.lookup(filename)
+        if lines is None or not lines.missing:
+            editor.decorations.remove_key(DECORATION_KEY)
+            return
+        first, last = editor.get_buffer_block_numbers()
+        document = editor.document()
+        decorations = []
+        for start, end in lines.missing.ranges_between(first + 1, last + 1):
+            for lineno in range(start, end + 1):
+                block = document.findBlockByNumber(lineno - 1)
+                if not block.isValid():
+                    break
+                decoration = TextDecoration(
+                    block, tooltip=_('Not covered by tests'))
+                decoration.set_full_width()
+                decoration.set_background(self.color)
+                decorations.append(decoration)
+        editor.decorations.add_key(DECORATION_KEY, decorations)
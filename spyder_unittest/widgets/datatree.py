@@ -7,13 +7,14 @@
 
 # Standard library imports
 from collections import Counter
+import math
 from operator import attrgetter
 
 # Third party imports
 from qtpy import PYQT4
-from qtpy.QtCore import QAbstractItemModel, QModelIndex, Qt, Signal
+from qtpy.QtCore import QAbstractItemModel, QModelIndex, Qt, QTimer, Signal
 from qtpy.QtGui import QBrush, QColor, QFont
-from qtpy.QtWidgets import QMenu, QTreeView
+from qtpy.QtWidgets import QAbstractItemView, QMenu, QTreeView
 from spyder.api.config.mixins import SpyderConfigurationAccessor
 from spyder.config.base import get_translation
 from spyder.utils.palette import SpyderPalette
@@ -21,7 +22,7 @@ from spyder.utils.qthelpers import create_action
 
 # Local imports
 from spyder_unittest.backend.abbreviator import Abbreviator
-from spyder_unittest.backend.runnerbase import Category
+from spyder_unittest.backend.runnerbase import Category, COV_TEST_NAME
 
 try:
     _ = get_translation('spyder_unittest')
@@ -47,26 +48,61 @@ HEADERS = [_('Status'), _('Name'), _('Message'), _('Time (ms)')]
 TOPLEVEL_ID = 2 ** 32 - 1
 
 
+def is_runnable(testresult):
+    """
+    Return whether test result is for a test which can be run by name.
+
+    Coverage results and collection errors are not, because they are named
+    after files or modules instead of tests.
+    """
+    return (testresult.category != Category.COVERAGE
+            and not testresult.collection_error)
+
+
 class TestDataView(QTreeView):
     """
     Tree widget displaying test results.
 
+    Columns are resized to fit their contents, but this is expensive if the
+    model contains many test results. Therefore, columns are not resized
+    immediately when the model changes but only after a short delay, so that
+    many changes are handled together. Furthermore, the column widths are
+    estimated from a sample of the rows: the first and last rows in the model
+    and some of the rows that changed since the last resize. While the model
+    is changing, columns are only made wider, not narrower. If the model
+    contains more than `fixed_width_threshold` rows, then columns are only
+    resized when the model is reset.
+
     Signals
     -------
     sig_edit_goto(str, int): Emitted if editor should go to some position.
         Arguments are file name and line number (zero-based).
-    sig_single_test_run_requested(str): Emitted to request a single test
-        to be run. Argument is the name of the test.
+    sig_tests_run_requested(list of str): Emitted to request that some
+        tests are run. Argument contains the names of the tests.
     """
 
     sig_edit_goto = Signal(str, int)
-    sig_single_test_run_requested = Signal(str)
+    sig_tests_run_requested = Signal(object)
 
     __test__ = False  # this is not a pytest test class
 
-    def __init__(self, parent=None):
+    # Delay (in ms) between a change in the model and resizing the columns
+    RESIZE_DELAY = 100
+
+    # Number of rows to sample at the start and the end of the model, and
+    # among the changed rows, when estimating the widths of the columns
+    RESIZE_SAMPLE_SIZE = 50
+
+    def __init__(self, parent=None, fixed_width_threshold=10000):
         """Constructor."""
         QTreeView.__init__(self, parent)
+        self.fixed_width_threshold = fixed_width_threshold
+        self._changed_ranges = []
+        self._full_resize = False
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(self.RESIZE_DELAY)
+        self._resize_timer.timeout.connect(self.resizeColumns)
         self.header().setDefaultAlignment(Qt.AlignCenter)
         self.setItemsExpandable(True)
         self.setSortingEnabled(True)
@@ -75,6 +111,7 @@ class TestDataView(QTreeView):
         self.header().sortIndicatorChanged.connect(
                 lambda col, order: self.header().setSortIndicatorShown(True))
         self.setExpandsOnDoubleClick(False)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.doubleClicked.connect(self.go_to_test_definition)
 
     def reset(self):
@@ -84,13 +121,16 @@ class TestDataView(QTreeView):
         This function is called whenever the model data changes drastically.
         """
         QTreeView.reset(self)
-        self.resizeColumns()
+        self._changed_ranges = []
+        self._full_resize = True
+        self._resize_timer.start()
         self.spanFirstColumn(0, self.model().rowCount() - 1)
 
     def rowsInserted(self, parent, firstRow, lastRow):
         """Called when rows are inserted."""
         QTreeView.rowsInserted(self, parent, firstRow, lastRow)
-        self.resizeColumns()
+        if not parent.isValid():
+            self.schedule_resize(firstRow, lastRow)
         self.spanFirstColumn(firstRow, lastRow)
 
     def dataChanged(self, topLeft, bottomRight, roles=[]):
@@ -99,11 +139,11 @@ class TestDataView(QTreeView):
             QTreeView.dataChanged(self, topLeft, bottomRight)
         else:
             QTreeView.dataChanged(self, topLeft, bottomRight, roles)
-        self.resizeColumns()
         while topLeft.parent().isValid():
             topLeft = topLeft.parent()
         while bottomRight.parent().isValid():
             bottomRight = bottomRight.parent()
+        self.schedule_resize(topLeft.row(), bottomRight.row())
         self.spanFirstColumn(topLeft.row(), bottomRight.row())
 
     def contextMenuEvent(self, event):
@@ -124,12 +164,28 @@ class TestDataView(QTreeView):
                 lineno = 0
             self.sig_edit_goto.emit(filename, lineno)
 
-    def run_single_test(self, index):
-        """Ask plugin to run only the test corresponding to index."""
+    def tests_to_run(self, index):
+        """
+        Return names of tests to run from the context menu at index.
+
+        If the test corresponding to index is selected, then these are all
+        selected tests; otherwise, this is only the test corresponding to
+        index. Coverage results and collection errors are left out; see
+        `is_runnable()`.
+        """
         index = self.make_index_canonical(index)
-        testresult = self.model().testresults[index.row()]
-        testname = testresult.name
-        self.sig_single_test_run_requested.emit(testname)
+        if self.selectionModel().isRowSelected(index.row(), QModelIndex()):
+            rows = sorted({self.make_index_canonical(selected).row()
+                           for selected in self.selectedIndexes()})
+        else:
+            rows = [index.row()]
+        testresults = self.model().testresults
+        return [testresults[row].name for row in rows
+                if is_runnable(testresults[row])]
+
+    def run_tests(self, index):
+        """Ask plugin to run the tests returned by `tests_to_run(index)`."""
+        self.sig_tests_run_requested.emit(self.tests_to_run(index))
 
     def make_index_canonical(self, index):
         """
@@ -165,19 +221,88 @@ class TestDataView(QTreeView):
         menuItem.setEnabled(test_location[0] is not None)
         contextMenu.addAction(menuItem)
 
+        testnames = self.tests_to_run(index)
+        if len(testnames) > 1:
+            text = _('Run only selected tests')
+        else:
+            text = _('Run only this test')
         menuItem = create_action(
-                self, _('Run only this test'),
-                triggered=lambda: self.run_single_test(index))
-        result_category = self.model().testresults[index.row()].category
-        menuItem.setEnabled(result_category != Category.COVERAGE)
+                self, text, triggered=lambda: self.run_tests(index))
+        menuItem.setEnabled(bool(testnames))
         contextMenu.addAction(menuItem)
 
         return contextMenu
 
+    def schedule_resize(self, firstRow, lastRow):
+        """
+        Schedule resizing columns to fit rows that changed.
+
+        Nothing is done if the model contains more rows than
+        `self.fixed_width_threshold`, unless the model has been reset since
+        the last resize.
+
+        Arguments
+        ---------
+        firstRow : int
+            Index of first row that changed.
+        lastRow : int
+            Index of last row that changed (included in the range).
+        """
+        if (not self._full_resize
+                and self.model().rowCount() > self.fixed_width_threshold):
+            return
+        self._changed_ranges.append((firstRow, lastRow))
+        if not self._resize_timer.isActive():
+            self._resize_timer.start()
+
+    def sample_rows(self):
+        """
+        Return rows used for estimating the widths of the columns.
+
+        These are the first and the last `RESIZE_SAMPLE_SIZE` rows in the
+        model, together with at most `RESIZE_SAMPLE_SIZE` rows spread evenly
+        over the rows that changed since the last resize.
+        """
+        n = self.RESIZE_SAMPLE_SIZE
+        row_count = self.model().rowCount()
+        rows = set(range(min(n, row_count)))
+        rows.update(range(max(row_count - n, 0), row_count))
+        n_changed = sum(last - first + 1
+                        for (first, last) in self._changed_ranges)
+        step = max(math.ceil(n_changed / n), 1)
+        offset = 0
+        for (first, last) in self._changed_ranges:
+            start = first + (-offset) % step
+            rows.update(range(start, min(last + 1, row_count), step))
+            offset += last - first + 1
+        return sorted(rows)
+
     def resizeColumns(self):
-        """Resize column to fit their contents."""
-        for col in range(self.model().columnCount()):
-            self.resizeColumnToContents(col)
+        """
+        Resize columns to fit their contents.
+
+        The widths are estimated from the rows returned by `sample_rows()`.
+        If the model has been reset since the last resize, then columns are
+        set to the estimated width, otherwise they are only made wider.
+        """
+        self._resize_timer.stop()
+        model = self.model()
+        if model is None:
+            return
+        rows = self.sample_rows()
+        header = self.header()
+        for col in range(model.columnCount()):
+            width = header.sectionSizeHint(col)
+            for row in rows:
+                hint = self.sizeHintForIndex(model.index(row, col))
+                width = max(width, hint.width())
+            if col == 0:
+                width += self.indentation()
+            if not self._full_resize:
+                width = max(width, self.columnWidth(col))
+            self.setColumnWidth(col, width)
+        self._changed_ranges = []
+        self._full_resize = False
 
     def spanFirstColumn(self, firstRow, lastRow):
         """
@@ -212,6 +337,13 @@ class TestDataModel(QAbstractItemModel, SpyderConfigurationAccessor):
     a tuple (row, column, id). The id is TOPLEVEL_ID for top-level items.
     For level-2 items, the id is the index of the test in `self.testresults`.
 
+    The model also keeps a dictionary mapping test names to their row in
+    `self.testresults`, so that test results can be looked up by name in
+    constant time. If several results have the same name, then the name is
+    mapped to the first of them. Similarly, the number of test results in
+    every category is kept up to date, so that the summary can be computed
+    without going through all test results.
+
     Signals
     -------
     sig_summary(str)
@@ -245,6 +377,8 @@ class TestDataModel(QAbstractItemModel, SpyderConfigurationAccessor):
         self.beginResetModel()
         self.abbreviator = Abbreviator(res.name for res in new_value)
         self._testresults = new_value
+        self.rebuild_name_index()
+        self.category_counts = Counter(res.category for res in new_value)
         self.endResetModel()
         self.emit_summary()
 
@@ -258,8 +392,10 @@ class TestDataModel(QAbstractItemModel, SpyderConfigurationAccessor):
         """
         firstRow = len(self.testresults)
         lastRow = firstRow + len(new_tests) - 1
-        for test in new_tests:
+        for row, test in enumerate(new_tests, start=firstRow):
             self.abbreviator.add(test.name)
+            self._name_index.setdefault(test.name, row)
+            self.category_counts[test.category] += 1
         self.beginInsertRows(QModelIndex(), firstRow, lastRow)
         self.testresults.extend(new_tests)
         self.endInsertRows()
@@ -279,22 +415,37 @@ class TestDataModel(QAbstractItemModel, SpyderConfigurationAccessor):
         """
         idx_min = idx_max = None
         for new_result in new_results:
-            for (idx, old_result) in enumerate(self.testresults):
-                if old_result.name == new_result.name:
-                    self.testresults[idx] = new_result
-                    if idx_min is None:
-                        idx_min = idx_max = idx
-                    else:
-                        idx_min = min(idx_min, idx)
-                        idx_max = max(idx_max, idx)
-                    break
+            try:
+                idx = self._name_index[new_result.name]
+            except KeyError:
+                raise KeyError('test not found') from None
+            self.category_counts[self.testresults[idx].category] -= 1
+            self.category_counts[new_result.category] += 1
+            self.testresults[idx] = new_result
+            if idx_min is None:
+                idx_min = idx_max = idx
             else:
-                raise KeyError('test not found')
+                idx_min = min(idx_min, idx)
+                idx_max = max(idx_max, idx)
         if idx_min is not None:
             self.dataChanged.emit(self.index(idx_min, 0),
                                   self.index(idx_max, len(HEADERS) - 1))
             self.emit_summary()
 
+    def rebuild_name_index(self):
+        """Recompute dictionary mapping test names to rows."""
+        self._name_index = {}
+        for (row, result) in enumerate(self.testresults):
+            self._name_index.setdefault(result.name, row)
+
+    def row_of(self, name):
+        """
+        Return row of test result with given name.
+
+        Returns None if there is no test result with the given name.
+        """
+        return self._name_index.get(name)
+
     def index(self, row, column, parent=QModelIndex()):
         """
         Construct index to given item of data.
@@ -413,6 +564,7 @@ class TestDataModel(QAbstractItemModel, SpyderConfigurationAccessor):
             self.testresults.sort(key=attrgetter('message'), reverse=reverse)
         elif column == TIME_COLUMN:
             self.testresults.sort(key=key_time, reverse=reverse)
+        self.rebuild_name_index()
         self.endResetModel()
 
     def summary(self):
@@ -423,7 +575,7 @@ class TestDataModel(QAbstractItemModel, SpyderConfigurationAccessor):
 
         if not len(self.testresults):
             return _('No results to show.')
-        counts = Counter(res.category for res in self.testresults)
+        counts = self.category_counts
         if all(counts[cat] == 0
                for cat in (Category.FAIL, Category.OK, Category.SKIP)):
             txt = n_test_or_tests(counts[Category.PENDING])
@@ -435,12 +587,24 @@ class TestDataModel(QAbstractItemModel, SpyderConfigurationAccessor):
         if counts[Category.PENDING]:
             msg += _(', {} pending').format(counts[Category.PENDING])
         if counts[Category.COVERAGE]:
-            # find the coverage result and get its status
-            coverage = [res for res in self.testresults
-                        if res.category == Category.COVERAGE][0].status
-            msg += _(', {} coverage').format(coverage)
+            msg += _(', {} coverage').format(self.total_coverage())
         return msg
 
+    def total_coverage(self):
+        """
+        Return status of the result with the total test coverage.
+
+        This is the result named `COV_TEST_NAME`, which is looked up by name.
+        If there is no such result, return the status of the first coverage
+        result instead.
+        """
+        row = self.row_of(COV_TEST_NAME)
+        if row is not None and (self.testresults[row].category
+                                == Category.COVERAGE):
+            return self.testresults[row].status
+        return next(res.status for res in self.testresults
+                    if res.category == Category.COVERAGE)
+
     def emit_summary(self):
         """Emit sig_summary with summary for current results."""
         self.sig_summary.emit(self.summary())
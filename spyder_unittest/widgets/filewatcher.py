@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Watcher for changes to the Python files in a directory tree."""
+
+# Standard library imports
+import os
+import os.path as osp
+
+# Third party imports
+from qtpy.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+# Directories which are not watched, in addition to hidden directories
+IGNORED_DIRECTORIES = {'__pycache__', 'build', 'dist', 'node_modules'}
+
+
+class FileWatcher(QObject):
+    """
+    Watch the Python files in a directory tree and report changes in batches.
+
+    The files and directories are watched with a QFileSystemWatcher, so the
+    operating system reports changes and nothing is done while no files
+    change. Changes are collected until no file changed for `delay`
+    milliseconds; then they are reported together, so that saving several
+    files in a row leads to one notification.
+
+    Attributes
+    ----------
+    wdir : str or None
+        Root of the directory tree that is watched, or None if not watching.
+    changed : set of str
+        Absolute paths of files which changed since the last notification.
+
+    Signals
+    -------
+    sig_files_changed(list of str)
+        Emitted when files were changed, created or removed. The argument
+        contains the absolute paths of the files.
+    """
+
+    DEFAULT_DELAY = 500
+
+    sig_files_changed = Signal(object)
+
+    def __init__(self, delay=DEFAULT_DELAY, parent=None):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        delay : int
+            Time in milliseconds without changes before the changes are
+            reported.
+        parent : QObject or None
+            Parent of this object.
+        """
+        super().__init__(parent)
+        self.wdir = None
+        self.watcher = None
+        self.changed = set()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.emit_changes)
+
+    def start(self, wdir):
+        """Start watching directory tree with given root."""
+        self.stop()
+        self.wdir = wdir
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.file_changed)
+        self.watcher.directoryChanged.connect(self.directory_changed)
+        self.watch_directory(wdir)
+
+    def stop(self):
+        """Stop watching and discard changes that are not reported yet."""
+        self.timer.stop()
+        self.changed = set()
+        self.wdir = None
+        if self.watcher is not None:
+            self.watcher.deleteLater()
+            self.watcher = None
+
+    def files(self):
+        """Return absolute paths of all Python files that are watched."""
+        if self.watcher is None:
+            return []
+        return self.watcher.files()
+
+    def watch_directory(self, path):
+        """
+        Watch directory with the Python files and subdirectories in it.
+
+        Subdirectories which are already watched are not scanned again.
+        Return the Python files that were not watched before.
+        """
+        watched_dirs = set(self.watcher.directories())
+        new_files = []
+        todo = [path]
+        while todo:
+            directory = todo.pop()
+            if directory not in watched_dirs:
+                self.watcher.addPath(directory)
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not (entry.name.startswith('.')
+                            or entry.name in IGNORED_DIRECTORIES
+                            or entry.path in watched_dirs):
+                        todo.append(entry.path)
+                elif entry.name.endswith('.py'):
+                    new_files.append(entry.path)
+        watched = set(self.watcher.files())
+        new_files = [name for name in new_files if name not in watched]
+        if new_files:
+            self.watcher.addPaths(new_files)
+        return new_files
+
+    def file_changed(self, path):
+        """Register change to watched file."""
+        # Editors which save by replacing the file make the watcher drop it
+        if osp.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        self.add_changes([path])
+
+    def directory_changed(self, path):
+        """Register files created or removed in watched directory."""
+        watched = set(self.watcher.files())
+        removed = [name for name in watched
+                   if osp.dirname(name) == path and not osp.exists(name)]
+        if removed:
+            self.watcher.removePaths(removed)
+        if osp.isdir(path):
+            created = self.watch_directory(path)
+        else:
+            created = []
+        self.add_changes(removed + created)
+
+    def add_changes(self, paths):
+        """Store changed files and restart timer for reporting them."""
+        if not paths:
+            return
+        self.changed.update(paths)
+        self.timer.start()
+
+    def emit_changes(self):
+        """Report all stored changes."""
+        changed = sorted(self.changed)
+        self.changed = set()
+        if changed:
+            self.sig_files_changed.emit(changed)
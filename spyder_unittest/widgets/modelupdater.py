@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Scheduler for applying changes to the test data model in batches."""
+
+# Third party imports
+from qtpy.QtCore import QObject, QTimer
+
+
+class ModelUpdateScheduler(QObject):
+    """
+    Buffer changes to a TestDataModel and apply them in batches.
+
+    Every change to the model makes the view repaint itself, which is too
+    expensive if a test process reports thousands of results per second.
+    Instead of changing the model directly, changes are stored in this
+    object and applied together once every `interval` milliseconds.
+
+    New test results are buffered in `pending_additions`. Updated test results
+    which are already in the model are buffered in `pending_updates`, while
+    updated test results which are still waiting to be added replace the
+    buffered result in `pending_additions`. When changes are applied, all
+    additions are done before all updates.
+
+    Attributes
+    ----------
+    model : TestDataModel
+        Model to which the changes are applied.
+    pending_additions : list of TestResult
+        Test results to be added to the model.
+    pending_updates : dict of (str, TestResult)
+        Test results in the model to be replaced, indexed by test name.
+    """
+
+    DEFAULT_INTERVAL = 50
+
+    def __init__(self, model, interval=DEFAULT_INTERVAL, parent=None):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        model : TestDataModel
+            Model to which the changes are applied.
+        interval : int
+            Time in milliseconds between applying changes. If zero, changes
+            are applied immediately.
+        parent : QObject or None
+            Parent of this object.
+        """
+        super().__init__(parent)
+        self.model = model
+        self.pending_additions = []
+        self.pending_updates = {}
+        self._addition_index = {}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+        self.interval = interval
+
+    @property
+    def interval(self):
+        """Time in milliseconds between applying changes."""
+        return self._interval
+
+    @interval.setter
+    def interval(self, new_value):
+        """Setter for interval."""
+        self._interval = new_value
+        self.timer.setInterval(new_value)
+
+    def add_testresults(self, new_tests):
+        """
+        Schedule adding new test results to the model.
+
+        Arguments
+        ---------
+        new_tests : list of TestResult
+        """
+        start = len(self.pending_additions)
+        for (pos, test) in enumerate(new_tests, start=start):
+            self._addition_index.setdefault(test.name, pos)
+        self.pending_additions.extend(new_tests)
+        self.schedule()
+
+    def update_testresults(self, new_results):
+        """
+        Schedule replacing test results in the model by new results.
+
+        The tests in `new_results` should already be included in the model or
+        in the pending additions (otherwise a `KeyError` is raised).
+
+        Arguments
+        ---------
+        new_results: list of TestResult
+        """
+        for new_result in new_results:
+            name = new_result.name
+            if self.model.row_of(name) is not None:
+                self.pending_updates[name] = new_result
+            elif name in self._addition_index:
+                self.pending_additions[self._addition_index[name]] = new_result
+            else:
+                raise KeyError('test not found')
+        self.schedule()
+
+    def merge_testresults(self, new_results):
+        """
+        Schedule merging test results into the model.
+
+        Results of tests that are already included in the model or in the
+        pending additions replace the existing results; the other results are
+        added.
+
+        Arguments
+        ---------
+        new_results: list of TestResult
+        """
+        known = []
+        unknown = []
+        for res in new_results:
+            if (self.model.row_of(res.name) is not None
+                    or res.name in self._addition_index):
+                known.append(res)
+            else:
+                unknown.append(res)
+        if unknown:
+            self.add_testresults(unknown)
+        if known:
+            self.update_testresults(known)
+
+    def schedule(self):
+        """Apply changes now or when timer expires, depending on interval."""
+        if self.interval <= 0:
+            self.flush()
+        elif not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """Apply all pending changes to the model."""
+        self.timer.stop()
+        additions = self.pending_additions
+        updates = list(self.pending_updates.values())
+        self.clear()
+        if additions:
+            self.model.add_testresults(additions)
+        if updates:
+            self.model.update_testresults(updates)
+
+    def clear(self):
+        """Discard all pending changes."""
+        self.timer.stop()
+        self.pending_additions = []
+        self.pending_updates = {}
+        self._addition_index = {}
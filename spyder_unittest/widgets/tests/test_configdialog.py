@@ -10,6 +10,7 @@ import os
 
 # Third party imports
 from qtpy.QtWidgets import QDialogButtonBox
+import pytest
 
 # Local imports
 from spyder_unittest.widgets.configdialog import Config, ConfigDialog
@@ -44,7 +45,8 @@ frameworks = {r.name: r for r in [HamRunner, FakePytestRunner, SpamRunner]}
 versions = {
     'spam': {'available': False},
     'ham': {'available': True},
-    'pytest': {'available': True, 'plugins': {'pytest-cov', '3.1.4'}}
+    'pytest': {'available': True,
+               'plugins': {'pytest-cov': '3.1.4', 'pytest-xdist': '3.2.1'}}
 }
 
 
@@ -77,7 +79,7 @@ def test_configdialog_disables_unavailable_frameworks(qtbot):
 
 def test_configdialog_sets_initial_config(qtbot):
     config = Config(framework='pytest', wdir='/some/dir',
-                    coverage=True, args=['some', 'arg'])
+                    coverage=True, args=['some', 'arg'], workers=2)
     configdialog = ConfigDialog(frameworks, config, versions)
     assert configdialog.get_config() == config
 
@@ -118,14 +120,62 @@ def test_configdialog_coverage_checkbox(qtbot, monkeypatch):
 
 
 def test_configdialog_coverage_checkbox_pytestcov_noinstall(qtbot, monkeypatch):
-    local_versions = versions.copy()
-    local_versions['pytest']['plugins'] = {}
+    local_versions = dict(versions)
+    local_versions['pytest'] = {'available': True, 'plugins': {}}
     configdialog = ConfigDialog(frameworks, default_config(), local_versions)
     qtbot.addWidget(configdialog)
     configdialog.framework_combobox.setCurrentIndex(1)
     assert configdialog.coverage_checkbox.isEnabled() is False
 
 
+
+@pytest.mark.parametrize('plugins,enabled', [({'coverage': '7.2.7'}, True),
+                                             ({}, False)])
+def test_configdialog_coverage_checkbox_other_framework(
+        qtbot, plugins, enabled):
+    local_versions = dict(versions)
+    local_versions['ham'] = {'available': True, 'plugins': plugins}
+    configdialog = ConfigDialog(frameworks, default_config(), local_versions)
+    qtbot.addWidget(configdialog)
+    configdialog.framework_combobox.setCurrentIndex(0)
+    assert configdialog.coverage_checkbox.isEnabled() is enabled
+
+def test_configdialog_workers_spinbox(qtbot):
+    configdialog = ConfigDialog(frameworks, default_config(), versions)
+    qtbot.addWidget(configdialog)
+    configdialog.framework_combobox.setCurrentIndex(1)
+    assert configdialog.workers_spinbox.isEnabled()
+    configdialog.workers_spinbox.setValue(4)
+    assert configdialog.get_config().workers == 4
+    configdialog.framework_combobox.setCurrentIndex(0)
+    assert not configdialog.workers_spinbox.isEnabled()
+    assert configdialog.get_config().workers == 0
+
+
+def test_configdialog_workers_spinbox_xdist_noinstall(qtbot):
+    local_versions = dict(versions)
+    local_versions['pytest'] = {'available': True,
+                                'plugins': {'pytest-cov': '3.1.4'}}
+    config = Config(framework='pytest', workers=4)
+    configdialog = ConfigDialog(frameworks, config, local_versions)
+    qtbot.addWidget(configdialog)
+    assert not configdialog.workers_spinbox.isEnabled()
+    assert configdialog.get_config().workers == 0
+
+
+def test_configdialog_workers_spinbox_unittest(qtbot):
+    class FakeUnittestRunner:
+        name = 'unittest'
+
+    local_versions = {'unittest': {'available': True, 'plugins': {}}}
+    config = Config(framework='unittest', workers=4)
+    configdialog = ConfigDialog(
+        {'unittest': FakeUnittestRunner}, config, local_versions)
+    qtbot.addWidget(configdialog)
+    assert configdialog.workers_spinbox.isEnabled()
+    assert configdialog.get_config().workers == 4
+
+
 def test_configdialog_args_lineedit(qtbot):
     configdialog = ConfigDialog(frameworks, default_config(), versions)
     qtbot.addWidget(configdialog)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for coverageoverlay.py."""
+
+# Standard library imports
+from unittest.mock import Mock
+
+# Third party imports
+from qtpy.QtWidgets import QPlainTextEdit
+import pytest
+
+# Local imports
+from spyder_unittest.backend.coverageindex import (
+    CoverageIndex, FileLines, LineRanges)
+from spyder_unittest.widgets.coverageoverlay import (
+    CoverageOverlay, DECORATION_KEY)
+
+
+@pytest.fixture
+def editor(qtbot):
+    """Text editor with the part of the code editor API used by overlay."""
+    editor = QPlainTextEdit('\n'.join(f'line {i}' for i in range(1, 21)))
+    editor.filename = 'ham.py'
+    editor.decorations = Mock()
+    editor.get_buffer_block_numbers = Mock(return_value=(0, 9))
+    qtbot.addWidget(editor)
+    return editor
+
+
+@pytest.fixture
+def index():
+    index = Mock(spec=CoverageIndex)
+    index.lookup.return_value = FileLines(
+        0, LineRanges([(1, 1)]), LineRanges([(2, 3), (9, 12)]))
+    return index
+
+
+def test_coverageoverlay_marks_missing_lines_in_buffer(editor, index):
+    overlay = CoverageOverlay()
+    overlay.add_editor(editor)
+    overlay.set_index(index)
+    index.lookup.assert_called_with('ham.py')
+    key, decorations = editor.decorations.add_key.call_args[0]
+    assert key == DECORATION_KEY
+    assert [deco.cursor.blockNumber() for deco in decorations] == [1, 2, 8, 9]
+
+
+def test_coverageoverlay_updates_when_scrolling(editor, index):
+    overlay = CoverageOverlay()
+    overlay.set_index(index)
+    overlay.add_editor(editor)
+    editor.decorations.reset_mock()
+    editor.get_buffer_block_numbers.return_value = (10, 19)
+    editor.verticalScrollBar().valueChanged.emit(1)
+    decorations = editor.decorations.add_key.call_args[0][1]
+    assert [deco.cursor.blockNumber() for deco in decorations] == [10, 11]
+
+
+@pytest.mark.parametrize('lines', [None, FileLines(0, LineRanges(),
+                                                   LineRanges())])
+def test_coverageoverlay_removes_marks_without_missing_lines(
+        editor, index, lines):
+    index.lookup.return_value = lines
+    overlay = CoverageOverlay()
+    overlay.set_index(index)
+    overlay.add_editor(editor)
+    editor.decorations.remove_key.assert_called_once_with(DECORATION_KEY)
+    editor.decorations.add_key.assert_not_called()
+
+
+def test_coverageoverlay_removes_marks_when_editor_modified(editor, index):
+    overlay = CoverageOverlay()
+    overlay.set_index(index)
+    overlay.add_editor(editor)
+    editor.decorations.reset_mock()
+    editor.insertPlainText('new ')
+    editor.decorations.remove_key.assert_called_once_with(DECORATION_KEY)
+    editor.decorations.add_key.assert_not_called()
+
+
+def test_coverageoverlay_remove_editor(editor, index):
+    overlay = CoverageOverlay()
+    overlay.add_editor(editor)
+    overlay.remove_editor(editor)
+    editor.decorations.reset_mock()
+    overlay.set_index(index)
+    editor.verticalScrollBar().valueChanged.emit(1)
+    assert overlay.editors == []
+    editor.decorations.add_key.assert_not_called()
+
+
+def test_coverageoverlay_checks_file_when_added_and_saved(editor, index):
+    overlay = CoverageOverlay()
+    overlay.set_index(index)
+    overlay.add_editor(editor)
+    index.check.assert_called_once_with('ham.py')
+    editor.insertPlainText('new ')
+    assert index.check.call_count == 1
+    editor.document().setModified(False)
+    assert index.check.call_count == 2
+    decorations = editor.decorations.add_key.call_args[0][1]
+    assert [deco.cursor.blockNumber() for deco in decorations] == [1, 2, 8, 9]
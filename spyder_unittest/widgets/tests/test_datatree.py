@@ -6,13 +6,14 @@
 """Tests for unittestgui.py."""
 
 # Third party imports
-from qtpy.QtCore import QModelIndex, QPoint, Qt
+from qtpy.QtCore import QItemSelectionModel, QModelIndex, QPoint, Qt
 from qtpy.QtGui import QBrush, QColor, QContextMenuEvent
 from unittest.mock import Mock
 import pytest
 
 # Local imports
-from spyder_unittest.backend.runnerbase import Category, TestResult
+from spyder_unittest.backend.runnerbase import (Category, TestResult,
+                                                COV_TEST_NAME)
 from spyder_unittest.widgets.datatree import (
     COLORS, TestDataModel, TestDataView)
 
@@ -67,11 +68,38 @@ def test_go_to_test_definition_with_lineno_none(view_and_model, qtbot):
         view.go_to_test_definition(model.index(1, 0))
     assert blocker.args == ['ham.py', 0]
 
-def test_run_single_test(view_and_model, qtbot):
+def test_run_tests(view_and_model, qtbot):
     view, model = view_and_model
-    with qtbot.waitSignal(view.sig_single_test_run_requested) as blocker:
-        view.run_single_test(model.index(1, 0))
-    assert blocker.args == ['foo.bar']
+    with qtbot.waitSignal(view.sig_tests_run_requested) as blocker:
+        view.run_tests(model.index(1, 0))
+    assert blocker.args == [['foo.bar']]
+
+def test_tests_to_run_with_selection(qtbot):
+    view = TestDataView()
+    model = TestDataModel()
+    view.setModel(model)
+    model.testresults = [
+        TestResult(Category.OK, 'ok', 'ham'),
+        TestResult(Category.FAIL, 'failed', 'spam', extra_text='boom!'),
+        TestResult(Category.COVERAGE, '90%', COV_TEST_NAME),
+        TestResult(Category.OK, 'ok', 'eggs'),
+        TestResult(Category.FAIL, 'failure', 'pkg.test_bacon',
+                   message='collection error', collection_error=True),
+        TestResult(Category.FAIL, 'failure', 'pkg.test_collection',
+                   message='collection error')]
+    for row in [1, 2, 3, 4, 5]:
+        view.selectionModel().select(
+            model.index(row, 0),
+            QItemSelectionModel.Select | QItemSelectionModel.Rows)
+
+    # Coverage results and collection errors are not run
+    # A test whose message happens to read 'collection error' is run
+    assert view.tests_to_run(model.index(1, 2)) == [
+        'spam', 'eggs', 'pkg.test_collection']
+    assert view.tests_to_run(model.index(0, 0, model.index(1, 0))) == [
+        'spam', 'eggs', 'pkg.test_collection']
+    # Only the test under the mouse is run if it is not selected
+    assert view.tests_to_run(model.index(0, 1)) == ['ham']
 
 def test_make_index_canonical_with_index_in_column2(view_and_model):
     view, model = view_and_model
@@ -99,6 +127,12 @@ def test_build_context_menu(view_and_model):
     assert menu.actions()[1].text() == 'Go to definition'
     assert menu.actions()[2].text() == 'Run only this test'
 
+def test_build_context_menu_with_selection(view_and_model):
+    view, model = view_and_model
+    view.selectAll()
+    menu = view.build_context_menu(model.index(0, 0))
+    assert menu.actions()[2].text() == 'Run only selected tests'
+
 def test_build_context_menu_with_disabled_entries(view_and_model):
     view, model = view_and_model
     menu = view.build_context_menu(model.index(0, 0))
@@ -129,6 +163,46 @@ def test_build_context_menu_with_expanded_entry(view_and_model):
     assert menu.actions()[0].text() == 'Collapse'
     assert menu.actions()[0].isEnabled() == True
 
+def test_resizecolumns_fits_contents(view_and_model):
+    view, model = view_and_model
+    model.add_testresults([TestResult(Category.OK, 'status', 'x' * 100)])
+    view.resizeColumns()
+    hint = view.sizeHintForIndex(model.index(2, 1))
+    assert view.columnWidth(1) >= hint.width()
+
+def test_resizecolumns_is_deferred(qtbot, view_and_model):
+    view, model = view_and_model
+    view.resizeColumns()
+    old_width = view.columnWidth(1)
+    model.add_testresults([TestResult(Category.OK, 'status', 'x' * 100)])
+    assert view.columnWidth(1) == old_width
+    qtbot.waitUntil(lambda: view.columnWidth(1) > old_width)
+
+def test_resizecolumns_with_fixed_width(view_and_model):
+    view, model = view_and_model
+    view.resizeColumns()
+    view.fixed_width_threshold = 2
+    model.add_testresults([TestResult(Category.OK, 'status', 'x' * 100)])
+    assert not view._resize_timer.isActive()
+
+def test_sample_rows_is_bounded(view_and_model):
+    view, model = view_and_model
+    view.RESIZE_SAMPLE_SIZE = 2
+    model.add_testresults([TestResult(Category.OK, 'status', str(i))
+                           for i in range(100)])
+    view._changed_ranges = [(2, 51), (52, 101)]
+    assert view.sample_rows() == [0, 1] + list(range(2, 102, 50)) + [100, 101]
+
+def test_sample_rows_is_bounded_when_not_multiple_of_sample_size(
+        view_and_model):
+    view, model = view_and_model
+    view.RESIZE_SAMPLE_SIZE = 50
+    model.add_testresults([TestResult(Category.OK, 'status', str(i))
+                           for i in range(300)])
+    view._changed_ranges = [(100, 198)]
+    changed = [row for row in view.sample_rows() if 100 <= row <= 198]
+    assert len(changed) <= 50
+
 def test_testdatamodel_using_qtmodeltester(qtmodeltester):
     model = TestDataModel()
     res = [TestResult(Category.OK, 'status', 'foo.bar'),
@@ -240,6 +314,41 @@ def test_testdatamodel_replace_tests(qtbot):
         model.update_testresults([result2])
     assert model.testresults == [result2]
 
+def test_testdatamodel_update_tests_with_unknown_name_raises():
+    model = TestDataModel()
+    model.testresults = [TestResult(Category.OK, 'status', 'foo.bar')]
+    result = TestResult(Category.FAIL, 'error', 'foo.baz', 'kadoom')
+    with pytest.raises(KeyError):
+        model.update_testresults([result])
+
+
+def test_testdatamodel_update_tests_after_add_and_sort(qtbot):
+    model = TestDataModel()
+    model.testresults = [TestResult(Category.PENDING, 'pending', 'spam')]
+    model.add_testresults([TestResult(Category.PENDING, 'pending', 'ham'),
+                           TestResult(Category.PENDING, 'pending', 'eggs')])
+    model.sort(1, Qt.AscendingOrder)
+    assert [model.row_of(name) for name in ['eggs', 'ham', 'spam']] == [0, 1, 2]
+    result = TestResult(Category.OK, 'ok', 'spam')
+    model.update_testresults([result])
+    assert model.testresults[2] == result
+    assert model.row_of('unknown') is None
+
+def test_testdatamodel_summary_follows_adds_and_updates(qtbot):
+    model = TestDataModel()
+    model.testresults = [TestResult(Category.PENDING, 'pending', 'spam')]
+    model.add_testresults([TestResult(Category.PENDING, 'pending', 'ham')])
+    assert model.summary() == 'collected 2 tests'
+    model.update_testresults([TestResult(Category.FAIL, 'failed', 'spam')])
+    assert model.summary() == '1 test failed, 0 passed, 1 pending'
+    model.update_testresults([TestResult(Category.OK, 'passed', 'ham')])
+    model.add_testresults([TestResult(Category.COVERAGE, '42%', 'foo.py'),
+                           TestResult(Category.COVERAGE, '90%',
+                                      COV_TEST_NAME)])
+    assert model.summary() == '1 test failed, 1 passed, 90% coverage'
+    model.testresults = []
+    assert model.summary() == 'No results to show.'
+
 STANDARD_TESTRESULTS = [
     TestResult(Category.OK, 'status', 'foo.bar', time=2),
     TestResult(Category.FAIL, 'failure', 'fu.baz', 'kaboom',time=1),
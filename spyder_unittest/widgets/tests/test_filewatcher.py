@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for filewatcher.py."""
+
+# Standard library imports
+import os
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.widgets.filewatcher import FileWatcher
+
+
+@pytest.fixture
+def watcher_and_dir(qtbot, tmp_path):
+    (tmp_path / 'mod.py').write_text('')
+    (tmp_path / 'notes.txt').write_text('')
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'test_mod.py').write_text('')
+    (tmp_path / '__pycache__').mkdir()
+    (tmp_path / '__pycache__' / 'ignored.py').write_text('')
+    watcher = FileWatcher(delay=10)
+    watcher.start(str(tmp_path))
+    yield watcher, tmp_path
+    watcher.stop()
+
+
+def test_filewatcher_watches_python_files(watcher_and_dir):
+    watcher, tmp_path = watcher_and_dir
+    assert sorted(watcher.files()) == [
+        str(tmp_path / 'mod.py'), str(tmp_path / 'sub' / 'test_mod.py')]
+
+
+def test_filewatcher_reports_changes_together(qtbot, watcher_and_dir):
+    watcher, tmp_path = watcher_and_dir
+    with qtbot.waitSignal(watcher.sig_files_changed) as blocker:
+        watcher.file_changed(str(tmp_path / 'mod.py'))
+        watcher.file_changed(str(tmp_path / 'sub' / 'test_mod.py'))
+        watcher.file_changed(str(tmp_path / 'mod.py'))
+    assert blocker.args == [[str(tmp_path / 'mod.py'),
+                             str(tmp_path / 'sub' / 'test_mod.py')]]
+    assert watcher.changed == set()
+
+
+def test_filewatcher_reports_created_and_removed_files(
+        qtbot, watcher_and_dir):
+    watcher, tmp_path = watcher_and_dir
+    (tmp_path / 'sub' / 'test_new.py').write_text('')
+    os.remove(tmp_path / 'sub' / 'test_mod.py')
+    with qtbot.waitSignal(watcher.sig_files_changed) as blocker:
+        watcher.directory_changed(str(tmp_path / 'sub'))
+    assert blocker.args == [[str(tmp_path / 'sub' / 'test_mod.py'),
+                             str(tmp_path / 'sub' / 'test_new.py')]]
+    assert sorted(watcher.files()) == [
+        str(tmp_path / 'mod.py'), str(tmp_path / 'sub' / 'test_new.py')]
+
+
+def test_filewatcher_notices_saved_file(qtbot, watcher_and_dir):
+    watcher, tmp_path = watcher_and_dir
+    with qtbot.waitSignal(watcher.sig_files_changed, timeout=5000) as blocker:
+        (tmp_path / 'mod.py').write_text('x = 1\n')
+    assert str(tmp_path / 'mod.py') in blocker.args[0]
+
+
+def test_filewatcher_stop_discards_changes(qtbot, watcher_and_dir):
+    watcher, tmp_path = watcher_and_dir
+    watcher.file_changed(str(tmp_path / 'mod.py'))
+    watcher.stop()
+    assert watcher.files() == []
+    with qtbot.assertNotEmitted(watcher.sig_files_changed, wait=50):
+        pass
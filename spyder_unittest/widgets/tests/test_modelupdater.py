@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © Spyder Project Contributors
+# Licensed under the terms of the MIT License
+# (see LICENSE.txt for details)
+"""Tests for modelupdater.py."""
+
+# Standard library imports
+from unittest.mock import Mock
+
+# Third party imports
+import pytest
+
+# Local imports
+from spyder_unittest.backend.runnerbase import Category, TestResult
+from spyder_unittest.widgets.datatree import TestDataModel
+from spyder_unittest.widgets.modelupdater import ModelUpdateScheduler
+
+
+@pytest.fixture
+def model_and_updater(qtbot):
+    model = TestDataModel()
+    model.testresults = [TestResult(Category.PENDING, 'pending', 'spam')]
+    updater = ModelUpdateScheduler(model, interval=10)
+    return model, updater
+
+
+def test_modelupdater_applies_changes_in_one_batch(qtbot, model_and_updater):
+    model, updater = model_and_updater
+    model.add_testresults = Mock(wraps=model.add_testresults)
+    model.update_testresults = Mock(wraps=model.update_testresults)
+    updater.add_testresults([TestResult(Category.PENDING, 'pending', 'ham')])
+    updater.add_testresults([TestResult(Category.PENDING, 'pending', 'eggs')])
+    updater.update_testresults([TestResult(Category.OK, 'passed', 'spam')])
+    updater.update_testresults([TestResult(Category.FAIL, 'failed', 'ham')])
+    assert model.rowCount() == 1
+
+    qtbot.waitUntil(lambda: not updater.timer.isActive())
+    assert [res.status for res in model.testresults] == [
+        'passed', 'failed', 'pending']
+    model.add_testresults.assert_called_once()
+    model.update_testresults.assert_called_once()
+    assert updater.pending_additions == []
+    assert updater.pending_updates == {}
+
+
+def test_modelupdater_with_zero_interval_applies_immediately(
+        model_and_updater):
+    model, updater = model_and_updater
+    updater.interval = 0
+    updater.add_testresults([TestResult(Category.PENDING, 'pending', 'ham')])
+    assert model.rowCount() == 2
+
+
+def test_modelupdater_merge_testresults(qtbot, model_and_updater):
+    model, updater = model_and_updater
+    updater.add_testresults([TestResult(Category.PENDING, 'pending', 'ham')])
+    updater.merge_testresults([TestResult(Category.OK, 'passed', 'spam'),
+                               TestResult(Category.FAIL, 'failed', 'ham'),
+                               TestResult(Category.OK, 'passed', 'eggs')])
+    updater.flush()
+    assert [res.name for res in model.testresults] == ['spam', 'ham', 'eggs']
+    assert [res.status for res in model.testresults] == [
+        'passed', 'failed', 'passed']
+
+
+def test_modelupdater_update_unknown_test_raises(model_and_updater):
+    model, updater = model_and_updater
+    with pytest.raises(KeyError):
+        updater.update_testresults([TestResult(Category.OK, 'ok', 'ham')])
+
+
+def test_modelupdater_clear_discards_changes(qtbot, model_and_updater):
+    model, updater = model_and_updater
+    updater.add_testresults([TestResult(Category.PENDING, 'pending', 'ham')])
+    updater.clear()
+    updater.flush()
+    assert model.rowCount() == 1
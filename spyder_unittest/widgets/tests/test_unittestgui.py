@@ -17,6 +17,7 @@ import pytest
 # Local imports
 from spyder_unittest.backend.runnerbase import (Category, TestResult,
                                                 COV_TEST_NAME)
+from spyder_unittest.backend.outputbuffer import OutputBuffer
 from spyder_unittest.widgets.configdialog import Config
 from spyder_unittest.widgets.unittestgui import UnitTestWidget
 
@@ -37,6 +38,7 @@ def use_mock_model(widget):
     widget.testdatamodel = Mock()
     widget.testdatamodel.summary = lambda: 'message'
     widget.testdatamodel.testresults = []
+    widget.model_updater.model = widget.testdatamodel
 
 def test_unittestwidget_forwards_sig_edit_goto(qtbot, widget):
     with qtbot.waitSignal(widget.sig_edit_goto) as blocker:
@@ -81,6 +83,7 @@ def test_unittestwidget_tests_collected(widget):
     use_mock_model(widget)
     details = ['hammodule.spam', 'hammodule.eggs']
     widget.tests_collected(details)
+    widget.model_updater.flush()
     results = [TestResult(Category.PENDING, 'pending', 'hammodule.spam'),
                TestResult(Category.PENDING, 'pending', 'hammodule.eggs')]
     widget.testdatamodel.add_testresults.assert_called_once_with(results)
@@ -90,22 +93,150 @@ def test_unittestwidget_tests_started(widget):
     details = ['hammodule.spam']
     results = [TestResult(Category.PENDING, 'pending', 'hammodule.spam', 'running')]
     widget.tests_started(details)
+    widget.model_updater.flush()
     widget.testdatamodel.update_testresults.assert_called_once_with(results)
 
 def test_unittestwidget_tests_collect_error(widget):
     use_mock_model(widget)
     names_plus_msg = [('hammodule.spam', 'msg')]
     results = [TestResult(Category.FAIL, 'failure', 'hammodule.spam',
-                          'collection error', extra_text='msg')]
+                          'collection error', extra_text='msg',
+                          collection_error=True)]
     widget.tests_collect_error(names_plus_msg)
+    widget.model_updater.flush()
     widget.testdatamodel.add_testresults.assert_called_once_with(results)
 
 def test_unittestwidget_tests_yield_results(widget):
     use_mock_model(widget)
     results = [TestResult(Category.OK, 'ok', 'hammodule.spam')]
     widget.tests_yield_result(results)
+    widget.model_updater.flush()
     widget.testdatamodel.update_testresults.assert_called_once_with(results)
 
+@pytest.mark.parametrize('include_not_run', [False, True])
+def test_rerun_failed_tests(widget, tmpdir, include_not_run):
+    widget.config = Config('pytest', str(tmpdir))
+    widget.testdatamodel.testresults = [
+        TestResult(Category.OK, 'ok', 'ham'),
+        TestResult(Category.FAIL, 'failure', 'spam'),
+        TestResult(Category.SKIP, 'skipped', 'eggs'),
+        TestResult(Category.SKIP, 'not run', 'bacon'),
+        TestResult(Category.FAIL, 'failure', 'test_foo',
+                   message='collection error', collection_error=True)]
+    widget.run_tests = Mock()
+    widget.rerun_failed_tests(include_not_run)
+    expected = ['spam', 'bacon'] if include_not_run else ['spam']
+    widget.run_tests.assert_called_once_with(
+        selected_tests=expected, merge_results=True)
+
+def test_rerun_failed_tests_without_failures(widget, tmpdir):
+    widget.config = Config('pytest', str(tmpdir))
+    widget.testdatamodel.testresults = [
+        TestResult(Category.OK, 'ok', 'ham'),
+        TestResult(Category.FAIL, 'failure', 'test_foo',
+                   message='collection error', collection_error=True)]
+    widget.run_tests = Mock()
+    widget.rerun_failed_tests()
+    widget.run_tests.assert_not_called()
+    assert widget.status_label.text() == '<b>No tests to rerun</b>'
+
+def test_run_tests_merging_results_keeps_other_results(widget, tmpdir):
+    widget.framework_registry.create_runner = Mock(return_value=Mock())
+    widget.testdatamodel.testresults = [
+        TestResult(Category.OK, 'ok', 'ham'),
+        TestResult(Category.FAIL, 'failure', 'spam')]
+    widget.run_tests(Config('pytest', str(tmpdir)), selected_tests=['spam'],
+                     merge_results=True)
+    widget.tests_collected(['spam'])
+    widget.model_updater.flush()
+    assert [res.category for res in widget.testdatamodel.testresults] == [
+        Category.OK, Category.PENDING]
+
+    widget.tests_yield_result([TestResult(Category.OK, 'ok', 'spam')])
+    widget.process_finished([], 'output', True)
+    results = widget.testdatamodel.testresults
+    assert [res.name for res in results] == ['ham', 'spam']
+    assert [res.category for res in results] == [Category.OK, Category.OK]
+    assert widget.merge_results is False
+
+def test_set_watch_mode(widget, tmpdir):
+    widget.config = Config('pytest', str(tmpdir))
+    widget.watch_action.setChecked(True)
+    assert widget.file_watcher.wdir == str(tmpdir)
+    widget.watch_action.setChecked(False)
+    assert widget.file_watcher.wdir is None
+
+def test_set_watch_mode_with_invalid_config(widget):
+    widget.configure = Mock()
+    widget.watch_action.setChecked(True)
+    widget.configure.assert_called_once()
+    assert not widget.watch_action.isChecked()
+    assert widget.file_watcher.wdir is None
+
+def test_watched_files_changed_waits_for_test_run(widget):
+    widget.run_watched_tests = Mock()
+    widget.testrunner = Mock()
+    widget.watched_files_changed(['ham.py'])
+    widget.watched_files_changed(['spam.py'])
+    widget.run_watched_tests.assert_not_called()
+    assert widget.watch_changes == {'ham.py', 'spam.py'}
+    widget.process_finished([], 'output', True)
+    widget.run_watched_tests.assert_called_once_with()
+
+@pytest.fixture
+def watched_project(tmp_path):
+    (tmp_path / 'mod.py').write_text('def f(): return 1\n')
+    (tmp_path / 'helper.py').write_text('import mod\n')
+    (tmp_path / 'test_mod.py').write_text('from helper import mod\n')
+    (tmp_path / 'test_other.py').write_text('import os\n')
+    (tmp_path / 'conftest.py').write_text('')
+    return tmp_path
+
+@pytest.mark.parametrize('framework', ['pytest', 'unittest'])
+def test_run_watched_tests(widget, watched_project, framework):
+    config = Config(framework, str(watched_project))
+    widget.config = config
+    widget.file_watcher.files = Mock(return_value=[
+        str(path) for path in watched_project.glob('*.py')])
+    widget.run_tests = Mock()
+    widget.watch_changes = {str(watched_project / 'mod.py')}
+    widget.run_watched_tests()
+    selected_tests = ['test_mod.py' if framework == 'pytest' else 'test_mod']
+    widget.run_tests.assert_called_once_with(
+        config, selected_tests=selected_tests, merge_results=True,
+        run_pre_test_hook=False)
+    assert widget.watch_changes == set()
+
+def test_run_watched_tests_with_changed_conftest(widget, watched_project):
+    config = Config('pytest', str(watched_project))
+    widget.config = config
+    widget.run_tests = Mock()
+    widget.watch_changes = {str(watched_project / 'conftest.py')}
+    widget.run_watched_tests()
+    widget.run_tests.assert_called_once_with(config, run_pre_test_hook=False)
+
+def test_run_watched_tests_without_affected_tests(widget, watched_project):
+    widget.config = Config('pytest', str(watched_project))
+    widget.file_watcher.files = Mock(return_value=[
+        str(path) for path in watched_project.glob('*.py')])
+    widget.run_tests = Mock()
+    os.remove(watched_project / 'test_other.py')
+    widget.watch_changes = {str(watched_project / 'test_other.py')}
+    widget.run_watched_tests()
+    widget.run_tests.assert_not_called()
+    assert widget.status_label.text() == '<b>No tests affected by changes</b>'
+
+def test_unittestwidget_show_log_shows_end_of_output(widget, monkeypatch):
+    mock_editor = Mock()
+    monkeypatch.setattr('spyder_unittest.widgets.unittestgui.TextEditor',
+                        mock_editor)
+    monkeypatch.setattr('spyder_unittest.widgets.unittestgui.LOG_SIZE', 5)
+    widget.output = OutputBuffer()
+    widget.output.write(b'0123456789')
+    widget.show_log()
+    text = mock_editor.call_args[0][0]
+    assert text == '[... 5 older characters not shown ...]\n56789'
+
 def test_unittestwidget_set_message(widget):
     widget.status_label = Mock()
     widget.set_status_label('xxx')
@@ -120,6 +251,207 @@ def test_run_tests_starts_testrunner(widget):
     assert widget.framework_registry.create_runner.call_args[0][0] == 'ham'
     assert mockRunner.start.call_count == 1
 
+def test_create_runner_sets_writer_options(widget, monkeypatch):
+    options = {'writer_high_water_mark': 100, 'writer_policy': 'drop'}
+    monkeypatch.setattr(widget, 'get_conf',
+                        lambda option, default: options[option])
+    widget.framework_registry.create_runner = Mock(return_value=Mock())
+    runner = widget.create_runner('ham')
+    assert runner.writer_high_water_mark == 100
+    assert runner.writer_policy == 'drop'
+
+@pytest.mark.parametrize('daemon_mode', [False, True])
+def test_get_runner_reuses_daemon_runner(widget, daemon_mode, monkeypatch):
+    monkeypatch.setattr(widget, 'get_conf', lambda *args: daemon_mode)
+    config = Config(wdir=None, framework='pytest', coverage=False)
+    runner1 = widget.get_runner(config, sys.executable, [])
+    runner2 = widget.get_runner(config, sys.executable, [])
+    assert (runner1 is runner2) == daemon_mode
+    assert runner1.daemon == daemon_mode
+    widget.stop_daemon()
+
+def test_get_runner_without_daemon_when_collecting_coverage(
+        widget, monkeypatch):
+    monkeypatch.setattr(widget, 'get_conf', lambda *args: True)
+    runner1 = widget.get_runner(
+        Config('pytest', None, False), sys.executable, [])
+    runner1.stop_daemon = Mock()
+    runner2 = widget.get_runner(
+        Config('pytest', None, True), sys.executable, [])
+    assert runner2 is not runner1
+    assert not runner2.daemon
+    runner1.stop_daemon.assert_called_once_with()
+    assert widget.daemon_runner is None
+
+@pytest.mark.parametrize('matches', [True, False])
+def test_get_runner_with_standby_runner(widget, matches):
+    standby_runner = Mock()
+    standby_runner.is_standby_for.return_value = matches
+    widget.standby_runner = standby_runner
+    widget.framework_registry.create_runner = Mock()
+    config = Config('pytest', None, False)
+
+    runner = widget.get_runner(config, sys.executable, ['pythondir'])
+
+    standby_runner.is_standby_for.assert_called_once_with(
+        config, sys.executable, ['pythondir'])
+    assert (runner is standby_runner) == matches
+    assert standby_runner.stop_standby.called != matches
+    assert widget.standby_runner is None
+
+def test_process_finished_starts_standby(widget, tmpdir):
+    mock_runner = Mock()
+    widget.framework_registry.create_runner = Mock(return_value=mock_runner)
+    config = Config('pytest', str(tmpdir), False)
+    widget.config = config
+    widget.pythonpath = ['pythondir']
+    executable = widget.get_conf('executable', section='main_interpreter')
+
+    widget.process_finished([], 'output', True)
+
+    mock_runner.start_standby.assert_called_once_with(
+        config, executable, ['pythondir'])
+    assert widget.standby_runner is mock_runner
+
+def test_set_config_stops_standby(widget, tmpdir):
+    standby_runner = Mock()
+    widget.standby_runner = standby_runner
+    widget.config = Config('pytest', str(tmpdir), False)
+    standby_runner.stop_standby.assert_called_once_with()
+    assert widget.standby_runner is None
+
+def test_run_tests_shows_cached_tests(widget, tmpdir):
+    widget.framework_registry.create_runner = Mock(return_value=Mock())
+    mock_cache = Mock()
+    mock_cache.cached_tests.return_value = ['ham', 'spam']
+    widget.get_collection_cache = Mock(return_value=mock_cache)
+    widget.run_tests(Config('pytest', str(tmpdir), False))
+    widget.model_updater.flush()
+    assert [res.name for res in widget.testdatamodel.testresults] == [
+        'ham', 'spam']
+    assert widget.testrunner.collection_cache is mock_cache
+
+    widget.tests_collected(['spam', 'eggs'])
+    widget.process_finished([], 'output', True)
+
+    results = widget.testdatamodel.testresults
+    assert [res.name for res in results] == ['spam', 'eggs']
+    assert [res.status for res in results] == ['not run', 'not run']
+    assert widget.cached_testnames == set()
+
+def test_show_cached_tests(widget, tmpdir):
+    mock_cache = Mock()
+    mock_cache.cached_tests.return_value = ['ham', 'spam']
+    widget.get_collection_cache = Mock(return_value=mock_cache)
+    widget.show_cached_tests()
+    results = widget.testdatamodel.testresults
+    assert [res.name for res in results] == ['ham', 'spam']
+    assert [res.category for res in results] == [Category.SKIP] * 2
+
+@pytest.mark.parametrize('affected', [None, [], ['test_foo.py::test_ok']])
+def test_run_affected_tests(widget, tmpdir, affected):
+    config = Config('pytest', str(tmpdir), False, ['-x'])
+    widget.config = config
+    mock_map = Mock()
+    mock_map.affected_tests.return_value = affected
+    widget.get_impact_map = Mock(return_value=mock_map)
+    widget.get_versions = Mock(
+        return_value={'pytest': {'plugins': {'pytest-cov': '4.0'}}})
+    widget.run_tests = Mock()
+    widget.set_status_label = Mock()
+
+    widget.run_affected_tests()
+
+    mock_map.affected_tests.assert_called_once_with(
+        mock_map.changed_files.return_value)
+    if affected is None:
+        widget.run_tests.assert_called_once_with(config, record_impact=True)
+    elif affected:
+        widget.run_tests.assert_called_once_with(
+            selected_tests=['test_foo.py::test_ok'], record_impact=True,
+            merge_results=True)
+    else:
+        widget.run_tests.assert_not_called()
+        widget.set_status_label.assert_called_once_with(
+            'No tests affected by changes')
+
+def test_run_affected_tests_without_pytest_cov(widget, tmpdir, monkeypatch):
+    widget.config = Config('pytest', str(tmpdir), False)
+    widget.get_versions = Mock(return_value={'pytest': {'plugins': {}}})
+    widget.run_tests = Mock()
+    mock_information = Mock()
+    monkeypatch.setattr(
+        'spyder_unittest.widgets.unittestgui.QMessageBox.information',
+        mock_information)
+    widget.run_affected_tests()
+    mock_information.assert_called_once()
+    widget.run_tests.assert_not_called()
+
+def test_run_tests_with_coverage_records_impact(widget, tmpdir):
+    mock_runner = Mock()
+    widget.framework_registry.create_runner = Mock(return_value=mock_runner)
+    config = Config('pytest', str(tmpdir), True)
+    widget.run_tests(config)
+    assert mock_runner.impact_map.wdir == os.path.realpath(str(tmpdir))
+
+def test_set_config_loads_coverage_index(widget, tmpdir):
+    widget.config = Config('pytest', str(tmpdir))
+    assert widget.coverage_index.filename.endswith('.json')
+    assert widget.coverage_overlay.index is widget.coverage_index
+    widget.config = Config()
+    assert widget.coverage_index is None
+    assert widget.coverage_overlay.index is None
+
+def test_update_coverage_overlay_when_disabled(widget, tmpdir, monkeypatch):
+    widget.config = Config('pytest', str(tmpdir))
+    monkeypatch.setattr(widget, 'get_conf', lambda *args: False)
+    widget.update_coverage_overlay(False)
+    assert widget.coverage_overlay.index is None
+
+@pytest.mark.parametrize('coverage', [True, False])
+def test_run_tests_sets_coverage_index(widget, tmpdir, coverage):
+    mock_runner = Mock(coverage_index=None)
+    widget.framework_registry.create_runner = Mock(return_value=mock_runner)
+    widget.config = Config('pytest', str(tmpdir), coverage)
+    widget.run_tests(widget.config)
+    if coverage:
+        assert mock_runner.coverage_index is widget.coverage_index
+    else:
+        assert mock_runner.coverage_index is None
+
+@pytest.mark.parametrize('coverage', [False, True])
+def test_run_tests_sets_coverage_store(widget, tmpdir, coverage):
+    mock_runner = Mock(coverage_store=None)
+    widget.framework_registry.create_runner = Mock(return_value=mock_runner)
+    widget.run_tests(Config('unittest', str(tmpdir), coverage))
+    if coverage:
+        assert mock_runner.coverage_store.wdir == os.path.realpath(tmpdir)
+    else:
+        assert mock_runner.coverage_store is None
+
+def test_get_coverage_store_depends_on_framework(widget, tmpdir):
+    wdir = str(tmpdir)
+    filenames = {widget.get_coverage_store(Config(framework, wdir), wdir)
+                 .filename for framework in ['pytest', 'unittest']}
+    assert len(filenames) == 2
+
+@pytest.mark.parametrize('framework', ['pytest', 'nose2'])
+def test_run_tests_sets_history(widget, tmpdir, monkeypatch, framework):
+    mock_runner = Mock()
+    widget.framework_registry.create_runner = Mock(return_value=mock_runner)
+    get_conf = widget.get_conf
+    monkeypatch.setattr(
+        widget, 'get_conf',
+        lambda option, default=None, section=None:
+            True if option == 'reorder_tests'
+            else get_conf(option, default, section=section))
+    widget.run_tests(Config(framework, str(tmpdir)))
+    if framework == 'pytest':
+        assert mock_runner.history.filename.endswith('.json')
+    else:
+        assert mock_runner.history is None
+    assert mock_runner.reorder_tests is True
+
 def test_run_tests_with_pre_test_hook_returning_true(widget):
     mockRunner = Mock()
     widget.framework_registry.create_runner = Mock(return_value=mockRunner)
@@ -151,10 +483,10 @@ def test_unittestwidget_process_finished_abnormally_status_label(widget):
     expected_text = '<b>{}</b>'.format('Test process exited abnormally')
     assert widget.status_label.text() == expected_text
 
-def test_unittestwidget_handles_sig_single_test_run_requested(widget):
+def test_unittestwidget_handles_sig_tests_run_requested(widget):
     with patch.object(widget, 'run_tests') as mock_run_tests:
-        widget.testdataview.sig_single_test_run_requested.emit('testname')
-        mock_run_tests.assert_called_once_with(single_test='testname')
+        widget.testdataview.sig_tests_run_requested.emit(['ham', 'spam'])
+        mock_run_tests.assert_called_once_with(selected_tests=['ham', 'spam'])
 
 @pytest.mark.parametrize('framework', ['pytest', 'nose2'])
 @pytest.mark.parametrize('alltests', [True, False])
@@ -177,7 +509,7 @@ def test_run_tests_and_display_results(qtbot, widget, tmpdir, monkeypatch,
         if alltests:
             widget.run_tests(config)
         else:
-            widget.run_tests(config, single_test='test_foo.test_fail')
+            widget.run_tests(config, selected_tests=['test_foo.test_fail'])
 
     MockQMessageBox.assert_not_called()
     model = widget.testdatamodel
@@ -216,7 +548,8 @@ def test_run_tests_using_unittest_and_display_results(
         if alltests:
             widget.run_tests(config)
         else:
-            widget.run_tests(config, single_test='test_foo.MyTest.test_fail')
+            widget.run_tests(
+                config, selected_tests=['test_foo.MyTest.test_fail'])
 
     MockQMessageBox.assert_not_called()
     model = widget.testdatamodel
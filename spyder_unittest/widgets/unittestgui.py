@@ -8,6 +8,7 @@
 # Standard library imports
 import ast
 import copy
+import hashlib
 import os.path as osp
 import subprocess
 import sys
@@ -15,19 +16,30 @@ import sys
 # Third party imports
 from qtpy.QtCore import Signal
 from qtpy.QtWidgets import QLabel, QMessageBox, QVBoxLayout
+from spyder.api.config.decorators import on_conf_change
 from spyder.api.widgets.main_widget import PluginMainWidget
 from spyder.config.base import get_conf_path, get_translation
 from spyder.utils import icon_manager as ima
 from spyder.plugins.variableexplorer.widgets.texteditor import TextEditor
 
 # Local imports
+from spyder_unittest.backend.collectioncache import CollectionCache
+from spyder_unittest.backend.coverageindex import CoverageIndex
+from spyder_unittest.backend.coveragestore import CoverageStore
 from spyder_unittest.backend.frameworkregistry import FrameworkRegistry
+from spyder_unittest.backend.impactmap import ImpactMap
+from spyder_unittest.backend.importgraph import ImportGraph
 from spyder_unittest.backend.nose2runner import Nose2Runner
 from spyder_unittest.backend.pytestrunner import PyTestRunner
 from spyder_unittest.backend.runnerbase import Category, TestResult
+from spyder_unittest.backend.testhistory import TestHistory
 from spyder_unittest.backend.unittestrunner import UnittestRunner
 from spyder_unittest.widgets.configdialog import Config, ask_for_config
-from spyder_unittest.widgets.datatree import TestDataModel, TestDataView
+from spyder_unittest.widgets.coverageoverlay import CoverageOverlay
+from spyder_unittest.widgets.datatree import (
+    is_runnable, TestDataModel, TestDataView)
+from spyder_unittest.widgets.filewatcher import FileWatcher
+from spyder_unittest.widgets.modelupdater import ModelUpdateScheduler
 
 # This is needed for testing this module as a stand alone script
 try:
@@ -39,9 +51,25 @@ except KeyError:
 # Supported testing frameworks
 FRAMEWORKS = {Nose2Runner, PyTestRunner, UnittestRunner}
 
+# Maximum number of characters of output shown in the log dialog
+LOG_SIZE = 200_000
+
+
+def cache_filename(kind, key):
+    """
+    Return name of file in Spyder's configuration directory for storing
+    information of given kind which belongs to given key.
+    """
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return get_conf_path(f'unittest-{kind}-{digest}.json')
+
 
 class UnitTestWidgetActions:
     RunTests = 'run_tests'
+    RunAffectedTests = 'run_affected_tests'
+    RerunFailedTests = 'rerun_failed_tests'
+    RerunUnfinishedTests = 'rerun_unfinished_tests'
+    WatchMode = 'watch_mode'
     Config = 'config'
     ShowLog = 'show_log'
     CollapseAll = 'collapse_all'
@@ -65,16 +93,39 @@ class UnitTestWidget(PluginMainWidget):
 
     Attributes
     ----------
+    cached_testnames : set of str
+        Names of tests shown from the collection cache which have not been
+        collected by the current test run yet.
     config : Config or None
         Configuration for running tests, or `None` if not set.
+    coverage_index : CoverageIndex or None
+        Lines executed and missed in the last test run with coverage in the
+        working directory of the configuration, or `None` if the
+        configuration is not valid.
+    coverage_overlay : CoverageOverlay
+        Object which marks the lines in `coverage_index` that are not
+        covered in the editor. The plugin adds the code editors to it.
     default_wdir : str
         Default choice of working directory.
     dependencies : dict or None
         Cached dependencies, as returned by `self.get_versions()`.
     environment_for_dependencies : str or None
         Python interpreter for which `self.dependencies` is valid.
+    file_watcher : FileWatcher
+        Watcher for changes to the Python files in the working directory,
+        which is running if watch mode is enabled.
     framework_registry : FrameworkRegistry
         Registry of supported testing frameworks.
+    import_graph : ImportGraph
+        Imports between the watched files, used in watch mode.
+    merge_results : bool
+        Whether the results of the current test run are merged into the
+        results that are shown, instead of replacing them.
+    model_updater : ModelUpdateScheduler
+        Object which applies changes reported by the test process to
+        `self.testdatamodel` in batches.
+    output : OutputBuffer or None
+        Output of the last test process, shown by `show_log()`.
     pre_test_hook : function returning bool or None
         If set, contains function to run before running tests; abort the test
         run if hook returns False.
@@ -83,6 +134,15 @@ class UnitTestWidget(PluginMainWidget):
     testrunner : TestRunner or None
         Object associated with the current test process, or `None` if no test
         process is running at the moment.
+    daemon_runner : TestRunner or None
+        Object associated with the persistent test process, if daemon mode
+        is enabled and tests were run in that mode; otherwise `None`.
+    watch_changes : set of str
+        Files changed in watch mode for which no tests were run yet, because
+        a test run was in progress.
+    standby_runner : TestRunner or None
+        Object associated with the test process which was started in advance
+        for the next test run, if any; see `start_standby()`.
 
     Signals
     -------
@@ -104,27 +164,42 @@ class UnitTestWidget(PluginMainWidget):
         """Unit testing widget."""
         super().__init__(name, plugin, parent)
 
+        # Needed by config setter
+        self.standby_runner = None
+        self.file_watcher = FileWatcher(parent=self)
+        self.coverage_index = None
+        self.coverage_overlay = CoverageOverlay(parent=self)
+        self.cached_testnames = set()
         self.config = None
         self.default_wdir = None
         self.dependencies = None
         self.environment_for_dependencies = None
+        self.merge_results = False
         self.output = None
         self.pre_test_hook = None
         self.pythonpath = None
         self.testrunner = None
+        self.daemon_runner = None
+        self.watch_changes = set()
 
         self.testdataview = TestDataView(self)
         self.testdatamodel = TestDataModel(self)
         self.testdataview.setModel(self.testdatamodel)
         self.testdataview.sig_edit_goto.connect(self.sig_edit_goto)
-        self.testdataview.sig_single_test_run_requested.connect(
-            self.run_single_test)
+        self.testdataview.sig_tests_run_requested.connect(
+            self.run_selected_tests)
         self.testdatamodel.sig_summary.connect(self.set_status_label)
+        self.model_updater = ModelUpdateScheduler(self.testdatamodel,
+                                                  parent=self)
 
         self.framework_registry = FrameworkRegistry()
         for runner in FRAMEWORKS:
             self.framework_registry.register(runner)
 
+        self.import_graph = ImportGraph()
+        self.file_watcher.sig_files_changed.connect(
+            self.watched_files_changed)
+
         layout = QVBoxLayout()
         layout.addWidget(self.testdataview)
         self.setLayout(layout)
@@ -146,6 +221,40 @@ class UnitTestWidget(PluginMainWidget):
 
         menu = self.get_options_menu()
 
+        run_affected_action = self.create_action(
+            UnitTestWidgetActions.RunAffectedTests,
+            text=_('Run affected tests'),
+            tip=_('Run only tests affected by files changed since they ran'),
+            icon=self.create_icon('run'),
+            triggered=self.run_affected_tests)
+        self.add_item_to_menu(run_affected_action, menu)
+
+        rerun_failed_action = self.create_action(
+            UnitTestWidgetActions.RerunFailedTests,
+            text=_('Rerun failed tests'),
+            tip=_('Run only tests that failed, and keep the other results'),
+            icon=self.create_icon('run'),
+            triggered=lambda: self.rerun_failed_tests())
+        self.add_item_to_menu(rerun_failed_action, menu)
+
+        rerun_unfinished_action = self.create_action(
+            UnitTestWidgetActions.RerunUnfinishedTests,
+            text=_('Rerun failed and not run tests'),
+            tip=_('Run only tests that failed or did not run, and keep the '
+                  'other results'),
+            icon=self.create_icon('run'),
+            triggered=lambda: self.rerun_failed_tests(include_not_run=True))
+        self.add_item_to_menu(rerun_unfinished_action, menu)
+
+        self.watch_action = self.create_action(
+            UnitTestWidgetActions.WatchMode,
+            text=_('Watch for changes'),
+            tip=_('Run tests affected by changed Python files whenever '
+                  'files are saved'),
+            toggled=self.set_watch_mode,
+            initial=False)
+        self.add_item_to_menu(self.watch_action, menu)
+
         config_action = self.create_action(
             UnitTestWidgetActions.Config,
             text=_('Configure ...'),
@@ -232,19 +341,30 @@ class UnitTestWidget(PluginMainWidget):
     @config.setter
     def config(self, new_config):
         """Set test configuration and emit sig_newconfig if valid."""
+        self.stop_standby()
         self._config = new_config
+        self.restart_watching()
+        self.load_coverage_index()
         if self.config_is_valid():
             self.sig_newconfig.emit(new_config)
 
     def set_config_without_emit(self, new_config):
         """Set test configuration but do not emit any signal."""
+        self.stop_standby()
         self._config = new_config
+        self.restart_watching()
+        self.load_coverage_index()
 
     def show_log(self):
-        """Show output of testing process."""
+        """
+        Show end of output of testing process.
+
+        At most `LOG_SIZE` characters are shown, preceded by a line saying
+        how much older output is not shown.
+        """
         if self.output:
             te = TextEditor(
-                self.output,
+                self.output.tail(LOG_SIZE),
                 title=_("Unit testing output"),
                 readonly=True,
                 parent=self)
@@ -339,15 +459,17 @@ class UnitTestWidget(PluginMainWidget):
         if self.config_is_valid():
             self.run_tests()
 
-    def run_tests(self, config=None, single_test=None):
+    def run_tests(self, config=None, selected_tests=None,
+                  record_impact=False, merge_results=False,
+                  run_pre_test_hook=True):
         """
         Run unit tests.
 
         First, run `self.pre_test_hook` if it is set, and abort if its return
         value is `False`.
 
-        Then, run the unit tests. If `single_test` is not None, then only run
-        that test.
+        Then, run the unit tests. If `selected_tests` is not None, then only
+        run those tests.
 
         The process's output is consumed by `read_output()`.
         When the process finishes, the `finish` signal is emitted.
@@ -357,37 +479,62 @@ class UnitTestWidget(PluginMainWidget):
         config : Config or None
             configuration for unit tests. If None, use `self.config`.
             In either case, configuration should be valid.
-        single_test : str or None
-            If None, run all tests; otherwise, it is the name of the only test
-            to be run.
+        selected_tests : list of str or None
+            If None, run all tests; otherwise, it is the list of the names of
+            the tests to be run.
+        record_impact : bool
+            Whether to record which tests depend on which files, for running
+            only affected tests later. This is also done in test runs with
+            coverage.
+        merge_results : bool
+            Whether to merge the results into the results that are shown,
+            instead of clearing these first.
+        run_pre_test_hook : bool
+            Whether to run `self.pre_test_hook`.
         """
-        if self.pre_test_hook:
+        if self.pre_test_hook and run_pre_test_hook:
             if self.pre_test_hook() is False:
                 return
 
         if config is None:
             config = self.config
         pythonpath = self.pythonpath
-        self.testdatamodel.testresults = []
+        self.model_updater.clear()
+        self.model_updater.interval = self.get_conf(
+            'update_interval', ModelUpdateScheduler.DEFAULT_INTERVAL)
+        self.merge_results = merge_results
+        if not merge_results:
+            self.testdatamodel.testresults = []
         self.testdetails = []
-        tempfilename = get_conf_path('unittest.results')
-        self.testrunner = self.framework_registry.create_runner(
-            config.framework, self, tempfilename)
-        self.testrunner.sig_finished.connect(self.process_finished)
-        self.testrunner.sig_collected.connect(self.tests_collected)
-        self.testrunner.sig_collecterror.connect(self.tests_collect_error)
-        self.testrunner.sig_starttest.connect(self.tests_started)
-        self.testrunner.sig_testresult.connect(self.tests_yield_result)
-        self.testrunner.sig_stop.connect(self.tests_stopped)
+        executable = self.get_conf('executable', section='main_interpreter')
+        self.testrunner = self.get_runner(
+            config, executable, pythonpath, record_impact)
+        self.testrunner.collection_cache = self.get_collection_cache(config)
+        if record_impact or config.coverage:
+            self.testrunner.impact_map = self.get_impact_map(config)
+        self.testrunner.history = self.get_test_history(config)
+        if (config.coverage and self.config
+                and config.wdir == self.config.wdir):
+            self.testrunner.coverage_index = self.coverage_index
+        self.testrunner.reorder_tests = self.get_conf('reorder_tests', False)
+        self.cached_testnames = set()
+        if (selected_tests is None and not merge_results
+                and self.testrunner.collection_cache):
+            # Show tests before the test process has collected them
+            testnames = self.testrunner.collection_cache.cached_tests()
+            self.tests_collected(testnames)
+            self.cached_testnames = set(testnames)
 
         cov_path = self.get_conf('current_project_path', default='None',
                                  section='project_explorer')
         # config returns 'None' as a string rather than None
         cov_path = config.wdir if cov_path == 'None' else cov_path
-        executable = self.get_conf('executable', section='main_interpreter')
+        if config.coverage:
+            self.testrunner.coverage_store = self.get_coverage_store(
+                config, cov_path)
         try:
             self.testrunner.start(
-                config, cov_path, executable, pythonpath, single_test)
+                config, cov_path, executable, pythonpath, selected_tests)
         except RuntimeError:
             QMessageBox.critical(self,
                                  _("Error"), _("Process failed to start"))
@@ -395,6 +542,345 @@ class UnitTestWidget(PluginMainWidget):
             self.set_running_state(True)
             self.set_status_label(_('Running tests ...'))
 
+    def run_affected_tests(self):
+        """
+        Run only the tests affected by files changed since the tests ran.
+
+        Which tests depend on which files is recorded by pytest-cov in test
+        runs with coverage and in test runs started by this function; see
+        `ImpactMap` for details. If nothing is recorded yet, then all tests
+        are run. Otherwise, the results of the affected tests are merged into
+        the results that are shown.
+        """
+        if not self.config_is_valid():
+            self.configure()
+        if not self.config_is_valid():
+            return
+        config = self.config
+        impact_map = self.get_impact_map(config)
+        pytest_info = self.get_versions(use_cached=True).get('pytest', {})
+        if (impact_map is None
+                or 'pytest-cov' not in pytest_info.get('plugins', {})):
+            QMessageBox.information(
+                self, _('Run affected tests'),
+                _('Running affected tests is only supported for pytest '
+                  'and requires pytest-cov'))
+            return
+        affected = impact_map.affected_tests(impact_map.changed_files())
+        if affected is None:
+            self.run_tests(config, record_impact=True)
+        elif not affected:
+            self.set_status_label(_('No tests affected by changes'))
+        else:
+            self.run_tests(selected_tests=affected, record_impact=True,
+                           merge_results=True)
+
+    def rerun_failed_tests(self, include_not_run=False):
+        """
+        Run again the tests that failed in the results that are shown.
+
+        The new results are merged into the results that are shown, so the
+        results of the other tests are kept. Collection errors are not run
+        again, because they are named after modules instead of tests.
+
+        Parameters
+        ----------
+        include_not_run : bool
+            Whether to also run the tests that did not run, for instance
+            because the test run was stopped.
+        """
+        testnames = [
+            res.name for res in self.testdatamodel.testresults
+            if is_runnable(res) and res.category == Category.FAIL
+            or (include_not_run
+                and (res.category == Category.PENDING
+                     or (res.category == Category.SKIP
+                         and res.status == _('not run'))))]
+        if not testnames:
+            self.set_status_label(_('No tests to rerun'))
+            return
+        if not self.config_is_valid():
+            self.configure()
+        if not self.config_is_valid():
+            return
+        self.run_tests(selected_tests=testnames, merge_results=True)
+
+    def set_watch_mode(self, enabled):
+        """
+        Enable or disable watch mode.
+
+        In watch mode, the Python files in the working directory are watched,
+        and when some of them change, the tests affected by the changes are
+        run; see `run_watched_tests()`.
+        """
+        if enabled and not self.config_is_valid():
+            self.configure()
+            if not self.config_is_valid():
+                self.watch_action.setChecked(False)
+                return
+        self.watch_changes = set()
+        if enabled:
+            self.file_watcher.start(self.config.wdir)
+        else:
+            self.file_watcher.stop()
+            self.import_graph = ImportGraph()
+
+    def restart_watching(self):
+        """Watch the working directory of the config, if in watch mode."""
+        if self.file_watcher.wdir is None:
+            return
+        if self.config_is_valid():
+            if self.file_watcher.wdir != self.config.wdir:
+                self.file_watcher.start(self.config.wdir)
+                self.import_graph = ImportGraph()
+        else:
+            self.watch_action.setChecked(False)
+
+    def watched_files_changed(self, filenames):
+        """
+        Called in watch mode when files are changed.
+
+        If tests are running, the tests affected by the changes are run when
+        the current test run is finished.
+        """
+        self.watch_changes.update(filenames)
+        if self.testrunner is None:
+            self.run_watched_tests()
+
+    def run_watched_tests(self):
+        """
+        Run tests affected by the files changed in watch mode.
+
+        The affected tests are all tests in the test files which are changed
+        or which import, directly or indirectly, a changed module. If a
+        `conftest.py` file is changed, then all tests are run. The results
+        are merged into the results that are shown.
+        """
+        changed = sorted(self.watch_changes)
+        self.watch_changes = set()
+        if not changed or not self.config_is_valid():
+            return
+        config = self.config
+        if any(osp.basename(filename) == 'conftest.py'
+               for filename in changed):
+            self.run_tests(config, run_pre_test_hook=False)
+            return
+        runner_class = self.framework_registry.frameworks[config.framework]
+        affected = self.import_graph.dependent_files(
+            changed, self.file_watcher.files())
+        test_files = sorted(
+            filename for filename in affected
+            if runner_class.is_test_file(filename) and osp.exists(filename))
+        if not test_files:
+            self.set_status_label(_('No tests affected by changes'))
+            return
+        config, selected_tests = runner_class.select_test_files(
+            config, test_files)
+        self.run_tests(config, selected_tests=selected_tests,
+                       merge_results=True, run_pre_test_hook=False)
+
+    def get_collection_cache(self, config):
+        """
+        Return collection cache for tests run with given configuration.
+
+        Every combination of framework and working directory has its own
+        cache. Return None if the configuration is not valid.
+        """
+        if not self.config_is_valid(config):
+            return None
+        key = f'{config.framework}:{osp.realpath(config.wdir)}'
+        return CollectionCache(cache_filename('collection', key))
+
+    def get_impact_map(self, config):
+        """
+        Return impact map for tests run with given configuration.
+
+        Every working directory has its own map. Return None if the
+        configuration is not valid or if the framework does not support
+        impact analysis.
+        """
+        if not self.config_is_valid(config):
+            return None
+        runner_class = self.framework_registry.frameworks[config.framework]
+        if not runner_class.supports_impact_analysis:
+            return None
+        wdir = osp.realpath(config.wdir)
+        return ImpactMap(cache_filename('impact', wdir), wdir)
+
+    def get_coverage_store(self, config, cov_path):
+        """
+        Return store of the coverage accumulated over test runs.
+
+        Every combination of framework, working directory and directory for
+        which coverage is recorded has its own store, because the names of
+        the tests in the store depend on the framework. Return None if the
+        configuration is not valid.
+        """
+        if not self.config_is_valid(config):
+            return None
+        wdir = osp.realpath(config.wdir)
+        key = f'{config.framework}:{wdir}:{osp.realpath(cov_path)}'
+        return CoverageStore(cache_filename('coverage-store', key), wdir)
+
+    def load_coverage_index(self):
+        """
+        Load the coverage index for the current configuration.
+
+        Every working directory has its own index.
+        """
+        if self.config_is_valid():
+            wdir = osp.realpath(self.config.wdir)
+            self.coverage_index = CoverageIndex(
+                cache_filename('coverage', wdir))
+        else:
+            self.coverage_index = None
+        self.update_coverage_overlay()
+
+    @on_conf_change(option='show_coverage_in_editor')
+    def update_coverage_overlay(self, value=None):
+        """Mark lines in the coverage index in the editor, if enabled."""
+        if self.get_conf('show_coverage_in_editor', True):
+            self.coverage_overlay.set_index(self.coverage_index)
+        else:
+            self.coverage_overlay.set_index(None)
+
+    def get_test_history(self, config):
+        """
+        Return history of test durations and outcomes for given configuration.
+
+        Every combination of framework and working directory has its own
+        history. Return None if the configuration is not valid or if the
+        framework does not support scheduling.
+        """
+        if not self.config_is_valid(config):
+            return None
+        runner_class = self.framework_registry.frameworks[config.framework]
+        if not runner_class.supports_scheduling:
+            return None
+        key = f'{config.framework}:{osp.realpath(config.wdir)}'
+        return TestHistory(cache_filename('history', key))
+
+    def show_cached_tests(self):
+        """
+        Show tests in the collection cache for the current configuration.
+
+        This is done when a project is opened, so that the tests are shown
+        before they are run. Nothing is done while tests are running or if
+        the cache is empty.
+        """
+        cache = self.get_collection_cache(self.config)
+        if self.testrunner or not cache:
+            return
+        testnames = cache.cached_tests()
+        if not testnames:
+            return
+        self.model_updater.clear()
+        self.testdatamodel.testresults = [
+            TestResult(Category.SKIP, _('not run'), name)
+            for name in testnames]
+
+    def create_runner(self, framework):
+        """Create test runner for given framework and connect its signals."""
+        tempfilename = get_conf_path('unittest.results')
+        runner = self.framework_registry.create_runner(
+            framework, self, tempfilename)
+        runner.sig_finished.connect(self.process_finished)
+        runner.sig_collected.connect(self.tests_collected)
+        runner.sig_collecterror.connect(self.tests_collect_error)
+        runner.sig_starttest.connect(self.tests_started)
+        runner.sig_testresult.connect(self.tests_yield_result)
+        runner.sig_stop.connect(self.tests_stopped)
+        runner.writer_high_water_mark = self.get_conf(
+            'writer_high_water_mark', 10000)
+        runner.writer_policy = self.get_conf('writer_policy', 'block')
+        return runner
+
+    @on_conf_change(option=['writer_high_water_mark', 'writer_policy'])
+    def writer_options_changed(self, option, value):
+        """Stop idle test processes which were started with old options."""
+        self.stop_standby()
+        if self.testrunner is None:
+            self.stop_daemon()
+
+    def use_daemon(self, config):
+        """
+        Return whether to run tests with given configuration in daemon mode.
+
+        Daemon mode is used if it is enabled in the preferences and supported
+        by the framework. It is not used when collecting coverage, because
+        code that was run in earlier runs would not be measured.
+        """
+        runner_class = self.framework_registry.frameworks.get(
+            config.framework)
+        return (runner_class is not None
+                and runner_class.supports_daemon
+                and not config.coverage
+                and self.get_conf('daemon_mode', False))
+
+    def get_runner(self, config, executable, pythonpath, record_impact=False):
+        """
+        Return test runner for running tests with given configuration.
+
+        Daemon mode is not used if `record_impact` is set, so that pytest-cov
+        runs in a fresh process, as it expects. In daemon mode, reuse the
+        runner with the persistent test process if there is one. Otherwise,
+        use the runner with the test process started in advance if it was
+        started for the same configuration, interpreter and Python path.
+        """
+        runner_class = self.framework_registry.frameworks.get(
+            config.framework)
+        use_daemon = self.use_daemon(config) and not record_impact
+        if use_daemon and type(self.daemon_runner) is runner_class:
+            return self.daemon_runner
+        self.stop_daemon()
+        if (self.standby_runner and not use_daemon
+                and self.standby_runner.is_standby_for(
+                    config, executable, pythonpath)):
+            runner = self.standby_runner
+            self.standby_runner = None
+            return runner
+        self.stop_standby()
+        runner = self.create_runner(config.framework)
+        if use_daemon:
+            runner.daemon = True
+            self.daemon_runner = runner
+        return runner
+
+    def stop_daemon(self):
+        """Stop persistent test process, if any."""
+        if self.daemon_runner:
+            self.daemon_runner.stop_daemon()
+            self.daemon_runner = None
+
+    def start_standby(self):
+        """
+        Start test process for the next test run in advance, if possible.
+
+        This is done when a test run is finished, so that the next test run
+        does not have to wait for the Python interpreter to start and import
+        the test framework. It is not done in daemon mode, or if the
+        framework does not support it.
+        """
+        config = self.config
+        if not self.config_is_valid(config):
+            return
+        runner_class = self.framework_registry.frameworks[config.framework]
+        if not runner_class.supports_standby or self.use_daemon(config):
+            return
+        executable = self.get_conf('executable', section='main_interpreter')
+        runner = self.create_runner(config.framework)
+        try:
+            runner.start_standby(config, executable, self.pythonpath)
+        except RuntimeError:
+            return
+        self.standby_runner = runner
+
+    def stop_standby(self):
+        """Stop test process started in advance, if any."""
+        if self.standby_runner:
+            self.standby_runner.stop_standby()
+            self.standby_runner = None
+
     def set_running_state(self, state):
         """
         Change start/stop button according to whether tests are running.
@@ -435,7 +921,7 @@ class UnitTestWidget(PluginMainWidget):
         ----------
         testresults : list of TestResult
             Test results reported when the test process finished.
-        output : str
+        output : OutputBuffer
             Output from the test process.
         normal_exit : bool
             Whether test process exited normally.
@@ -444,11 +930,33 @@ class UnitTestWidget(PluginMainWidget):
         self.set_running_state(False)
         self.testrunner = None
         self.show_log_action.setEnabled(bool(output))
-        self.testdatamodel.add_testresults(testresults)
+        self.model_updater.flush()
+        if self.merge_results:
+            self.model_updater.merge_testresults(testresults)
+            self.model_updater.flush()
+            self.testdatamodel.emit_summary()
+            self.merge_results = False
+        else:
+            self.testdatamodel.add_testresults(testresults)
+        if normal_exit:
+            self.remove_stale_cached_tests()
+        self.cached_testnames = set()
         self.replace_pending_with_not_run()
         self.sig_finished.emit()
         if not normal_exit:
             self.set_status_label(_('Test process exited abnormally'))
+        self.update_coverage_overlay()
+        self.start_standby()
+        if self.watch_changes:
+            self.run_watched_tests()
+
+    def remove_stale_cached_tests(self):
+        """Remove tests shown from collection cache but not collected."""
+        if not self.cached_testnames:
+            return
+        self.testdatamodel.testresults = [
+            res for res in self.testdatamodel.testresults
+            if res.name not in self.cached_testnames]
 
     def replace_pending_with_not_run(self):
         """Change status of pending tests to 'not run''."""
@@ -463,29 +971,51 @@ class UnitTestWidget(PluginMainWidget):
             self.testdatamodel.update_testresults(new_results)
 
     def tests_collected(self, testnames):
-        """Called when tests are collected."""
+        """
+        Called when tests are collected.
+
+        Tests which are already shown because they are in the collection
+        cache are not added again.
+        """
+        if self.cached_testnames:
+            new_testnames = [name for name in testnames
+                             if name not in self.cached_testnames]
+            self.cached_testnames.difference_update(testnames)
+            testnames = new_testnames
         testresults = [TestResult(Category.PENDING, _('pending'), name)
                        for name in testnames]
-        self.testdatamodel.add_testresults(testresults)
+        self.add_testresults(testresults)
+
+    def add_testresults(self, testresults):
+        """
+        Schedule adding new test results to the model.
+
+        If `self.merge_results` is set, then results of tests that are
+        already shown replace the existing results instead.
+        """
+        if self.merge_results:
+            self.model_updater.merge_testresults(testresults)
+        else:
+            self.model_updater.add_testresults(testresults)
 
     def tests_started(self, testnames):
         """Called when tests are about to be run."""
         testresults = [TestResult(Category.PENDING, _('pending'), name,
                                   message=_('running'))
                        for name in testnames]
-        self.testdatamodel.update_testresults(testresults)
+        self.model_updater.update_testresults(testresults)
 
     def tests_collect_error(self, testnames_plus_msg):
         """Called when errors are encountered during collection."""
         testresults = [TestResult(Category.FAIL, _('failure'), name,
                                   message=_('collection error'),
-                                  extra_text=msg)
+                                  extra_text=msg, collection_error=True)
                        for name, msg in testnames_plus_msg]
-        self.testdatamodel.add_testresults(testresults)
+        self.add_testresults(testresults)
 
     def tests_yield_result(self, testresults):
         """Called when test results are received."""
-        self.testdatamodel.update_testresults(testresults)
+        self.model_updater.update_testresults(testresults)
 
     def tests_stopped(self):
         """Called when tests are stopped"""
@@ -501,11 +1031,11 @@ class UnitTestWidget(PluginMainWidget):
         """
         self.status_label.setText('<b>{}</b>'.format(msg))
 
-    def run_single_test(self, test_name: str) -> None:
+    def run_selected_tests(self, testnames: list[str]) -> None:
         """
-        Run a single test with the given name.
+        Run the tests with the given names.
         """
-        self.run_tests(single_test=test_name)
+        self.run_tests(selected_tests=testnames)
 
 
 def test():